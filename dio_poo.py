@@ -1,6 +1,6 @@
 import textwrap
 from abc import ABC, abstractclassmethod, abstractproperty
-from datetime import datetime
+from datetime import date, datetime
 
 
 class Cliente:
@@ -90,9 +90,7 @@ class ContaCorrente(Conta):
         self._limite_saques = limite_saques
 
     def sacar(self, valor):
-        numero_saques = len(
-            [transacao for transacao in self.historico.transacoes if transacao["tipo"] == Saque.__name__]
-        )
+        numero_saques = self.historico.transacoes_do_dia(Saque.__name__)
 
         excedeu_limite = valor > self._limite
         excedeu_saques = numero_saques >= self._limite_saques
@@ -119,20 +117,40 @@ class ContaCorrente(Conta):
 class Historico:
     def __init__(self):
         self._transacoes = []
+        self._dia = None
+        self._contagem_dia = {}
 
     @property
     def transacoes(self):
         return self._transacoes
 
-    def adicionar_transacao(self, transacao):
+    def adicionar_transacao(self, transacao, data=None):
+        data = data or datetime.now()
+        tipo = transacao.__class__.__name__
+
         self._transacoes.append(
             {
-                "tipo": transacao.__class__.__name__,
+                "tipo": tipo,
                 "valor": transacao.valor,
-                "data": datetime.now().strftime("%d-%m-%Y %H:%M:%s"),
+                "data": data.strftime("%d-%m-%Y %H:%M:%S"),
             }
         )
 
+        dia = data.date()
+        if self._dia is None or dia > self._dia:
+            self._dia = dia
+            self._contagem_dia = {}
+
+        if dia == self._dia:
+            self._contagem_dia[tipo] = self._contagem_dia.get(tipo, 0) + 1
+
+    def transacoes_do_dia(self, tipo, dia=None):
+        dia = dia or date.today()
+        if dia != self._dia:
+            return 0
+
+        return self._contagem_dia.get(tipo, 0)
+
 
 class Transacao(ABC):
     @property
@@ -190,8 +208,8 @@ def menu():
 
 
 def filtrar_cliente(cpf, clientes):
-    clientes_filtrados = [cliente for cliente in clientes if cliente.cpf == cpf]
-    return clientes_filtrados[0] if clientes_filtrados else None
+    # clientes é um dicionário cpf -> cliente, busca em O(1)
+    return clientes.get(cpf)
 
 
 def recuperar_conta_cliente(cliente):
@@ -280,7 +298,7 @@ def criar_cliente(clientes):
 
     cliente = PessoaFisica(nome=nome, data_nascimento=data_nascimento, cpf=cpf, endereco=endereco)
 
-    clientes.append(cliente)
+    clientes[cpf] = cliente
 
     print("\n=== Cliente criado com sucesso! ===")
 
@@ -307,7 +325,7 @@ def listar_contas(contas):
 
 
 def main():
-    clientes = []
+    clientes = {}
     contas = []
 
     while True:
@@ -339,4 +357,5 @@ def main():
             print("\n@@@ Operação inválida, por favor selecione novamente a operação desejada. @@@")
 
 
-main()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
\ No newline at end of file
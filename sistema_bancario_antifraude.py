@@ -0,0 +1,202 @@
+# Sistema Bancário em Python - Antifraude
+# Descrição: Pontuação de cada transação em fluxo, antes de ela ser
+#            aplicada, para sinalizar ou bloquear movimentações atípicas
+#
+# Uso:
+#    detector = DetectorAnomalias()
+#    adicionar_verificador(detector)             # sistema_bancario_poo
+#    adicionar_ouvinte(detector.registrar)
+#
+# O detector é um verificador (adicionar_verificador): é chamado sob a
+# trava da conta antes de cada transação e só a pontua. As estatísticas
+# da conta são atualizadas pelo ouvinte `registrar`, no evento
+# "transacao", e apenas com transações aplicadas (resultado OK): uma
+# tentativa recusada (pelo detector ou pelas regras da conta, ex.: saldo
+# insuficiente) não mexe nelas, então não dá para "treinar" a média com
+# saques que falham. Por conta ficam apenas estatísticas de tamanho
+# fixo, atualizadas em O(1) por evento:
+#
+# - média e variância móveis exponenciais (EWMA) dos valores;
+# - horários das últimas transações (anel), para a velocidade em janelas
+#   de um minuto e de uma hora;
+# - perfil de horário do dia (contagem por hora, 24 posições).
+#
+# As estatísticas ficam em arrays paralelos indexados pelo número da
+# conta (como as colunas do Historico), sem um objeto por conta: cerca
+# de 150 bytes por conta com os limites padrão.
+
+import math
+from array import array
+from collections import deque
+from threading import Lock
+
+from sistema_bancario_poo import BLOQUEADA, OK, notificar
+
+VALOR = "Valor fora do padrão da conta"
+VELOCIDADE = "Muitas transações em pouco tempo"
+HORARIO = "Horário incomum para a conta"
+
+#----------------------------------------
+# CLASSE: DetectorAnomalias
+#----------------------------------------
+#
+# Cada regra que dispara vira um motivo. Com pelo menos
+# `regras_para_bloquear` motivos a transação é bloqueada (BLOQUEADA);
+# com menos, segue e fica só sinalizada. Em ambos os casos o alerta é
+# guardado (últimos `alertas_guardados`) e os ouvintes recebem o evento
+# "transacao_suspeita". Só transações aplicadas entram nas médias, no
+# perfil de horário e na velocidade (ver registrar). Os registros de um
+# mesmo grupo de processar_lote são pontuados com as estatísticas de
+# antes do grupo, cujos eventos vêm depois de ele ser aplicado.
+#
+# - alfa: float - peso do valor novo nas médias móveis
+# - limite_z: float - desvios acima da média para a regra de valor
+# - aquecimento: int - transações antes de valor/horário valerem
+# - valor_minimo: int - centavos; abaixo disso a regra de valor não vale
+# - max_por_minuto, max_por_hora: int - transações aceitas por janela
+# - parcela_horario: float - fração mínima do histórico na hora do dia
+# - regras_para_bloquear: int
+# - alertas: deque - tuplas (numero, tipo, valor, motivos, bloqueada, data)
+#
+# + __call__(conta, transacao, tipo, data): int (OK ou BLOQUEADA)
+# + registrar(evento, **dados): ouvinte que atualiza as estatísticas
+# + estatisticas(numero): tuple (quantidade, media, desvio) ou None
+#
+
+class DetectorAnomalias:
+    JANELA_MINUTO = 60
+    JANELA_HORA = 3_600
+
+    def __init__(self, alfa=0.05, limite_z=4.0, aquecimento=20, valor_minimo=500_00, max_por_minuto=5,
+                 max_por_hora=20, parcela_horario=0.02, regras_para_bloquear=2, alertas_guardados=10_000):
+
+        if not 0 < max_por_minuto <= max_por_hora <= 255:
+            raise ValueError("Limites de velocidade inválidos")
+
+        self.alfa = alfa
+        self.limite_z = limite_z
+        self.aquecimento = aquecimento
+        self.valor_minimo = valor_minimo
+        self.max_por_minuto = max_por_minuto
+        self.max_por_hora = max_por_hora
+        self.parcela_horario = parcela_horario
+        self.regras_para_bloquear = regras_para_bloquear
+        self.alertas = deque(maxlen=alertas_guardados)
+
+        # colunas por número de conta; o anel guarda segundos desde a época
+        self._capacidade = 0
+        self._quantidades = array("I")
+        self._medias = array("d")
+        self._variancias = array("d")
+        self._horas = array("H")
+        self._recentes = array("I")
+        self._cabecas = array("B")
+        self._trava = Lock()
+
+    # amplia as colunas (com zeros) até caber o número da conta
+    def _crescer(self, numero):
+        with self._trava:
+            if numero < self._capacidade:
+                return
+
+            acrescimo = max(numero + 1, 2 * self._capacidade, 1_024) - self._capacidade
+            for coluna, largura in ((self._quantidades, 1), (self._medias, 1), (self._variancias, 1),
+                                    (self._horas, 24), (self._recentes, self.max_por_hora), (self._cabecas, 1)):
+                coluna.frombytes(bytes(acrescimo * largura * coluna.itemsize))
+            self._capacidade += acrescimo
+
+    def __call__(self, conta, transacao, tipo, data):
+        numero = conta.numero
+        if numero >= self._capacidade:
+            self._crescer(numero)
+
+        valor = transacao.valor
+        segundos = int(data.timestamp())
+        quantidade = self._quantidades[numero]
+        media = self._medias[numero]
+        aquecido = quantidade >= self.aquecimento
+        motivos = None
+
+        # valor: muito acima da média móvel (desvio mínimo de 10% da média)
+        if aquecido and valor >= self.valor_minimo:
+            desvio = max(math.sqrt(self._variancias[numero]), 0.1 * media)
+            if valor - media > self.limite_z * desvio:
+                motivos = [VALOR]
+
+        # velocidade: a N-ésima transação anterior ainda dentro da janela
+        recentes = self._recentes
+        tamanho_anel = self.max_por_hora
+        base = numero * tamanho_anel
+        cabeca = self._cabecas[numero]
+
+        anterior_minuto = recentes[base + (cabeca - self.max_por_minuto) % tamanho_anel]
+        anterior_hora = recentes[base + cabeca]
+        if ((anterior_minuto and segundos - anterior_minuto < self.JANELA_MINUTO)
+                or (anterior_hora and segundos - anterior_hora < self.JANELA_HORA)):
+            motivos = motivos or []
+            motivos.append(VELOCIDADE)
+
+        # horário: hora do dia rara no histórico da conta
+        if aquecido and self._horas[numero * 24 + data.hour] < self.parcela_horario * quantidade:
+            motivos = motivos or []
+            motivos.append(HORARIO)
+
+        if motivos is None:
+            return OK
+
+        bloqueada = len(motivos) >= self.regras_para_bloquear
+        motivos = tuple(motivos)
+        self.alertas.append((numero, tipo, valor, motivos, bloqueada, data))
+        notificar("transacao_suspeita", conta=conta, transacao=transacao, tipo=tipo, motivos=motivos,
+                  bloqueada=bloqueada, data=data)
+
+        return BLOQUEADA if bloqueada else OK
+
+#
+# MÉTODO registrar
+#
+# Ouvinte (adicionar_ouvinte): no evento "transacao" com resultado OK,
+# soma a transação às estatísticas da conta - médias móveis, perfil de
+# horário e anel de velocidade. Chamado sob a trava da conta.
+#
+
+    def registrar(self, evento, conta=None, transacao=None, resultado=None, data=None, **_):
+        if evento != "transacao" or not resultado:
+            return
+
+        numero = conta.numero
+        if numero >= self._capacidade:
+            self._crescer(numero)
+
+        cabeca = self._cabecas[numero]
+        self._recentes[numero * self.max_por_hora + cabeca] = int(data.timestamp())
+        self._cabecas[numero] = (cabeca + 1) % self.max_por_hora
+
+        self._atualizar(numero, transacao.valor, self._medias[numero], self._quantidades[numero],
+                        numero * 24 + data.hour)
+
+    def _atualizar(self, numero, valor, media, quantidade, posicao_hora):
+        if quantidade:
+            alfa = self.alfa
+            diferenca = valor - media
+            self._medias[numero] = media + alfa * diferenca
+            self._variancias[numero] = (1 - alfa) * (self._variancias[numero] + alfa * diferenca * diferenca)
+        else:
+            self._medias[numero] = valor
+
+        # contagens por hora em 16 bits: ao saturar, todas caem pela metade
+        # (a proporção entre as horas, que é o que a regra usa, se mantém)
+        horas = self._horas
+        if horas[posicao_hora] == 0xFFFF:
+            inicio = posicao_hora - posicao_hora % 24
+            for posicao in range(inicio, inicio + 24):
+                horas[posicao] >>= 1
+            quantidade >>= 1
+
+        horas[posicao_hora] += 1
+        self._quantidades[numero] = quantidade + 1
+
+    def estatisticas(self, numero):
+        if numero >= self._capacidade or not self._quantidades[numero]:
+            return None
+        return self._quantidades[numero], self._medias[numero], math.sqrt(self._variancias[numero])
@@ -0,0 +1,230 @@
+# Sistema Bancário em Python - Auditoria
+# Descrição: Confere se o saldo de cada conta é a soma do seu histórico e
+#            se o histórico não foi alterado (cadeia de selos)
+#
+# Uso:
+#    python sistema_bancario_auditoria.py --dados DIRETORIO [--processos 4] [--completa]
+#
+# Os dados vêm do journal do diretório (sistema_bancario_journal). Cada
+# Historico guarda um selo encadeado e o saldo acumulado a cada
+# INTERVALO_CHECKPOINT transações, e encadeia uma a uma as transações
+# depois do último selo (Historico.verificar); a auditoria só confere o
+# que ainda não foi verificado, a menos que seja completa.
+#
+# Limite da auditoria pela linha de comando: os selos gravados no
+# snapshot conferem o que veio dele, mas as transações reaplicadas do
+# journal (gravado depois do snapshot) são seladas de novo na própria
+# recuperação, a partir do journal, que só tem um crc32 por registro.
+# Uma alteração nesse trecho do journal não é detectada; para cobri-lo,
+# auditar as contas em memória (auditar_contas) antes do snapshot.
+#
+# Com --processos N > 1 as contas são divididas em partes de até
+# TRANSACOES_POR_PARTE transações, verificadas em processos separados;
+# só algumas partes ficam em trânsito por vez, então a memória extra não
+# depende do tamanho do banco.
+
+import argparse
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import get_context
+
+import sistema_bancario_journal as journal
+
+from sistema_bancario_poo import TAMANHO_SELO, Historico, verificar_colunas
+
+TRANSACOES_POR_PARTE = 1_000_000
+
+HISTORICO_ALTERADO = "Histórico alterado ou inconsistente"
+SALDO_DIVERGENTE = "Saldo da conta difere do histórico"
+
+#----------------------------------------
+# CLASSE: RelatorioAuditoria
+#----------------------------------------
+#
+# - contas: int - contas auditadas
+# - transacoes: int - transações verificadas
+# - divergencias: list - tuplas (numero da conta, motivo, posição da
+#                 primeira transação inconsistente ou None)
+# - segundos: float - duração da auditoria
+#
+# + transacoes_por_segundo(): float
+#
+
+class RelatorioAuditoria:
+    __slots__ = ("contas", "transacoes", "divergencias", "segundos")
+
+    def __init__(self):
+        self.contas = 0
+        self.transacoes = 0
+        self.divergencias = []
+        self.segundos = 0.0
+
+    @property
+    def transacoes_por_segundo(self):
+        return self.transacoes / self.segundos if self.segundos else 0.0
+
+# divergência de uma conta (ou None), com a trava da conta adquirida
+def _auditar_conta(conta, completa):
+    historico = conta._historico
+
+    if historico is None:
+        return None if conta._saldo == 0 else (conta.numero, SALDO_DIVERGENTE, None)
+
+    posicao = historico.verificar(completa)
+    if posicao is not None:
+        return conta.numero, HISTORICO_ALTERADO, posicao
+
+    if conta._saldo != historico._saldo_acumulado:
+        return conta.numero, SALDO_DIVERGENTE, None
+
+    return None
+
+# trecho ainda não verificado de uma conta, copiado sob a trava para ir a
+# outro processo: o intervalo anterior entra só com checkpoint e selo
+def _copiar_trecho(conta, completa):
+    historico = conta._historico
+    inicio = 0 if completa else historico._verificados
+    posicao = inicio * Historico.INTERVALO_CHECKPOINT
+    anterior = max(inicio - 1, 0)
+
+    return (conta.numero, conta._saldo, posicao, len(historico._checkpoints), *historico._colunas(posicao),
+            historico._checkpoints[anterior:], bytes(historico._selos[anterior * TAMANHO_SELO:]),
+            historico._saldo_acumulado, inicio > 0, historico._cauda)
+
+# executado nos processos: divergências dos trechos de uma parte
+def _auditar_trechos(trechos):
+    divergencias = []
+
+    for numero, saldo, posicao, _, tipos, valores, datas, checkpoints, selos, saldo_final, continuacao, cauda in trechos:
+        problema = verificar_colunas(tipos, valores, datas, checkpoints, selos, saldo_final, continuacao, cauda)
+
+        if problema is not None:
+            divergencias.append((numero, HISTORICO_ALTERADO, posicao + problema))
+        elif saldo != saldo_final:
+            divergencias.append((numero, SALDO_DIVERGENTE, None))
+
+    return divergencias
+
+# partes de até TRANSACOES_POR_PARTE transações, montadas sob demanda
+def _partes(contas, completa, relatorio):
+    parte, tamanho = [], 0
+
+    for conta in contas:
+        relatorio.contas += 1
+
+        if conta._historico is None:
+            if conta._saldo != 0:
+                relatorio.divergencias.append((conta.numero, SALDO_DIVERGENTE, None))
+            continue
+
+        with conta.trava:
+            trecho = _copiar_trecho(conta, completa)
+
+        parte.append(trecho)
+        tamanho += len(trecho[4])
+        relatorio.transacoes += len(trecho[4])
+
+        if tamanho >= TRANSACOES_POR_PARTE:
+            yield parte
+            parte, tamanho = [], 0
+
+    if parte:
+        yield parte
+
+#########################
+# Função AUDITAR_CONTAS #
+#########################
+#
+# Verifica o histórico e o saldo das contas, em série ou em vários
+# processos. Contas sem divergência ficam marcadas como verificadas até
+# o último intervalo selado, então a próxima auditoria começa dali.
+#
+# Args:
+#    contas (iterável de Conta): contas a auditar
+#    processos (int): processos em paralelo - 1 = no próprio processo
+#    completa (bool): refaz a verificação desde a primeira transação
+# Retorna:
+#    RelatorioAuditoria
+#
+
+def auditar_contas(contas, processos=1, completa=False):
+    relatorio = RelatorioAuditoria()
+    inicio = time.perf_counter()
+
+    if processos <= 1:
+        for conta in contas:
+            with conta.trava:
+                historico = conta._historico
+                if historico is not None:
+                    verificados = 0 if completa else historico._verificados
+                    relatorio.transacoes += len(historico) - verificados * Historico.INTERVALO_CHECKPOINT
+
+                divergencia = _auditar_conta(conta, completa)
+
+            relatorio.contas += 1
+            if divergencia is not None:
+                relatorio.divergencias.append(divergencia)
+
+        relatorio.segundos = time.perf_counter() - inicio
+        return relatorio
+
+    contas = contas if hasattr(contas, "__getitem__") else list(contas)
+    por_numero = {conta.numero: conta for conta in contas}
+
+    # spawn, como na exportação; no máximo 2 partes por processo em trânsito
+    with ProcessPoolExecutor(processos, mp_context=get_context("spawn")) as executor:
+        pendentes = {}
+        for parte in _partes(contas, completa, relatorio):
+            if len(pendentes) >= 2 * processos:
+                prontos, _ = wait(pendentes, return_when=FIRST_COMPLETED)
+                for futuro in prontos:
+                    _concluir_parte(pendentes.pop(futuro), futuro.result(), por_numero, relatorio)
+
+            futuro = executor.submit(_auditar_trechos, parte)
+            pendentes[futuro] = [(trecho[0], trecho[3]) for trecho in parte]
+
+        for futuro, selados in pendentes.items():
+            _concluir_parte(selados, futuro.result(), por_numero, relatorio)
+
+    relatorio.segundos = time.perf_counter() - inicio
+    return relatorio
+
+# registra as divergências de uma parte e marca os históricos íntegros como verificados
+def _concluir_parte(selados, divergencias, por_numero, relatorio):
+    relatorio.divergencias.extend(divergencias)
+    divergentes = {numero for numero, motivo, _ in divergencias if motivo == HISTORICO_ALTERADO}
+
+    for numero, intervalos in selados:
+        if numero not in divergentes:
+            historico = por_numero[numero]._historico
+            historico._verificados = max(historico._verificados, intervalos)
+
+#==================================
+# PROGRAMA PRINCIPAL
+#==================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Auditoria dos saldos e históricos do Sistema Bancário",
+                                     epilog="As transações reaplicadas do journal depois do último snapshot são "
+                                            "seladas na recuperação: alterações nelas não são detectadas.")
+    parser.add_argument("--dados", required=True, help="diretório do journal e dos snapshots")
+    parser.add_argument("--processos", type=int, default=os.cpu_count() or 1, help="processos em paralelo")
+    parser.add_argument("--completa", action="store_true", help="verifica desde a primeira transação")
+    args = parser.parse_args()
+
+    _, contas = journal.recuperar(args.dados)
+    relatorio = auditar_contas(contas, args.processos, args.completa)
+
+    print(f"Contas auditadas: {relatorio.contas}")
+    print(f"Transações verificadas: {relatorio.transacoes}")
+    print(f"Divergências: {len(relatorio.divergencias)}")
+    for numero, motivo, posicao in relatorio.divergencias:
+        print(f"    conta {numero}: {motivo}" + (f" (a partir da transação {posicao})" if posicao is not None else ""))
+    print(f"Tempo: {relatorio.segundos:.2f} s ({relatorio.transacoes_por_segundo:,.0f} transações/s)")
+
+    if relatorio.divergencias:
+        parser.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1680 @@
+# Sistema Bancário em Python - Benchmarks
+# Descrição: Medições de desempenho dos caminhos críticos do sistema_bancario_poo
+#
+# Uso:
+#    python sistema_bancario_benchmark.py [benchmark ...] [--tamanhos 1000,10000,...] [--completo]
+#                                         [--semente 42] [--json resultado.json]
+#                                         [--baseline anterior.json --tolerancia 0.10]
+#
+# Sem argumentos executa todos os benchmarks com os tamanhos padrão;
+# --completo usa de 10³ a 10⁷. Os dados sintéticos (clientes, contas e
+# operações) saem de geradores com a semente de --semente (padrão 42),
+# que cada benchmark recebe, então duas execuções com a mesma semente
+# medem exatamente a mesma carga.
+#
+# --json grava os resultados (e o ambiente) em um arquivo; --baseline
+# compara com um arquivo gravado antes e termina com código 1 se alguma
+# métrica piorou além da tolerância.
+
+import argparse
+import heapq
+import json
+import os
+import platform
+import random
+import shutil
+import tempfile
+import threading
+import time
+import tracemalloc
+from array import array
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+
+import sistema_bancario_journal as journal
+
+from sistema_bancario_shards import BancoParticionado
+
+from sistema_bancario_importacao import importar_clientes
+
+from sistema_bancario_exportacao import exportar_historicos, exportar_paralelo
+
+from sistema_bancario_antifraude import DetectorAnomalias
+
+from sistema_bancario_auditoria import auditar_contas
+
+from sistema_bancario_camadas import LIMITE_QUENTE, HistoricoEscalonado, _compactador
+
+from sistema_bancario_poo import (OK, AgregadosContas, ClienteRegistry, Conta, ContaCorrente, Deposito, Historico,
+                                  IndiceContas, PessoaFisica, ResultadoOperacao, Saque, Transferencia, abrir_conta,
+                                  adicionar_ouvinte, cadastrar_cliente, completar_cpf, configurar_idempotencia,
+                                  listar_contas, np, processar_fim_do_dia, processar_lote, remover_ouvinte,
+                                  saldos_centavos, somar_centavos, totalizar_saldos, validar_cpf, validar_cpfs)
+
+TAMANHOS_PADRAO = (1_000, 10_000, 100_000, 1_000_000)
+TAMANHOS_COMPLETOS = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+AMOSTRAS_BUSCA = 100_000
+SEMENTE_PADRAO = 42
+
+# sentido de cada métrica na comparação com a baseline
+MAIOR_MELHOR = 1
+MENOR_MELHOR = -1
+INFORMATIVA = 0
+
+# colunas que identificam uma linha (as demais são métricas)
+CHAVES = ("tamanho", "lote_fsync", "shards")
+
+NOMES = ("Ana", "Bruno", "Carla", "Diego", "Eduarda", "Felipe", "Gabriela", "Heitor", "Isabela", "João")
+SOBRENOMES = ("Silva", "Santos", "Oliveira", "Souza", "Pereira", "Lima", "Costa", "Ferreira", "Almeida", "Rocha")
+
+#####################
+# Função GERAR_CPFS #
+#####################
+#
+# Gera CPFs sintéticos válidos (somente números, 11 dígitos, com os
+# dígitos verificadores) e únicos
+#
+# Args:
+#    quantidade (int): quantidade de CPFs
+# Retorna:
+#    list: CPFs gerados
+#
+
+def gerar_cpfs(quantidade):
+    return [completar_cpf(f"{i:09d}") for i in range(1, quantidade + 1)]
+
+#########################
+# Função GERAR_CLIENTES #
+#########################
+#
+# Cadastra clientes sintéticos (nome, nascimento e endereço sorteados)
+# pelo mesmo caminho do menu (cadastrar_cliente)
+#
+# Args:
+#    quantidade (int): quantidade de clientes
+#    aleatorio (random.Random): gerador - padrão: semente fixa
+# Retorna:
+#    ClienteRegistry: cadastro com os clientes
+#
+
+def gerar_clientes(quantidade, aleatorio=None):
+    aleatorio = aleatorio or random.Random(SEMENTE_PADRAO)
+    clientes = ClienteRegistry()
+
+    for cpf in gerar_cpfs(quantidade):
+        nome = f"{aleatorio.choice(NOMES)} {aleatorio.choice(SOBRENOMES)}"
+        nascimento = f"{aleatorio.randint(1, 28):02d}/{aleatorio.randint(1, 12):02d}/{aleatorio.randint(1940, 2006)}"
+        endereco = f"Rua {aleatorio.choice(SOBRENOMES)}, {aleatorio.randint(1, 9999)} - Centro - São Paulo/SP"
+        cadastrar_cliente(clientes, cpf, nome, nascimento, endereco)
+
+    return clientes
+
+#######################
+# Função GERAR_CONTAS #
+#######################
+#
+# Abre uma conta corrente para cada cliente (abrir_conta)
+#
+# Args:
+#    clientes (ClienteRegistry): titulares
+#    saldo_maximo (int): saldo inicial sorteado até esse valor,
+#                        em centavos - padrão: sem saldo
+#    aleatorio (random.Random): gerador - padrão: semente fixa
+# Retorna:
+#    list: contas, a de número N na posição N - 1
+#
+
+def gerar_contas(clientes, saldo_maximo=0, aleatorio=None):
+    aleatorio = aleatorio or random.Random(SEMENTE_PADRAO)
+    contas = []
+
+    for numero, cliente in enumerate(clientes, 1):
+        conta = abrir_conta(numero, cliente, contas)
+        if saldo_maximo:
+            conta.depositar(aleatorio.randint(1, saldo_maximo))
+
+    return contas
+
+##########################
+# Função GERAR_OPERACOES #
+##########################
+#
+# Fluxo sintético de operações (numero da conta, tipo, valor), gerado
+# sob demanda e sempre igual para a mesma semente
+#
+# Args:
+#    quantidade (int): quantidade de operações
+#    quantidade_contas (int): contas sorteadas entre 1 e esse número
+#    proporcao_depositos (float): fração de depósitos, o resto são saques
+#    semente (int): semente do gerador
+# Retorna:
+#    gerador de tuplas (numero, tipo, valor em centavos)
+#
+
+def gerar_operacoes(quantidade, quantidade_contas, proporcao_depositos=0.7, semente=SEMENTE_PADRAO):
+    aleatorio = random.Random(semente)
+
+    for _ in range(quantidade):
+        tipo = "Deposito" if aleatorio.random() < proporcao_depositos else "Saque"
+        yield aleatorio.randint(1, quantidade_contas), tipo, aleatorio.randint(1_00, 400_00)
+
+########################
+# Função MONTAR_TABELA #
+########################
+#
+# Exibe o resultado de um benchmark e o devolve no formato gravado
+# pelo --json
+#
+# Args:
+#    titulo (str): título da tabela
+#    colunas (tuple): (chave, cabeçalho, formato, sentido) por coluna
+#    linhas (list): dicionários chave -> valor, um por linha
+# Retorna:
+#    dict: titulo, metricas (chave -> sentido) e linhas
+#
+
+def montar_tabela(titulo, colunas, linhas):
+    larguras = [max(len(cabecalho), 12) for _, cabecalho, _, _ in colunas]
+
+    print(f"\n{titulo}")
+    print(" ".join(f"{cabecalho:>{largura}}" for (_, cabecalho, _, _), largura in zip(colunas, larguras)))
+    for linha in linhas:
+        print(" ".join(f"{linha[chave]:>{largura}{formato}}"
+                       for (chave, _, formato, _), largura in zip(colunas, larguras)))
+
+    return {
+        "titulo": titulo,
+        "metricas": {chave: sentido for chave, _, _, sentido in colunas if chave not in CHAVES},
+        "linhas": linhas,
+    }
+
+##############################
+# Função BENCH_BUSCA_CLIENTE #
+##############################
+#
+# Latência da busca de clientes por CPF no ClienteRegistry, que deve
+# permanecer constante conforme o cadastro cresce.
+#
+
+def bench_busca_cliente(tamanhos, semente=SEMENTE_PADRAO):
+    linhas = []
+
+    for tamanho in tamanhos:
+        cpfs = gerar_cpfs(tamanho)
+        clientes = ClienteRegistry(
+            PessoaFisica(nome="Cliente Teste", data_nascimento="01/01/1990", cpf=cpf, endereco="Rua A - 1")
+            for cpf in cpfs
+        )
+
+        amostra = random.Random(semente).choices(cpfs, k=AMOSTRAS_BUSCA)
+
+        inicio = time.perf_counter()
+        for cpf in amostra:
+            clientes.buscar(cpf)
+        decorrido = time.perf_counter() - inicio
+
+        linhas.append({"tamanho": tamanho, "busca_ns": decorrido / len(amostra) * 1e9})
+
+    return montar_tabela("Busca de cliente por CPF (ClienteRegistry)", (
+        ("tamanho", "clientes", "", INFORMATIVA),
+        ("busca_ns", "ns/busca", ".1f", MENOR_MELHOR),
+    ), linhas)
+
+#########################
+# Função BENCH_DEPOSITO #
+#########################
+#
+# Vazão de Deposito(valor).registrar, como no menu, espalhado por uma
+# conta a cada 10 operações, com valores sorteados
+#
+
+def bench_deposito(tamanhos, semente=SEMENTE_PADRAO):
+    linhas = []
+
+    for tamanho in tamanhos:
+        aleatorio = random.Random(semente)
+        contas = gerar_contas(gerar_clientes(max(1, tamanho // 10), aleatorio), aleatorio=aleatorio)
+        posicoes = array("l", (aleatorio.randrange(len(contas)) for _ in range(tamanho)))
+        valores = array("q", (aleatorio.randint(1_00, 1_000_00) for _ in range(tamanho)))
+
+        inicio = time.perf_counter()
+        for posicao, valor in zip(posicoes, valores):
+            Deposito(valor).registrar(contas[posicao])
+        decorrido = time.perf_counter() - inicio
+
+        assert totalizar_saldos(contas) == somar_centavos(valores)
+        linhas.append({"tamanho": tamanho, "depositos_por_s": tamanho / decorrido, "deposito_us": decorrido / tamanho * 1e6})
+
+    return montar_tabela("Depósito (Deposito.registrar)", (
+        ("tamanho", "depositos", "", INFORMATIVA),
+        ("depositos_por_s", "depósitos/s", ",.0f", MAIOR_MELHOR),
+        ("deposito_us", "µs/depósito", ".2f", MENOR_MELHOR),
+    ), linhas)
+
+######################
+# Função BENCH_SAQUE #
+######################
+#
+# Vazão de Saque(valor).registrar em contas correntes com saldo: os
+# valores sorteados (até R$ 800) e cerca de 4 saques por conta passam
+# por todas as regras - limite por operação, saques do dia e saldo.
+#
+
+def bench_saque(tamanhos, semente=SEMENTE_PADRAO):
+    linhas = []
+
+    for tamanho in tamanhos:
+        aleatorio = random.Random(semente)
+        contas = gerar_contas(gerar_clientes(max(1, tamanho // 4), aleatorio), saldo_maximo=1_000_00,
+                              aleatorio=aleatorio)
+        posicoes = array("l", (aleatorio.randrange(len(contas)) for _ in range(tamanho)))
+        valores = array("q", (aleatorio.randint(1_00, 800_00) for _ in range(tamanho)))
+
+        aceitos = 0
+        inicio = time.perf_counter()
+        for posicao, valor in zip(posicoes, valores):
+            if Saque(valor).registrar(contas[posicao]):
+                aceitos += 1
+        decorrido = time.perf_counter() - inicio
+
+        linhas.append({"tamanho": tamanho, "saques_por_s": tamanho / decorrido, "saque_us": decorrido / tamanho * 1e6,
+                       "aceitos_pct": aceitos / tamanho * 100})
+
+    return montar_tabela("Saque com regras de limite (Saque.registrar em ContaCorrente)", (
+        ("tamanho", "saques", "", INFORMATIVA),
+        ("saques_por_s", "saques/s", ",.0f", MAIOR_MELHOR),
+        ("saque_us", "µs/saque", ".2f", MENOR_MELHOR),
+        ("aceitos_pct", "aceitos %", ".1f", INFORMATIVA),
+    ), linhas)
+
+##############################
+# Função BENCH_LISTAR_CONTAS #
+##############################
+#
+# Tempo da listagem de contas do menu (listar_contas), completa e de
+# uma página de 20 contas, com a saída descartada
+#
+
+def bench_listar_contas(tamanhos, semente=SEMENTE_PADRAO):
+    linhas = []
+
+    for tamanho in tamanhos:
+        aleatorio = random.Random(semente)
+        contas = gerar_contas(gerar_clientes(tamanho, aleatorio), aleatorio=aleatorio)
+
+        with open(os.devnull, "w") as descarte, redirect_stdout(descarte):
+            inicio = time.perf_counter()
+            listar_contas(contas)
+            decorrido = time.perf_counter() - inicio
+
+            inicio = time.perf_counter()
+            listar_contas(contas, 0, 20)
+            tempo_pagina = time.perf_counter() - inicio
+
+        linhas.append({"tamanho": tamanho, "listagem_ms": decorrido * 1e3, "conta_us": decorrido / tamanho * 1e6,
+                       "pagina_ms": tempo_pagina * 1e3})
+
+    return montar_tabela("Listagem de contas (listar_contas)", (
+        ("tamanho", "contas", "", INFORMATIVA),
+        ("listagem_ms", "total ms", ".1f", MENOR_MELHOR),
+        ("conta_us", "µs/conta", ".2f", MENOR_MELHOR),
+        ("pagina_ms", "página ms", ".3f", MENOR_MELHOR),
+    ), linhas)
+
+###########################
+# Função BENCH_IMPORTACAO #
+###########################
+#
+# Importação de clientes por CSV (importar_clientes, abrindo uma conta
+# por cliente), com 2% de CPFs com dígito errado e 1% de duplicados, e
+# validação dos CPFs em bloco (validar_cpfs) x um a um (validar_cpf)
+#
+
+def bench_importacao(tamanhos, semente=SEMENTE_PADRAO):
+    linhas = []
+
+    for tamanho in tamanhos:
+        aleatorio = random.Random(semente)
+        cpfs = gerar_cpfs(tamanho)
+        for posicao in aleatorio.sample(range(tamanho), tamanho // 50):
+            cpf = cpfs[posicao]
+            cpfs[posicao] = cpf[:10] + str((int(cpf[10]) + 1) % 10)
+        for posicao in aleatorio.sample(range(1, tamanho), tamanho // 100):
+            cpfs[posicao] = cpfs[posicao - 1]
+
+        diretorio = tempfile.mkdtemp(prefix="bench_importacao_")
+        try:
+            caminho = os.path.join(diretorio, "clientes.csv")
+            with open(caminho, "w", newline="", encoding="utf-8") as arquivo:
+                arquivo.write("cpf,nome,data_nascimento,endereco\n")
+                for cpf in cpfs:
+                    arquivo.write(f"{cpf[:3]}.{cpf[3:6]}.{cpf[6:9]}-{cpf[9:]},Cliente Teste,01/01/1990,Rua A - 1\n")
+
+            with open(caminho, newline="", encoding="utf-8") as arquivo:
+                relatorio = importar_clientes(arquivo, ClienteRegistry(), [])
+        finally:
+            shutil.rmtree(diretorio)
+
+        inicio = time.perf_counter()
+        vetorizado = validar_cpfs(cpfs)
+        tempo_vetorizado = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        escalar = [validar_cpf(cpf) for cpf in cpfs]
+        tempo_escalar = time.perf_counter() - inicio
+
+        assert vetorizado == escalar
+        linhas.append({"tamanho": tamanho, "linhas_por_s": relatorio.linhas_por_segundo,
+                       "recusadas": len(relatorio.rejeicoes), "vetorizada_ns": tempo_vetorizado / tamanho * 1e9,
+                       "escalar_ns": tempo_escalar / tamanho * 1e9})
+
+    return montar_tabela("Importação de clientes por CSV e validação de CPF (em bloco x um a um)", (
+        ("tamanho", "linhas", "", INFORMATIVA),
+        ("linhas_por_s", "linhas/s", ",.0f", MAIOR_MELHOR),
+        ("recusadas", "recusadas", "", INFORMATIVA),
+        ("vetorizada_ns", "bloco ns/CPF", ".1f", MENOR_MELHOR),
+        ("escalar_ns", "1 a 1 ns/CPF", ".1f", INFORMATIVA),
+    ), linhas)
+
+##############################
+# Função BENCH_MEMORIA_CONTA #
+##############################
+#
+# Memória por cliente (PessoaFisica no ClienteRegistry), por conta
+# corrente recém-aberta, sem movimentação, e por objeto de transação
+# mantido em memória (Deposito com 1.000 valores distintos)
+#
+
+def bench_memoria_conta(tamanhos, semente=SEMENTE_PADRAO):
+    linhas = []
+
+    for tamanho in tamanhos:
+        aleatorio = random.Random(semente)
+        tracemalloc.start()
+        clientes = gerar_clientes(tamanho, aleatorio)
+        memoria_clientes = tracemalloc.get_traced_memory()[0]
+        contas = gerar_contas(clientes, aleatorio=aleatorio)
+        memoria_total = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        assert len(contas) == tamanho
+        del clientes, contas
+
+        valores = [aleatorio.randint(1, 1_000) * 100 for _ in range(tamanho)]
+        tracemalloc.start()
+        transacoes = [Deposito(valor) for valor in valores]
+        memoria_transacoes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del transacoes
+
+        linhas.append({
+            "tamanho": tamanho,
+            "total_mib": memoria_total / 2**20,
+            "bytes_por_cliente": memoria_clientes / tamanho,
+            "bytes_por_conta": (memoria_total - memoria_clientes) / tamanho,
+            "bytes_por_transacao": memoria_transacoes / tamanho,
+        })
+
+    return montar_tabela("Memória por cliente, conta e transação", (
+        ("tamanho", "contas", "", INFORMATIVA),
+        ("total_mib", "total MiB", ".1f", MENOR_MELHOR),
+        ("bytes_por_cliente", "B/cliente", ".1f", MENOR_MELHOR),
+        ("bytes_por_conta", "B/conta", ".1f", MENOR_MELHOR),
+        ("bytes_por_transacao", "B/transação", ".1f", MENOR_MELHOR),
+    ), linhas)
+
+##################################
+# Função BENCH_MEMORIA_HISTORICO #
+##################################
+#
+# Memória ocupada por N transações no layout antigo (lista de
+# dicionários com data formatada) e no Historico colunar.
+#
+
+def bench_memoria_historico(tamanhos, semente=SEMENTE_PADRAO):
+    linhas = []
+    agora = datetime.now()
+    transacoes = (Deposito(100_00), Saque(50_00))
+
+    for tamanho in tamanhos:
+        tracemalloc.start()
+        lista = []
+        for i in range(tamanho):
+            transacao = transacoes[i & 1]
+            lista.append(
+                {
+                    "tipo": transacao.__class__.__name__,
+                    "valor": transacao.valor,
+                    "data": agora.strftime("%d/%m/%Y %H:%M:%S"),
+                }
+            )
+        memoria_lista = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del lista
+
+        tracemalloc.start()
+        historico = Historico()
+        for i in range(tamanho):
+            historico.adicionar_transacao(transacoes[i & 1], agora)
+        memoria_colunar = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del historico
+
+        linhas.append({
+            "tamanho": tamanho,
+            "lista_mib": memoria_lista / 2**20,
+            "colunar_mib": memoria_colunar / 2**20,
+            "bytes_por_tx_lista": memoria_lista / tamanho,
+            "bytes_por_tx_colunar": memoria_colunar / tamanho,
+        })
+
+    return montar_tabela("Memória do histórico: lista de dicionários x colunar", (
+        ("tamanho", "transacoes", "", INFORMATIVA),
+        ("lista_mib", "lista MiB", ".1f", INFORMATIVA),
+        ("colunar_mib", "colunar MiB", ".1f", MENOR_MELHOR),
+        ("bytes_por_tx_lista", "B/tx lista", ".1f", INFORMATIVA),
+        ("bytes_por_tx_colunar", "B/tx colunar", ".1f", MENOR_MELHOR),
+    ), linhas)
+
+#############################
+# Função BENCH_TOTAL_SALDOS #
+#############################
+#
+# Soma dos saldos de todas as contas: laço em Python sobre os objetos
+# x extração para array int64 + soma vetorizada (somar_centavos).
+#
+
+def bench_total_saldos(tamanhos, semente=SEMENTE_PADRAO):
+    linhas = []
+
+    for tamanho in tamanhos:
+        aleatorio = random.Random(semente)
+        contas = []
+        for numero in range(1, tamanho + 1):
+            conta = ContaCorrente(numero, None)
+            conta.depositar(aleatorio.randrange(1, 10_000_00))
+            contas.append(conta)
+
+        inicio = time.perf_counter()
+        total_laco = 0
+        for conta in contas:
+            total_laco += conta.saldo
+        tempo_laco = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        saldos = saldos_centavos(contas)
+        tempo_extracao = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        total_vetorizado = somar_centavos(saldos)
+        tempo_soma = time.perf_counter() - inicio
+
+        assert total_laco == total_vetorizado
+        linhas.append({"tamanho": tamanho, "laco_ms": tempo_laco * 1e3, "extracao_ms": tempo_extracao * 1e3,
+                       "soma_ms": tempo_soma * 1e3})
+
+    return montar_tabela("Total de saldos (centavos): laço x array int64", (
+        ("tamanho", "contas", "", INFORMATIVA),
+        ("laco_ms", "laço ms", ".2f", INFORMATIVA),
+        ("extracao_ms", "extração ms", ".2f", MENOR_MELHOR),
+        ("soma_ms", "soma ms", ".2f", MENOR_MELHOR),
+    ), linhas)
+
+###########################
+# Função BENCH_TRANSACOES #
+###########################
+#
+# Vazão de Deposito/Saque via Transacao.registrar no modo headless
+# (sem ouvintes) e com um ouvinte vazio registrado.
+#
+
+def bench_transacoes(tamanhos, semente=SEMENTE_PADRAO):
+    linhas = []
+
+    def ouvinte_vazio(evento, **dados):
+        pass
+
+    for tamanho in tamanhos:
+        linha = {"tamanho": tamanho}
+
+        for chave, ouvinte in (("headless_por_s", None), ("um_ouvinte_por_s", ouvinte_vazio)):
+            conta = Conta(1, None)
+            deposito, saque = Deposito(100_00), Saque(50_00)
+
+            if ouvinte:
+                adicionar_ouvinte(ouvinte)
+
+            inicio = time.perf_counter()
+            for _ in range(tamanho // 2):
+                deposito.registrar(conta)
+                saque.registrar(conta)
+            decorrido = time.perf_counter() - inicio
+
+            if ouvinte:
+                remover_ouvinte(ouvinte)
+
+            linha[chave] = tamanho / decorrido
+
+        linhas.append(linha)
+
+    return montar_tabela("Vazão de transações (Transacao.registrar)", (
+        ("tamanho", "transacoes", "", INFORMATIVA),
+        ("headless_por_s", "headless tx/s", ",.0f", MAIOR_MELHOR),
+        ("um_ouvinte_por_s", "1 ouvinte tx/s", ",.0f", MAIOR_MELHOR),
+    ), linhas)
+
+#####################
+# Função BENCH_LOTE #
+#####################
+#
+# Vazão do processar_lote sobre um fluxo gerado sob demanda (1.000
+# contas, 70% depósitos) x Transacao.registrar um a um, e pico de
+# memória do processamento em lote.
+#
+
+def bench_lote(tamanhos, semente=SEMENTE_PADRAO):
+    linhas = []
+    quantidade_contas = 1_000
+
+    for tamanho in tamanhos:
+        contas = {numero: ContaCorrente(numero, None) for numero in range(1, quantidade_contas + 1)}
+
+        inicio = time.perf_counter()
+        for _ in processar_lote(gerar_operacoes(tamanho, quantidade_contas, semente=semente), contas):
+            pass
+        tempo_lote = time.perf_counter() - inicio
+
+        # pico de memória medido à parte, o tracemalloc distorce o tempo
+        contas = {numero: ContaCorrente(numero, None) for numero in range(1, quantidade_contas + 1)}
+        tracemalloc.start()
+        for _ in processar_lote(gerar_operacoes(tamanho, quantidade_contas, semente=semente), contas):
+            pass
+        pico_lote = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        contas = {numero: ContaCorrente(numero, None) for numero in range(1, quantidade_contas + 1)}
+
+        inicio = time.perf_counter()
+        for numero, tipo, valor in gerar_operacoes(tamanho, quantidade_contas, semente=semente):
+            transacao = Saque(valor) if tipo == "Saque" else Deposito(valor)
+            transacao.registrar(contas[numero])
+        tempo_unitario = time.perf_counter() - inicio
+
+        linhas.append({"tamanho": tamanho, "lote_por_s": tamanho / tempo_lote,
+                       "unitario_por_s": tamanho / tempo_unitario, "pico_lote_mib": pico_lote / 2**20})
+
+    return montar_tabela("Processamento em lote (processar_lote) x registrar um a um", (
+        ("tamanho", "registros", "", INFORMATIVA),
+        ("lote_por_s", "lote reg/s", ",.0f", MAIOR_MELHOR),
+        ("unitario_por_s", "unitário reg/s", ",.0f", MAIOR_MELHOR),
+        ("pico_lote_mib", "pico lote MiB", ".1f", MENOR_MELHOR),
+    ), linhas)
+
+###############################
+# Função BENCH_TRANSFERENCIAS #
+###############################
+#
+# Teste de estresse multi-thread: várias threads transferem entre 100
+# contas ao acaso (inclusive A -> B e B -> A ao mesmo tempo). Verifica
+# que o total de dinheiro é conservado, que o saldo de cada conta bate
+# com o histórico e mede transferências por segundo.
+#
+
+def bench_transferencias(tamanhos, quantidade_threads=8, semente=SEMENTE_PADRAO):
+    linhas = []
+    quantidade_contas = 100
+    saldo_inicial = 1_000_00
+
+    def trabalhador(contas, quantidade, semente_thread):
+        aleatorio = random.Random(semente_thread)
+        for _ in range(quantidade):
+            origem, destino = aleatorio.sample(contas, 2)
+            Transferencia(aleatorio.randint(1, 500_00), destino).registrar(origem)
+
+    for tamanho in tamanhos:
+        contas = [Conta(numero, None) for numero in range(1, quantidade_contas + 1)]
+        for conta in contas:
+            Deposito(saldo_inicial).registrar(conta)
+
+        threads = [
+            threading.Thread(target=trabalhador, args=(contas, tamanho // quantidade_threads, semente + indice))
+            for indice in range(quantidade_threads)
+        ]
+
+        inicio = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        decorrido = time.perf_counter() - inicio
+
+        assert totalizar_saldos(contas) == quantidade_contas * saldo_inicial, "dinheiro não conservado"
+
+        for conta in contas:
+            historico = conta.historico
+            movimentado = (historico.total("Deposito") + historico.total("TransferenciaRecebida")
+                           - historico.total("TransferenciaEnviada"))
+            assert movimentado == conta.saldo, f"histórico diverge do saldo na conta {conta.numero}"
+
+        linhas.append({"tamanho": tamanho, "transferencias_por_s": tamanho / decorrido})
+
+    return montar_tabela(f"Transferências concorrentes ({quantidade_threads} threads, {quantidade_contas} contas,"
+                         f" dinheiro conservado)", (
+        ("tamanho", "transferencias", "", INFORMATIVA),
+        ("transferencias_por_s", "transf/s", ",.0f", MAIOR_MELHOR),
+    ), linhas)
+
+#######################
+# Função BENCH_SHARDS #
+#######################
+#
+# Vazão do BancoParticionado com 1, 2, 4 e 8 shards (processos) sobre
+# o mesmo fluxo: 10.000 contas, 60% depósitos, 20% saques e 20%
+# transferências, enviado em lotes de 10.000 operações. Verifica que o
+# total de dinheiro bate com os depósitos e saques aceitos.
+#
+
+def bench_shards(tamanhos, quantidades_shards=(1, 2, 4, 8), tamanho_lote=10_000, semente=SEMENTE_PADRAO):
+    quantidade_contas = 10_000
+    linhas = []
+
+    for tamanho in tamanhos:
+        aleatorio = random.Random(semente)
+        operacoes = []
+        for _ in range(tamanho):
+            sorteio = aleatorio.random()
+            numero = aleatorio.randint(1, quantidade_contas)
+            if sorteio < 0.6:
+                operacoes.append(("depositar", numero, aleatorio.randint(1_00, 400_00)))
+            elif sorteio < 0.8:
+                operacoes.append(("sacar", numero, aleatorio.randint(1_00, 400_00)))
+            else:
+                operacoes.append(("transferir", numero, aleatorio.randint(1, quantidade_contas),
+                                  aleatorio.randint(1_00, 400_00)))
+
+        lotes = [operacoes[inicio:inicio + tamanho_lote] for inicio in range(0, tamanho, tamanho_lote)]
+        vazao_um_shard = None
+
+        for quantidade_shards in quantidades_shards:
+            with BancoParticionado(quantidade_shards) as banco:
+                banco.abrir_contas(quantidade_contas)
+
+                esperado = 0
+                inicio = time.perf_counter()
+                for lote in lotes:
+                    for operacao, resultado in zip(lote, banco.executar(lote)):
+                        if resultado and operacao[0] != "transferir":
+                            esperado += operacao[2] if operacao[0] == "depositar" else -operacao[2]
+                decorrido = time.perf_counter() - inicio
+
+                assert banco.total() == esperado, "dinheiro não conservado"
+
+            vazao = tamanho / decorrido
+            vazao_um_shard = vazao_um_shard or vazao
+            linhas.append({"tamanho": tamanho, "shards": quantidade_shards, "operacoes_por_s": vazao,
+                           "aceleracao": vazao / vazao_um_shard})
+
+    return montar_tabela(f"Contas particionadas em processos (BancoParticionado, {quantidade_contas} contas,"
+                         f" {os.cpu_count()} núcleos)", (
+        ("tamanho", "operacoes", "", INFORMATIVA),
+        ("shards", "shards", "", INFORMATIVA),
+        ("operacoes_por_s", "operações/s", ",.0f", MAIOR_MELHOR),
+        ("aceleracao", "aceleração", ".2f", INFORMATIVA),
+    ), linhas)
+
+# diretório de journal com 1.000 clientes e contas já cadastrados
+def _preparar_journal(diretorio, lote_fsync, quantidade_contas, intervalo_snapshot=0):
+    clientes, contas, persistencia = journal.abrir(diretorio, lote_fsync, intervalo_snapshot)
+    for numero, cpf in enumerate(gerar_cpfs(quantidade_contas), 1):
+        cliente = cadastrar_cliente(clientes, cpf, "Cliente Teste", "01/01/1990", "Rua A - 1")
+        abrir_conta(numero, cliente, contas)
+    return contas, persistencia
+
+########################
+# Função BENCH_JOURNAL #
+########################
+#
+# Vazão de escrita do journal com diferentes lotes de fsync (1 = fsync
+# por registro, 0 = sem fsync)
+#
+
+def bench_journal(tamanhos, lotes_fsync=(1, 16, 256, 0), semente=SEMENTE_PADRAO):
+    quantidade_contas = 1_000
+    limite_fsync_unitario = 20_000
+    linhas = []
+
+    for tamanho in tamanhos:
+        for lote_fsync in lotes_fsync:
+            # fsync a cada registro é limitado pelo disco: mede uma amostra
+            quantidade = min(tamanho, limite_fsync_unitario) if lote_fsync == 1 else tamanho
+            diretorio = tempfile.mkdtemp(prefix="bench_journal_")
+            try:
+                contas, persistencia = _preparar_journal(diretorio, lote_fsync, quantidade_contas)
+                deposito = Deposito(10_00)
+
+                inicio = time.perf_counter()
+                for i in range(quantidade):
+                    deposito.registrar(contas[i % quantidade_contas])
+                persistencia.sincronizar()
+                decorrido = time.perf_counter() - inicio
+
+                journal.fechar(persistencia)
+                linhas.append({"tamanho": tamanho, "lote_fsync": lote_fsync, "registros_por_s": quantidade / decorrido})
+            finally:
+                shutil.rmtree(diretorio)
+
+    return montar_tabela("Journal: escrita por lote de fsync (0 = sem fsync)", (
+        ("tamanho", "registros", "", INFORMATIVA),
+        ("lote_fsync", "lote fsync", "", INFORMATIVA),
+        ("registros_por_s", "registros/s", ",.0f", MAIOR_MELHOR),
+    ), linhas)
+
+############################
+# Função BENCH_RECUPERACAO #
+############################
+#
+# Tempo de recuperação do journal: reaplicação do journal inteiro x
+# snapshot + trecho final (10% dos registros). Também grava um journal
+# por processar_lote (grupos de 10 registros por conta) com snapshots
+# periódicos caindo no meio dos grupos, e confere que a recuperação
+# chega aos mesmos saldos e históricos.
+#
+
+def bench_recuperacao(tamanhos, semente=SEMENTE_PADRAO):
+    quantidade_contas = 1_000
+    linhas = []
+
+    for tamanho in tamanhos:
+        diretorio = tempfile.mkdtemp(prefix="bench_journal_")
+        try:
+            contas, persistencia = _preparar_journal(diretorio, 0, quantidade_contas)
+            deposito = Deposito(10_00)
+            for i in range(tamanho):
+                deposito.registrar(contas[i % quantidade_contas])
+                if i == tamanho - tamanho // 10 - 1:
+                    persistencia.salvar_snapshot()
+            journal.fechar(persistencia)
+
+            inicio = time.perf_counter()
+            journal.recuperar(diretorio)
+            tempo_snapshot = time.perf_counter() - inicio
+
+            os.remove(os.path.join(diretorio, journal.ARQUIVO_SNAPSHOT))
+            inicio = time.perf_counter()
+            journal.recuperar(diretorio)
+            tempo_completo = time.perf_counter() - inicio
+
+        finally:
+            shutil.rmtree(diretorio)
+
+        diretorio = tempfile.mkdtemp(prefix="bench_journal_")
+        try:
+            contas, persistencia = _preparar_journal(diretorio, 0, quantidade_contas, tamanho // 10 + 3)
+            registros = [(i // 10 % quantidade_contas + 1, "Saque" if i % 4 == 3 else "Deposito", 10_00)
+                         for i in range(tamanho)]
+            for _ in processar_lote(registros, contas, tamanho_bloco=995):
+                pass
+            journal.fechar(persistencia)
+
+            inicio = time.perf_counter()
+            _, recuperadas = journal.recuperar(diretorio)
+            tempo_lote = time.perf_counter() - inicio
+
+            assert [(conta.saldo, len(conta._historico or ())) for conta in recuperadas] == \
+                [(conta.saldo, len(conta._historico or ())) for conta in contas], "recuperação do lote diverge"
+        finally:
+            shutil.rmtree(diretorio)
+
+        linhas.append({"tamanho": tamanho, "replay_completo_s": tempo_completo, "snapshot_s": tempo_snapshot,
+                       "lote_s": tempo_lote})
+
+    return montar_tabela("Journal: tempo de recuperação", (
+        ("tamanho", "registros", "", INFORMATIVA),
+        ("replay_completo_s", "replay completo s", ".2f", MENOR_MELHOR),
+        ("snapshot_s", "snapshot + 10% s", ".2f", MENOR_MELHOR),
+        ("lote_s", "lote + snapshots s", ".2f", INFORMATIVA),
+    ), linhas)
+
+########################
+# Função BENCH_EXTRATO #
+########################
+#
+# Extrato das últimas 20 transações e de um mês (via Historico.extrato,
+# busca binária nas datas) x montagem do extrato completo por
+# concatenação de strings, como era feito antes. O histórico tem uma
+# transação por minuto.
+#
+
+def bench_extrato(tamanhos, semente=SEMENTE_PADRAO):
+    linhas = []
+
+    for tamanho in tamanhos:
+        historico = Historico()
+        inicio_historico = datetime(2020, 1, 1).timestamp()
+        for i in range(tamanho):
+            historico._adicionar_registro(i & 1, 10_00, inicio_historico + i * 60)
+
+        ultima_data = datetime.fromtimestamp(inicio_historico + (tamanho - 1) * 60)
+        inicio_mes = ultima_data - timedelta(days=30)
+
+        inicio = time.perf_counter()
+        ultimas = list(historico.extrato(ultimas=20))
+        tempo_ultimas = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        mes = sum(1 for _ in historico.extrato(inicio_mes, ultima_data))
+        tempo_mes = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        extrato = ""
+        for transacao in historico.transacoes:
+            extrato += f"Data: {transacao['data']}\nTipo: {transacao['tipo']}\nValor: {transacao['valor']}\n"
+        tempo_completo = time.perf_counter() - inicio
+
+        assert len(ultimas) == min(20, tamanho)
+        linhas.append({"tamanho": tamanho, "ultimas_ms": tempo_ultimas * 1e3, "mes_ms": tempo_mes * 1e3,
+                       "tx_no_mes": mes, "completo_ms": tempo_completo * 1e3})
+
+    return montar_tabela("Extrato: últimas 20 / último mês x extrato completo concatenado", (
+        ("tamanho", "transacoes", "", INFORMATIVA),
+        ("ultimas_ms", "últimas 20 ms", ".3f", MENOR_MELHOR),
+        ("mes_ms", "mês ms", ".1f", MENOR_MELHOR),
+        ("tx_no_mes", "tx no mês", "", INFORMATIVA),
+        ("completo_ms", "completo ms", ".1f", INFORMATIVA),
+    ), linhas)
+
+#########################
+# Função BENCH_SALDO_EM #
+#########################
+#
+# Consulta do saldo em um momento passado (Historico.saldo_em, com
+# checkpoints) em pontos aleatórios do histórico x reaplicação de todas
+# as transações desde o início.
+#
+
+def bench_saldo_em(tamanhos, consultas=1_000, semente=SEMENTE_PADRAO):
+    linhas = []
+
+    for tamanho in tamanhos:
+        historico = Historico()
+        inicio_historico = datetime(2020, 1, 1).timestamp()
+        for i in range(tamanho):
+            historico._adicionar_registro(0 if i % 3 else 1, 10_00, inicio_historico + i * 60)
+
+        aleatorio = random.Random(semente)
+        momentos = [datetime.fromtimestamp(inicio_historico + aleatorio.randrange(tamanho) * 60)
+                    for _ in range(consultas)]
+
+        inicio = time.perf_counter()
+        for momento in momentos:
+            historico.saldo_em(momento)
+        tempo_checkpoint = (time.perf_counter() - inicio) / consultas
+
+        # reaplicação completa, amostra menor por ser O(n)
+        amostra = momentos[:10]
+        inicio = time.perf_counter()
+        for momento in amostra:
+            limite = momento.timestamp()
+            saldo = 0
+            for transacao, timestamp in zip(historico.transacoes, historico._datas):
+                if timestamp > limite:
+                    break
+                saldo += -transacao["valor"] if transacao["tipo"] == "Saque" else transacao["valor"]
+            assert saldo == historico.saldo_em(momento)
+        tempo_replay = (time.perf_counter() - inicio) / len(amostra)
+
+        linhas.append({"tamanho": tamanho, "saldo_em_us": tempo_checkpoint * 1e6, "replay_ms": tempo_replay * 1e3})
+
+    return montar_tabela("Saldo em um momento: checkpoints x reaplicação completa", (
+        ("tamanho", "transacoes", "", INFORMATIVA),
+        ("saldo_em_us", "saldo_em µs", ".1f", MENOR_MELHOR),
+        ("replay_ms", "replay ms", ".1f", INFORMATIVA),
+    ), linhas)
+
+###########################
+# Função BENCH_EXPORTACAO #
+###########################
+#
+# Vazão da exportação dos históricos (exportar_historicos) em CSV, JSON
+# Lines e CSV com gzip, e da exportação em paralelo (um processo por
+# núcleo). As transações são distribuídas entre 1.000 contas, uma por
+# segundo; para o caso de 50 milhões use --tamanhos 50000000.
+#
+
+def bench_exportacao(tamanhos, quantidade_contas=1_000, semente=SEMENTE_PADRAO):
+    processos = os.cpu_count() or 1
+    linhas = []
+
+    for tamanho in tamanhos:
+        aleatorio = random.Random(semente)
+        contas = gerar_contas(gerar_clientes(quantidade_contas, aleatorio), aleatorio=aleatorio)
+        inicio_historico = datetime(2020, 1, 1).timestamp()
+        for i in range(tamanho):
+            contas[i % quantidade_contas].historico._adicionar_registro(0 if i % 3 else 1, 10_00, inicio_historico + i)
+
+        diretorio = tempfile.mkdtemp(prefix="bench_exportacao_")
+        try:
+            linha = {"tamanho": tamanho}
+            for chave, formato, extensao in (("csv", "csv", "csv"), ("jsonl", "jsonl", "jsonl"),
+                                             ("csv_gz", "csv", "csv.gz")):
+                inicio = time.perf_counter()
+                exportadas = exportar_historicos(contas, os.path.join(diretorio, f"extrato.{extensao}"), formato)
+                linha[f"{chave}_por_s"] = exportadas / (time.perf_counter() - inicio)
+                assert exportadas == tamanho
+
+            inicio = time.perf_counter()
+            partes = exportar_paralelo(contas, os.path.join(diretorio, "partes"), processos)
+            linha["paralelo_por_s"] = sum(exportadas for _, exportadas in partes) / (time.perf_counter() - inicio)
+            linha["mb_csv"] = os.path.getsize(os.path.join(diretorio, "extrato.csv")) / 1e6
+
+            linhas.append(linha)
+        finally:
+            shutil.rmtree(diretorio)
+
+    return montar_tabela(f"Exportação dos históricos: transações/s (paralelo com {processos} processos)", (
+        ("tamanho", "transacoes", "", INFORMATIVA),
+        ("csv_por_s", "csv", ",.0f", MAIOR_MELHOR),
+        ("jsonl_por_s", "jsonl", ",.0f", MAIOR_MELHOR),
+        ("csv_gz_por_s", "csv.gz", ",.0f", MAIOR_MELHOR),
+        ("paralelo_por_s", "csv paralelo", ",.0f", MAIOR_MELHOR),
+        ("mb_csv", "MB csv", ",.1f", INFORMATIVA),
+    ), linhas)
+
+###########################
+# Função BENCH_FIM_DO_DIA #
+###########################
+#
+# Fechamento do dia (juros de 0,03% a.d. e tarifa de R$ 0,50) de todas as
+# contas: processar_fim_do_dia (snapshot int64 + gravação só das contas
+# com lançamento) x laço conta a conta com Decimal e adicionar_transacao.
+# 10% das contas estão zeradas e 1% já fez saques no dia.
+#
+
+def bench_fim_do_dia(tamanhos, taxa_juros="0.0003", tarifa=50, semente=SEMENTE_PADRAO):
+    linhas = []
+
+    def criar_contas(tamanho):
+        aleatorio = random.Random(semente)
+        contas = []
+        for numero in range(1, tamanho + 1):
+            conta = ContaCorrente(numero, None)
+            if numero % 10:
+                conta._saldo = aleatorio.randrange(1, 10_000_00)
+            if numero % 100 == 0:
+                conta.historico.adicionar_transacao(Saque(10_00))
+            contas.append(conta)
+        return contas
+
+    for tamanho in tamanhos:
+        contas = criar_contas(tamanho)
+        antes = totalizar_saldos(contas)
+
+        inicio = time.perf_counter()
+        juros, tarifas = processar_fim_do_dia(contas, taxa_juros, tarifa)
+        tempo_vetorizado = time.perf_counter() - inicio
+
+        assert totalizar_saldos(contas) == antes + juros - tarifas
+        contas = None
+
+        contas = criar_contas(tamanho)
+        data = datetime.now()
+        taxa = Decimal(taxa_juros)
+
+        inicio = time.perf_counter()
+        for conta in contas:
+            saldo = max(conta.saldo, 0)
+            valor_juros = int((saldo * taxa).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+            valor_tarifa = min(saldo + valor_juros, tarifa)
+            if valor_juros:
+                conta.depositar(valor_juros)
+                conta.historico.adicionar_transacao(Deposito(valor_juros), data, "Juros")
+            if valor_tarifa:
+                conta._saldo -= valor_tarifa
+                conta.historico.adicionar_transacao(Deposito(valor_tarifa), data, "Tarifa")
+            if conta._historico is not None:
+                conta._historico._zerar_contadores()
+        tempo_laco = time.perf_counter() - inicio
+
+        assert totalizar_saldos(contas) == antes + juros - tarifas
+        contas = None
+
+        linhas.append({"tamanho": tamanho, "vetorizado_s": tempo_vetorizado, "laco_s": tempo_laco,
+                       "contas_por_s": tamanho / tempo_vetorizado})
+
+    return montar_tabela("Fim do dia: juros, tarifa e limites (snapshot int64 x laço por conta)", (
+        ("tamanho", "contas", "", INFORMATIVA),
+        ("vetorizado_s", "vetorizado s", ".2f", MENOR_MELHOR),
+        ("laco_s", "laço s", ".2f", INFORMATIVA),
+        ("contas_por_s", "contas/s", ",.0f", MAIOR_MELHOR),
+    ), linhas)
+
+########################
+# Função BENCH_INDICES #
+########################
+#
+# Índices de contas (IndiceContas): construção, consulta de uma página
+# de 20 contas por prefixo do nome e por faixa de saldo x varredura de
+# todas as contas, e custo do depósito com o índice de saldo atualizado
+# a cada transação (ouvinte).
+#
+
+def bench_indices(tamanhos, consultas=1_000, semente=SEMENTE_PADRAO):
+    linhas = []
+
+    for tamanho in tamanhos:
+        aleatorio = random.Random(semente)
+        contas = gerar_contas(gerar_clientes(tamanho, aleatorio), aleatorio=aleatorio)
+        for conta in contas:
+            conta._saldo = aleatorio.randrange(0, 10_000_00)
+
+        inicio = time.perf_counter()
+        indice = IndiceContas(contas)
+        tempo_construcao = time.perf_counter() - inicio
+
+        prefixos = [f"{aleatorio.choice(NOMES)} {aleatorio.choice(SOBRENOMES)[:2]}" for _ in range(consultas)]
+        inicio = time.perf_counter()
+        for prefixo in prefixos:
+            indice.por_nome(prefixo, 0, 20)
+        tempo_nome = (time.perf_counter() - inicio) / consultas
+
+        minimos = [aleatorio.randrange(0, 10_000_00) for _ in range(consultas)]
+        inicio = time.perf_counter()
+        for minimo in minimos:
+            indice.por_saldo(minimo, minimo + 100_00, 0, 20)
+        tempo_saldo = (time.perf_counter() - inicio) / consultas
+
+        # varredura: filtra e ordena todas as contas para obter a mesma página
+        inicio = time.perf_counter()
+        pagina = sorted((conta for conta in contas if minimos[0] <= conta.saldo <= minimos[0] + 100_00),
+                        key=lambda conta: (conta.saldo, conta.numero))[:20]
+        tempo_varredura = time.perf_counter() - inicio
+        assert pagina == indice.por_saldo(minimos[0], minimos[0] + 100_00, 0, 20)
+
+        operacoes = min(tamanho, 100_000)
+        adicionar_ouvinte(indice)
+        try:
+            inicio = time.perf_counter()
+            for posicao in range(operacoes):
+                Deposito(10_00).registrar(contas[posicao])
+            tempo_deposito = (time.perf_counter() - inicio) / operacoes
+        finally:
+            remover_ouvinte(indice)
+
+        linhas.append({"tamanho": tamanho, "construcao_ms": tempo_construcao * 1e3, "nome_us": tempo_nome * 1e6,
+                       "saldo_us": tempo_saldo * 1e6, "varredura_ms": tempo_varredura * 1e3,
+                       "deposito_us": tempo_deposito * 1e6})
+
+    return montar_tabela("Índices de contas: página de 20 por nome / saldo x varredura", (
+        ("tamanho", "contas", "", INFORMATIVA),
+        ("construcao_ms", "construção ms", ",.1f", MENOR_MELHOR),
+        ("nome_us", "nome µs", ".1f", MENOR_MELHOR),
+        ("saldo_us", "saldo µs", ".1f", MENOR_MELHOR),
+        ("varredura_ms", "varredura ms", ".1f", INFORMATIVA),
+        ("deposito_us", "depósito µs", ".2f", MENOR_MELHOR),
+    ), linhas)
+
+#############################
+# Função BENCH_IDEMPOTENCIA #
+#############################
+#
+# Custo por depósito sem chave, com chave nova (busca + registro no
+# cache) e repetido (devolve o resultado guardado), com o cache limitado
+# a 100.000 chaves: a quantidade de chaves guardadas não passa disso.
+#
+
+def bench_idempotencia(tamanhos, capacidade=100_000, semente=SEMENTE_PADRAO):
+    linhas = []
+
+    for tamanho in tamanhos:
+        cache = configurar_idempotencia(capacidade)
+        try:
+            contas = [ContaCorrente(numero, None) for numero in range(1, 1_001)]
+            chaves = [f"pedido-{i}" for i in range(tamanho)]
+
+            inicio = time.perf_counter()
+            for i in range(tamanho):
+                Deposito(10_00).registrar(contas[i % 1_000])
+            tempo_sem_chave = (time.perf_counter() - inicio) / tamanho
+
+            inicio = time.perf_counter()
+            for i, chave in enumerate(chaves):
+                Deposito(10_00, chave).registrar(contas[i % 1_000])
+            tempo_com_chave = (time.perf_counter() - inicio) / tamanho
+
+            # repetições das chaves mais recentes, ainda no cache
+            repetidas = chaves[-min(tamanho, capacidade):]
+            saldo = totalizar_saldos(contas)
+            inicio = time.perf_counter()
+            for i, chave in enumerate(repetidas):
+                Deposito(10_00, chave).registrar(contas[i % 1_000])
+            tempo_repetida = (time.perf_counter() - inicio) / len(repetidas)
+
+            assert totalizar_saldos(contas) == saldo
+            linhas.append({"tamanho": tamanho, "sem_chave_us": tempo_sem_chave * 1e6,
+                           "com_chave_us": tempo_com_chave * 1e6, "repetida_us": tempo_repetida * 1e6,
+                           "chaves_no_cache": len(cache)})
+        finally:
+            configurar_idempotencia()
+
+    return montar_tabela("Idempotência: depósito sem chave / com chave nova / repetido", (
+        ("tamanho", "depositos", "", INFORMATIVA),
+        ("sem_chave_us", "sem chave µs", ".2f", MENOR_MELHOR),
+        ("com_chave_us", "chave nova µs", ".2f", MENOR_MELHOR),
+        ("repetida_us", "repetida µs", ".2f", MENOR_MELHOR),
+        ("chaves_no_cache", "chaves no cache", ",", INFORMATIVA),
+    ), linhas)
+
+##########################
+# Função BENCH_AGREGADOS #
+##########################
+#
+# Relatório gerencial (total dos saldos, total da agência e 100 maiores
+# saldos) lido dos agregados mantidos por evento (AgregadosContas) x
+# calculado percorrendo as contas, e custo do depósito com os agregados
+# atualizados (ouvinte). Entre as leituras, 1.000 depósitos mudam saldos.
+#
+
+def bench_agregados(tamanhos, leituras=100, semente=SEMENTE_PADRAO):
+    linhas = []
+
+    for tamanho in tamanhos:
+        aleatorio = random.Random(semente)
+        contas = []
+        for numero in range(1, tamanho + 1):
+            conta = ContaCorrente(numero, None)
+            conta._saldo = aleatorio.randrange(0, 10_000_00)
+            contas.append(conta)
+
+        inicio = time.perf_counter()
+        agregados = AgregadosContas(contas)
+        tempo_construcao = time.perf_counter() - inicio
+
+        operacoes = 0
+        tempo_deposito = tempo_relatorio = tempo_varredura = 0.0
+
+        adicionar_ouvinte(agregados)
+        try:
+            for _ in range(leituras):
+                inicio = time.perf_counter()
+                for _ in range(1_000):
+                    Deposito(aleatorio.randrange(1, 1_000_00)).registrar(contas[aleatorio.randrange(tamanho)])
+                tempo_deposito += time.perf_counter() - inicio
+                operacoes += 1_000
+
+                inicio = time.perf_counter()
+                relatorio = (agregados.total_saldos(), agregados.total_saldos(Conta.AGENCIA),
+                             agregados.maiores_saldos(100))
+                tempo_relatorio += time.perf_counter() - inicio
+        finally:
+            remover_ouvinte(agregados)
+
+        # varredura, amostra menor por ser O(contas)
+        amostras = min(leituras, 5)
+        inicio = time.perf_counter()
+        for _ in range(amostras):
+            varredura = (totalizar_saldos(contas),
+                         totalizar_saldos(conta for conta in contas if conta.agencia == Conta.AGENCIA),
+                         heapq.nlargest(100, contas, key=lambda conta: (conta.saldo, -conta.numero)))
+        tempo_varredura = (time.perf_counter() - inicio) / amostras
+
+        assert relatorio == varredura
+        linhas.append({"tamanho": tamanho, "construcao_ms": tempo_construcao * 1e3,
+                       "relatorio_us": tempo_relatorio / leituras * 1e6, "varredura_ms": tempo_varredura * 1e3,
+                       "deposito_us": tempo_deposito / operacoes * 1e6})
+
+    return montar_tabela("Agregados: total, total da agência e top 100 por saldo x varredura", (
+        ("tamanho", "contas", "", INFORMATIVA),
+        ("construcao_ms", "construção ms", ",.1f", MENOR_MELHOR),
+        ("relatorio_us", "relatório µs", ",.1f", MENOR_MELHOR),
+        ("varredura_ms", "varredura ms", ",.1f", INFORMATIVA),
+        ("deposito_us", "depósito µs", ".2f", MENOR_MELHOR),
+    ), linhas)
+
+#######################
+# Função BENCH_FRAUDE #
+#######################
+#
+# Custo do detector de anomalias (DetectorAnomalias) por transação em
+# tráfego normal: pontuação (o verificador) e registro (o ouvinte, só
+# das aceitas), comparados ao depósito completo sem detector. Movimentam
+# operacoes / 100 contas sorteadas entre todas (~100 operações cada, o
+# bastante para passar do aquecimento); cada uma tem um valor típico e
+# um horário habitual de 8 horas, em que movimenta em média uma vez por
+# hora, com datas sempre avançando. 1% das operações tem valor 20 vezes
+# o típico. A primeira metade das operações aquece as estatísticas e a
+# segunda é medida; as taxas de sinalizadas e bloqueadas são dessa
+# segunda metade, para mostrar que a medida é de tráfego que passa.
+#
+
+def bench_fraude(tamanhos, operacoes=200_000, semente=SEMENTE_PADRAO):
+    linhas = []
+
+    for tamanho in tamanhos:
+        aleatorio = random.Random(semente)
+        contas = [ContaCorrente(numero, None) for numero in range(1, tamanho + 1)]
+
+        # contas movimentadas agrupadas pela hora em que começa o horário habitual
+        ativas = aleatorio.sample(contas, min(tamanho, max(operacoes // 100, 1)))
+        tipicos = {conta.numero: aleatorio.randrange(50_00, 1_000_00) for conta in ativas}
+        por_hora = [ativas[hora::24] or ativas for hora in range(24)]
+
+        inicio_trafego = datetime(2024, 1, 1).timestamp()
+        passo = 3 * 3_600 / len(ativas)
+        trafego = []
+        for i in range(operacoes):
+            momento = datetime.fromtimestamp(inicio_trafego + i * passo)
+            conta = aleatorio.choice(por_hora[(momento.hour - aleatorio.randrange(8)) % 24])
+            fator = 20 if aleatorio.random() < 0.01 else aleatorio.uniform(0.5, 1.5)
+            trafego.append((conta, Deposito(int(tipicos[conta.numero] * fator)), momento))
+
+        # depósito completo sem detector (primeira passada cria os históricos)
+        for conta, deposito, _ in trafego:
+            deposito.registrar(conta)
+
+        inicio = time.perf_counter()
+        for conta, deposito, _ in trafego:
+            deposito.registrar(conta)
+        tempo_sem = (time.perf_counter() - inicio) / operacoes
+
+        detector = DetectorAnomalias(alertas_guardados=operacoes)
+        detector._crescer(tamanho)
+        aceita = ResultadoOperacao(OK, 0)
+
+        def processar(trecho):
+            inicio = time.perf_counter()
+            for conta, deposito, momento in trecho:
+                if detector(conta, deposito, "Deposito", momento) == OK:
+                    detector.registrar("transacao", conta=conta, transacao=deposito, resultado=aceita, data=momento)
+            return time.perf_counter() - inicio
+
+        metade = operacoes // 2
+        processar(trafego[:metade])
+        alertas_aquecimento = len(detector.alertas)
+        medidas = operacoes - metade
+        tempo_detector = processar(trafego[metade:]) / medidas
+
+        alertas = list(detector.alertas)[alertas_aquecimento:]
+        bloqueadas = sum(1 for alerta in alertas if alerta[4])
+
+        memoria = sum(coluna.itemsize * len(coluna) for coluna in (
+            detector._quantidades, detector._medias, detector._variancias, detector._horas, detector._recentes,
+            detector._cabecas))
+
+        linhas.append({"tamanho": tamanho, "sem_us": tempo_sem * 1e6, "detector_us": tempo_detector * 1e6,
+                       "acrescimo_pct": 100 * tempo_detector / tempo_sem,
+                       "sinalizadas_pct": 100 * (len(alertas) - bloqueadas) / medidas,
+                       "bloqueadas_pct": 100 * bloqueadas / medidas, "mb_detector": memoria / 1e6})
+
+    return montar_tabela("Antifraude: depósito sem detector x pontuação + registro em tráfego normal", (
+        ("tamanho", "contas", "", INFORMATIVA),
+        ("sem_us", "depósito µs", ".2f", MENOR_MELHOR),
+        ("detector_us", "detector µs", ".2f", MENOR_MELHOR),
+        ("acrescimo_pct", "acréscimo %", ".0f", INFORMATIVA),
+        ("sinalizadas_pct", "sinalizadas %", ".2f", INFORMATIVA),
+        ("bloqueadas_pct", "bloqueadas %", ".2f", INFORMATIVA),
+        ("mb_detector", "MB detector", ",.1f", INFORMATIVA),
+    ), linhas)
+
+
+##########################
+# Função BENCH_AUDITORIA #
+##########################
+#
+# Vazão da auditoria (auditar_contas) sobre históricos distribuídos entre
+# 1.000 contas: completa no próprio processo, completa em paralelo (um
+# processo por núcleo) e incremental depois de 1% de transações novas,
+# x recálculo das somas transação a transação (sem selos). Para o caso
+# de 100 milhões use --tamanhos 100000000.
+#
+
+def bench_auditoria(tamanhos, quantidade_contas=1_000, semente=SEMENTE_PADRAO):
+    processos = os.cpu_count() or 1
+    linhas = []
+
+    for tamanho in tamanhos:
+        contas = [ContaCorrente(numero, None) for numero in range(1, quantidade_contas + 1)]
+        inicio_historico = datetime(2020, 1, 1).timestamp()
+        for i in range(tamanho):
+            conta = contas[i % quantidade_contas]
+            conta.historico._adicionar_registro(0 if i % 3 else 1, 10_00, inicio_historico + i)
+            conta._saldo += 10_00 if i % 3 else -10_00
+
+        relatorio = auditar_contas(contas, 1, completa=True)
+        assert not relatorio.divergencias and relatorio.transacoes == tamanho
+        linha = {"tamanho": tamanho, "serie_por_s": relatorio.transacoes_por_segundo}
+
+        relatorio = auditar_contas(contas, processos, completa=True)
+        assert not relatorio.divergencias
+        linha["paralelo_por_s"] = relatorio.transacoes_por_segundo
+
+        for i in range(tamanho // 100):
+            conta = contas[i % quantidade_contas]
+            conta.historico._adicionar_registro(0, 10_00, inicio_historico + tamanho + i)
+            conta._saldo += 10_00
+
+        relatorio = auditar_contas(contas)
+        assert not relatorio.divergencias
+        linha["incremental_ms"] = relatorio.segundos * 1e3
+
+        # recálculo simples, amostra de até 1 milhão de transações
+        inicio = time.perf_counter()
+        recalculadas = 0
+        for conta in contas:
+            historico = conta.historico
+            saldo = sum(-valor if codigo == 1 else valor for codigo, valor in zip(historico._tipos, historico._valores))
+            assert saldo == conta.saldo
+            recalculadas += len(historico)
+            if recalculadas >= 1_000_000:
+                break
+        linha["recalculo_por_s"] = recalculadas / (time.perf_counter() - inicio)
+
+        linhas.append(linha)
+
+    return montar_tabela(f"Auditoria: transações/s (paralelo com {processos} processos) e incremental após +1%", (
+        ("tamanho", "transacoes", "", INFORMATIVA),
+        ("serie_por_s", "completa", ",.0f", MAIOR_MELHOR),
+        ("paralelo_por_s", "completa paralela", ",.0f", MAIOR_MELHOR),
+        ("incremental_ms", "incremental ms", ",.1f", MENOR_MELHOR),
+        ("recalculo_por_s", "recálculo", ",.0f", INFORMATIVA),
+    ), linhas)
+
+
+########################
+# Função BENCH_CAMADAS #
+########################
+#
+# Histórico de uma conta em um Historico comum x HistoricoEscalonado
+# (camada quente em memória, o resto em segmentos mapeados): memória
+# residente das colunas, custo de cada transação nova, últimas 20 do
+# extrato, saldo_em em pontos aleatórios e total. As medições começam
+# depois da compactação em segundo plano terminar.
+#
+
+def bench_camadas(tamanhos, consultas=1_000, semente=SEMENTE_PADRAO):
+    linhas = []
+    diretorio = tempfile.mkdtemp(prefix="bench_camadas_")
+
+    try:
+        for tamanho in tamanhos:
+            inicio_historico = datetime(2020, 1, 1).timestamp()
+            aleatorio = random.Random(semente)
+            momentos = [datetime.fromtimestamp(inicio_historico + aleatorio.randrange(tamanho) * 60)
+                        for _ in range(consultas)]
+            linha = {"tamanho": tamanho}
+
+            for nome, historico in (("comum", Historico()),
+                                    ("camadas", HistoricoEscalonado(os.path.join(diretorio, str(tamanho))))):
+                inicio = time.perf_counter()
+                for i in range(tamanho):
+                    historico._adicionar_registro(0 if i % 3 else 1, 10_00, inicio_historico + i * 60)
+                linha[f"{nome}_adicionar_us"] = (time.perf_counter() - inicio) / tamanho * 1e6
+
+                # espera a compactação pendente (uma única thread, em ordem)
+                _compactador.submit(int).result()
+
+                linha[f"{nome}_kib"] = sum(len(coluna) * coluna.itemsize for coluna in
+                                           (historico._tipos, historico._valores, historico._datas)) / 1_024
+
+                inicio = time.perf_counter()
+                ultimas = list(historico.extrato(ultimas=20))
+                linha[f"{nome}_ultimas_ms"] = (time.perf_counter() - inicio) * 1e3
+
+                inicio = time.perf_counter()
+                saldos = [historico.saldo_em(momento) for momento in momentos]
+                linha[f"{nome}_saldo_em_us"] = (time.perf_counter() - inicio) / consultas * 1e6
+
+                inicio = time.perf_counter()
+                total = historico.total()
+                linha[f"{nome}_total_ms"] = (time.perf_counter() - inicio) * 1e3
+
+                if nome == "comum":
+                    esperado = ultimas, saldos, total
+                else:
+                    assert (ultimas, saldos, total) == esperado
+
+            linhas.append(linha)
+
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+    return montar_tabela(f"Histórico em camadas (limite quente {LIMITE_QUENTE}) x Historico comum", (
+        ("tamanho", "transacoes", "", INFORMATIVA),
+        ("comum_kib", "comum KiB", ",.0f", INFORMATIVA),
+        ("camadas_kib", "camadas KiB", ",.0f", MENOR_MELHOR),
+        ("comum_adicionar_us", "comum µs/tx", ".2f", INFORMATIVA),
+        ("camadas_adicionar_us", "camadas µs/tx", ".2f", MENOR_MELHOR),
+        ("comum_ultimas_ms", "comum últimas ms", ".3f", INFORMATIVA),
+        ("camadas_ultimas_ms", "camadas últimas ms", ".3f", MENOR_MELHOR),
+        ("comum_saldo_em_us", "comum saldo_em µs", ".1f", INFORMATIVA),
+        ("camadas_saldo_em_us", "camadas saldo_em µs", ".1f", MENOR_MELHOR),
+        ("comum_total_ms", "comum total ms", ".2f", INFORMATIVA),
+        ("camadas_total_ms", "camadas total ms", ".2f", MENOR_MELHOR),
+    ), linhas)
+
+
+#############################
+# Função BENCH_INSTANTANEOS #
+#############################
+#
+# Carga mista com threads: escritores registram depósitos e saques em 100
+# contas ao acaso enquanto leitores geram extratos (últimas 20 e saldo)
+# das mesmas contas. Compara uma trava global (leituras e escritas em
+# série) com a leitura por Conta.instantaneo, sem trava: vazão das
+# escritas e das leituras e latência p99 das leituras. O tamanho é a
+# quantidade de escritas; os leitores seguem até elas terminarem.
+#
+
+def bench_instantaneos(tamanhos, escritores=2, leitores=2, semente=SEMENTE_PADRAO):
+    linhas = []
+    quantidade_contas = 100
+
+    def escritor(contas, quantidade, semente_thread, trava):
+        aleatorio = random.Random(semente_thread)
+        for _ in range(quantidade):
+            conta = aleatorio.choice(contas)
+            transacao = Deposito(aleatorio.randint(1, 100_00)) if aleatorio.random() < 0.6 else Saque(50_00)
+            if trava is None:
+                transacao.registrar(conta)
+            else:
+                with trava:
+                    transacao.registrar(conta)
+
+    def leitor(contas, semente_thread, trava, fim, latencias):
+        aleatorio = random.Random(semente_thread)
+        while not fim.is_set():
+            conta = aleatorio.choice(contas)
+            inicio = time.perf_counter()
+            if trava is None:
+                instantaneo = conta.instantaneo()
+                saldo, extrato = instantaneo.saldo, list(instantaneo.extrato(ultimas=20))
+            else:
+                with trava:
+                    saldo, extrato = conta.saldo, list(conta.historico.extrato(ultimas=20))
+            latencias.append(time.perf_counter() - inicio)
+
+    for tamanho in tamanhos:
+        linha = {"tamanho": tamanho}
+
+        for nome, trava in (("global", threading.Lock()), ("instantaneo", None)):
+            contas = [Conta(numero, None) for numero in range(1, quantidade_contas + 1)]
+            for conta in contas:
+                Deposito(1_000_000_00).registrar(conta)
+
+            fim, latencias = threading.Event(), []
+            threads_escrita = [threading.Thread(target=escritor,
+                                                args=(contas, tamanho // escritores, semente + indice, trava))
+                               for indice in range(escritores)]
+            threads_leitura = [threading.Thread(target=leitor, args=(contas, semente + indice, trava, fim, latencias))
+                               for indice in range(leitores)]
+
+            inicio = time.perf_counter()
+            for thread in threads_leitura + threads_escrita:
+                thread.start()
+            for thread in threads_escrita:
+                thread.join()
+            decorrido = time.perf_counter() - inicio
+            fim.set()
+            for thread in threads_leitura:
+                thread.join()
+
+            for conta in contas:
+                instantaneo = conta.instantaneo()
+                assert instantaneo.saldo == instantaneo.saldo_historico == conta.saldo, \
+                    f"instantâneo diverge do saldo na conta {conta.numero}"
+
+            latencias.sort()
+            linha[f"{nome}_escritas_por_s"] = tamanho // escritores * escritores / decorrido
+            linha[f"{nome}_leituras_por_s"] = len(latencias) / decorrido
+            linha[f"{nome}_p99_ms"] = latencias[min(len(latencias) - 1, int(len(latencias) * 0.99))] * 1e3
+
+        linhas.append(linha)
+
+    return montar_tabela(f"Carga mista ({escritores} escritores, {leitores} leitores de extrato, "
+                         f"{quantidade_contas} contas): trava global x instantâneos", (
+        ("tamanho", "escritas", "", INFORMATIVA),
+        ("global_escritas_por_s", "global escr/s", ",.0f", INFORMATIVA),
+        ("global_leituras_por_s", "global leit/s", ",.0f", INFORMATIVA),
+        ("global_p99_ms", "global leit p99 ms", ".2f", INFORMATIVA),
+        ("instantaneo_escritas_por_s", "instant. escr/s", ",.0f", MAIOR_MELHOR),
+        ("instantaneo_leituras_por_s", "instant. leit/s", ",.0f", MAIOR_MELHOR),
+        ("instantaneo_p99_ms", "instant. leit p99 ms", ".2f", MENOR_MELHOR),
+    ), linhas)
+
+
+# todos chamados como benchmark(tamanhos, semente=...); os que não sorteiam
+# nada ignoram a semente
+BENCHMARKS = {
+    "busca_cliente": bench_busca_cliente,
+    "deposito": bench_deposito,
+    "saque": bench_saque,
+    "listar_contas": bench_listar_contas,
+    "importacao": bench_importacao,
+    "memoria_conta": bench_memoria_conta,
+    "memoria_historico": bench_memoria_historico,
+    "total_saldos": bench_total_saldos,
+    "transacoes": bench_transacoes,
+    "lote": bench_lote,
+    "transferencias": bench_transferencias,
+    "shards": bench_shards,
+    "journal": bench_journal,
+    "recuperacao": bench_recuperacao,
+    "extrato": bench_extrato,
+    "saldo_em": bench_saldo_em,
+    "exportacao": bench_exportacao,
+    "fim_do_dia": bench_fim_do_dia,
+    "indices": bench_indices,
+    "idempotencia": bench_idempotencia,
+    "agregados": bench_agregados,
+    "fraude": bench_fraude,
+    "auditoria": bench_auditoria,
+    "camadas": bench_camadas,
+    "instantaneos": bench_instantaneos,
+}
+
+############################
+# Função COMPARAR_BASELINE #
+############################
+#
+# Compara os resultados com os de uma execução anterior, linha a linha
+# (mesmo benchmark e tamanho), e exibe as métricas que pioraram além da
+# tolerância. Métricas informativas não entram na comparação.
+#
+# Args:
+#    resultados (dict): nome do benchmark -> tabela (montar_tabela)
+#    baseline (dict): conteúdo de um arquivo gravado com --json
+#    tolerancia (float): piora aceita, ex.: 0.10 = 10%
+# Retorna:
+#    list: tuplas (benchmark, linha, métrica, antes, depois, piora)
+#
+
+def comparar_baseline(resultados, baseline, tolerancia):
+    regressoes = []
+    comparadas = 0
+
+    def chave(linha):
+        return tuple(linha.get(coluna) for coluna in CHAVES)
+
+    for nome, tabela in resultados.items():
+        anterior = baseline["resultados"].get(nome)
+        if anterior is None:
+            continue
+
+        linhas_anteriores = {chave(linha): linha for linha in anterior["linhas"]}
+
+        for linha in tabela["linhas"]:
+            base = linhas_anteriores.get(chave(linha))
+            if base is None:
+                continue
+
+            for metrica, sentido in tabela["metricas"].items():
+                antes, depois = base.get(metrica), linha[metrica]
+                if sentido == INFORMATIVA or not antes:
+                    continue
+
+                comparadas += 1
+                piora = (antes - depois) / antes if sentido == MAIOR_MELHOR else (depois - antes) / antes
+                if piora > tolerancia:
+                    regressoes.append((nome, chave(linha), metrica, antes, depois, piora))
+
+    print(f"\nComparação com a baseline ({comparadas} métricas, tolerância {tolerancia:.0%})")
+
+    if not regressoes:
+        print("Nenhuma regressão.")
+
+    for nome, chave_linha, metrica, antes, depois, piora in regressoes:
+        linha = "/".join(str(valor) for valor in chave_linha if valor is not None)
+        print(f"REGRESSÃO {nome} [{linha}] {metrica}: {antes:,.3f} -> {depois:,.3f} ({piora:+.1%} pior)")
+
+    return regressoes
+
+#==================================
+# PROGRAMA PRINCIPAL
+#==================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks do Sistema Bancário")
+    parser.add_argument("benchmarks", nargs="*", help="benchmarks a executar: " + ", ".join(BENCHMARKS))
+    parser.add_argument("--tamanhos", default=",".join(str(t) for t in TAMANHOS_PADRAO),
+                        help="tamanhos separados por vírgula, ex.: 1000,10000000")
+    parser.add_argument("--completo", action="store_true", help="tamanhos de 10³ a 10⁷")
+    parser.add_argument("--semente", type=int, default=SEMENTE_PADRAO, help="semente dos dados sintéticos")
+    parser.add_argument("--json", help="grava os resultados neste arquivo")
+    parser.add_argument("--baseline", help="arquivo --json de uma execução anterior para comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.10, help="piora aceita na comparação (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    tamanhos = list(TAMANHOS_COMPLETOS) if args.completo else [int(t) for t in args.tamanhos.split(",")]
+
+    for nome in args.benchmarks:
+        if nome not in BENCHMARKS:
+            parser.error(f"benchmark desconhecido: {nome}")
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as arquivo:
+            baseline = json.load(arquivo)
+
+    resultados = {}
+    for nome in args.benchmarks or BENCHMARKS:
+        # cada benchmark cria os seus geradores a partir da semente: o
+        # resultado não depende da ordem
+        resultados[nome] = BENCHMARKS[nome](tamanhos, semente=args.semente)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as arquivo:
+            json.dump({
+                "data": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "plataforma": platform.platform(),
+                "numpy": np.__version__ if np is not None else None,
+                "semente": args.semente,
+                "tamanhos": tamanhos,
+                "resultados": resultados,
+            }, arquivo, ensure_ascii=False, indent=2)
+
+    if baseline is not None and comparar_baseline(resultados, baseline, args.tolerancia):
+        parser.exit(1)
+
+if __name__ == "__main__":
+    main()
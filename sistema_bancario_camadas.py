@@ -0,0 +1,612 @@
+# Sistema Bancário em Python - Histórico em camadas
+# Descrição: Historico com as transações recentes em memória e as antigas
+#            em segmentos binários no disco, mapeados sob demanda (mmap)
+#
+# Uso:
+#    escalonar_historicos(contas, "dados/segmentos")    # contas com histórico longo
+#    limpar_segmentos(contas, "dados/segmentos")        # ao iniciar: apaga os órfãos
+#
+# HistoricoEscalonado mantém as últimas transações nas colunas em memória
+# do Historico (a "camada quente", entre limite_quente e 2 * limite_quente
+# transações) e grava as mais antigas, em intervalos completos de
+# INTERVALO_CHECKPOINT, em segmentos imutáveis: cabeçalho <4sIQ (marca,
+# versão, quantidade) seguido das colunas tipos (B, completada até
+# múltiplo de 8), valores (q) e datas (d). A leitura de um segmento é um
+# memoryview sobre o mmap do arquivo, sem cópia; no máximo LIMITE_MAPAS
+# segmentos ficam mapeados ao mesmo tempo.
+#
+# A memória residente de cada histórico fica limitada à camada quente
+# mais checkpoints e selos (24 bytes a cada 256 transações), qualquer que
+# seja o tamanho do histórico. Uma thread em segundo plano junta os
+# segmentos pequenos em maiores (FATOR_COMPACTACAO de cada vez, até
+# TAMANHO_SEGMENTO transações), para não acumular arquivos.
+#
+# Instantâneos (Historico.instantaneo) leem sem a trava da conta: a troca
+# de camadas (descarregar, compactar) nunca altera colunas ou segmentos
+# já publicados, só troca as referências, e marca a troca no contador
+# _mudancas; a leitura que cruzou uma troca é refeita.
+#
+# O escalonamento não sobrevive a um reinício: os segmentos só valem
+# para o processo que os gravou. Ao ser serializado (snapshot do journal,
+# processos da exportação), o histórico vira um Historico comum com todas
+# as colunas, lidas dos segmentos; a cópia não depende dos arquivos, que
+# a compactação apaga. Depois de recuperar o banco de um snapshot, as
+# contas voltam com o histórico inteiro em memória e são escalonadas de
+# novo (escalonar_historicos); os segmentos do processo anterior ficam
+# órfãos e são apagados (limpar_segmentos, ou ao escalonar a conta).
+#
+# Os arquivos de uma conta têm nome estável, <agência>-<número>-<seq>.seg,
+# para que os órfãos sejam reconhecidos.
+
+import mmap
+import os
+import struct
+import threading
+import time
+import uuid
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from itertools import count
+
+from sistema_bancario_poo import (CODIGOS_TRANSACAO, SINAIS_TRANSACAO, TAMANHO_SELO, TIPOS_TRANSACAO, Historico,
+                                  TransacoesView, _para_timestamp, np, verificar_colunas)
+
+CABECALHO = struct.Struct("<4sIQ")
+MARCA = b"HSEG"
+VERSAO = 1
+
+LIMITE_QUENTE = 4_096
+TAMANHO_SEGMENTO = 1_048_576
+FATOR_COMPACTACAO = 8
+LIMITE_MAPAS = 256
+
+# uma thread para todas as compactações: o trabalho é de E/S e cópia
+_compactador = ThreadPoolExecutor(1, thread_name_prefix="compactacao")
+
+# segmentos mapeados, na ordem de abertura
+_mapas = OrderedDict()
+_trava_mapas = threading.Lock()
+
+def _alinhar(tamanho):
+    return (tamanho + 7) // 8 * 8
+
+#----------------------------------------
+# CLASSE: _Segmento
+#----------------------------------------
+#
+# Arquivo de segmento, mapeado na primeira leitura. Ao passar de
+# LIMITE_MAPAS segmentos abertos, o mais antigo solta as suas visões; o
+# mmap é fechado quando a última visão em uso é liberada.
+#
+# - caminho: str
+# - quantidade: int - transações no segmento
+#
+# + colunas(): tuple - memoryviews (tipos, valores, datas)
+#
+
+class _Segmento:
+    __slots__ = ("caminho", "quantidade", "_colunas")
+
+    def __init__(self, caminho, quantidade):
+        self.caminho = caminho
+        self.quantidade = quantidade
+        self._colunas = None
+
+    def colunas(self):
+        colunas = self._colunas
+        if colunas is not None:
+            return colunas
+
+        with open(self.caminho, "rb") as arquivo:
+            visao = memoryview(mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ))
+
+        quantidade = self.quantidade
+        inicio_valores = CABECALHO.size + _alinhar(quantidade)
+        inicio_datas = inicio_valores + 8 * quantidade
+        colunas = self._colunas = (visao[CABECALHO.size:CABECALHO.size + quantidade],
+                                   visao[inicio_valores:inicio_datas].cast("q"),
+                                   visao[inicio_datas:inicio_datas + 8 * quantidade].cast("d"))
+
+        with _trava_mapas:
+            _mapas[self] = None
+            while len(_mapas) > LIMITE_MAPAS:
+                antigo, _ = _mapas.popitem(last=False)
+                antigo._colunas = None
+
+        return colunas
+
+# grava as partes (colunas tipos, valores, datas) em um segmento, de forma atômica
+def _gravar_segmento(caminho, partes):
+    quantidade = sum(len(tipos) for tipos, _, _ in partes)
+    temporario = caminho + ".tmp"
+
+    with open(temporario, "wb") as arquivo:
+        arquivo.write(CABECALHO.pack(MARCA, VERSAO, quantidade))
+        for coluna in range(3):
+            for parte in partes:
+                arquivo.write(parte[coluna])
+            if coluna == 0:
+                arquivo.write(bytes(_alinhar(quantidade) - quantidade))
+        arquivo.flush()
+        os.fsync(arquivo.fileno())
+
+    os.replace(temporario, caminho)
+    return _Segmento(caminho, quantidade)
+
+def _nome_segmento(prefixo, sequencia):
+    return f"{prefixo}-{sequencia:08d}.seg"
+
+# prefixo dos segmentos de uma conta: estável entre execuções
+def _prefixo_conta(conta):
+    return f"{conta.agencia}-{conta.numero}"
+
+# nível de compactação: segmentos do mesmo nível têm tamanhos parecidos
+def _nivel(quantidade, limite_quente):
+    nivel = 0
+    while quantidade >= limite_quente * FATOR_COMPACTACAO ** (nivel + 1):
+        nivel += 1
+    return nivel
+
+# reconstrói a cópia serializada de um HistoricoEscalonado
+def _historico_comum(estado):
+    historico = Historico()
+    for atributo, valor in estado.items():
+        setattr(historico, atributo, valor)
+    return historico
+
+#----------------------------------------
+# CLASSE: HistoricoEscalonado
+# Estende: Historico
+#----------------------------------------
+#
+# Mesma interface do Historico (transacoes, extrato, saldo_em, total,
+# filtrar, verificar...). As posições são as de sempre, contadas desde a
+# primeira transação; as _base primeiras estão nos segmentos.
+#
+# Ao completar um intervalo com 2 * limite_quente transações em memória
+# (ou, com dias_quentes, com o primeiro intervalo mais antigo que isso),
+# as mais antigas vão para um segmento novo até restarem limite_quente.
+#
+# - limite_quente: int - transações mantidas em memória (múltiplo de 256)
+# - dias_quentes: int - dias mantidos em memória (opcional)
+# - prefixo: str - nome dos segmentos (ex.: "0001-42"); os que já existem
+#   com esse prefixo, de uma execução anterior, são apagados. Sem ele, um
+#   prefixo aleatório
+#
+# + descarregar(): int - transações gravadas em segmento
+# + compactar(): bool - juntou um grupo de segmentos
+#
+
+class HistoricoEscalonado(Historico):
+    __slots__ = ("limite_quente", "dias_quentes", "_diretorio", "_prefixo", "_sequencia", "_base", "_camadas",
+                 "_mudancas", "_trava", "_trava_compactacao", "_compactando")
+
+    def __init__(self, diretorio, limite_quente=LIMITE_QUENTE, dias_quentes=None, trava=None, prefixo=None):
+        super().__init__()
+
+        if limite_quente < self.INTERVALO_CHECKPOINT or limite_quente % self.INTERVALO_CHECKPOINT:
+            raise ValueError(f"limite_quente deve ser múltiplo de {self.INTERVALO_CHECKPOINT}")
+
+        os.makedirs(diretorio, exist_ok=True)
+        self.limite_quente = limite_quente
+        self.dias_quentes = dias_quentes
+        self._diretorio = diretorio
+        self._prefixo = prefixo or uuid.uuid4().hex[:16]
+        self._sequencia = count(1)
+        self._base = 0
+        self._camadas = ((), ())
+        # ímpar durante a troca de camadas; muda a cada troca
+        self._mudancas = 0
+        # a trava da conta: a troca de segmentos da compactação não corre
+        # em paralelo com uma leitura
+        self._trava = trava or threading.RLock()
+        self._trava_compactacao = threading.Lock()
+        self._compactando = False
+
+        if prefixo is not None:
+            _remover_segmentos(diretorio, lambda anterior: anterior == prefixo)
+
+# escalona um Historico existente (assume as colunas dele)
+    @classmethod
+    def a_partir_de(cls, historico, diretorio, limite_quente=LIMITE_QUENTE, dias_quentes=None, trava=None,
+                    prefixo=None):
+        escalonado = cls(diretorio, limite_quente, dias_quentes, trava, prefixo)
+        for atributo in Historico.__slots__:
+            setattr(escalonado, atributo, getattr(historico, atributo))
+
+        escalonado.descarregar()
+        return escalonado
+
+# cópia serializável: um Historico comum com todas as colunas (o
+# escalonamento não vai junto, ver o cabeçalho)
+    def __reduce_ex__(self, protocolo):
+        estado = {atributo: getattr(self, atributo) for atributo in Historico.__slots__}
+        estado["_tipos"], estado["_valores"], estado["_datas"] = self._colunas()
+        return _historico_comum, (estado,)
+
+    def __len__(self):
+        return self._base + len(self._tipos)
+
+    def _acumular(self, codigo, valor):
+        super()._acumular(codigo, valor)
+
+        quentes = len(self._tipos)
+        if quentes % self.INTERVALO_CHECKPOINT == 0:
+            if quentes >= 2 * self.limite_quente:
+                self.descarregar()
+            elif (self.dias_quentes is not None and quentes >= 2 * self.INTERVALO_CHECKPOINT
+                    and self._datas[self.INTERVALO_CHECKPOINT - 1] < self._corte()):
+                self.descarregar()
+
+    def _corte(self):
+        return datetime.now().timestamp() - self.dias_quentes * 86_400
+
+#
+# MÉTODO descarregar
+#
+# Grava em um segmento novo as transações além de limite_quente (e as
+# anteriores a dias_quentes), em intervalos completos; ao menos uma
+# transação fica em memória. Deve ser chamado com a trava da conta.
+#
+# Retorna:
+#    int: quantidade de transações gravadas
+#
+
+    def descarregar(self):
+        intervalo = self.INTERVALO_CHECKPOINT
+        quentes = len(self._tipos)
+        excedente = quentes - self.limite_quente
+
+        if self.dias_quentes is not None and self._ordenado:
+            excedente = max(excedente, bisect_left(self._datas, self._corte(), 0, quentes))
+
+        quantidade = min(excedente // intervalo, (quentes - 1) // intervalo) * intervalo
+        if quantidade <= 0:
+            return 0
+
+        caminho = os.path.join(self._diretorio, _nome_segmento(self._prefixo, next(self._sequencia)))
+        segmento = _gravar_segmento(caminho, [(self._tipos[:quantidade], self._valores[:quantidade],
+                                               self._datas[:quantidade])])
+
+        # colunas novas em vez de apagar o começo das atuais, que um
+        # instantâneo pode estar lendo
+        tipos, valores, datas = self._tipos[quantidade:], self._valores[quantidade:], self._datas[quantidade:]
+        inicios, segmentos = self._camadas
+
+        self._mudancas += 1
+        self._camadas = (inicios + (self._base,), segmentos + (segmento,))
+        self._base += quantidade
+        self._tipos, self._valores, self._datas = tipos, valores, datas
+        self._mudancas += 1
+
+        self._agendar_compactacao()
+        return quantidade
+
+#
+# MÉTODO compactar
+#
+# Junta em um segmento FATOR_COMPACTACAO segmentos seguidos do mesmo
+# nível (tamanhos parecidos), sem passar de TAMANHO_SEGMENTO. A cópia é
+# feita fora da trava da conta; só a troca dos segmentos a usa.
+#
+# Retorna:
+#    bool: True se algum grupo foi compactado
+#
+
+    def compactar(self):
+        with self._trava_compactacao:
+            _, segmentos = self._camadas
+            grupo = self._grupo_compactavel(segmentos)
+            if grupo is None:
+                return False
+
+            primeiro, ultimo = grupo
+            antigos = segmentos[primeiro:ultimo]
+            caminho = os.path.join(self._diretorio, _nome_segmento(self._prefixo, next(self._sequencia)))
+            novo = _gravar_segmento(caminho, [segmento.colunas() for segmento in antigos])
+
+            # enquanto a cópia era feita, segmentos só podem ter entrado no
+            # fim; uma leitura que pegou as camadas antigas é refeita
+            with self._trava:
+                inicios, segmentos = self._camadas
+                self._camadas = (inicios[:primeiro + 1] + inicios[ultimo:],
+                                 segmentos[:primeiro] + (novo,) + segmentos[ultimo:])
+                self._mudancas += 2
+
+            for segmento in antigos:
+                os.remove(segmento.caminho)
+
+            return True
+
+    def _grupo_compactavel(self, segmentos):
+        for primeiro in range(len(segmentos) - FATOR_COMPACTACAO + 1):
+            grupo = segmentos[primeiro:primeiro + FATOR_COMPACTACAO]
+            nivel = _nivel(grupo[0].quantidade, self.limite_quente)
+
+            if (all(_nivel(segmento.quantidade, self.limite_quente) == nivel for segmento in grupo)
+                    and sum(segmento.quantidade for segmento in grupo) <= TAMANHO_SEGMENTO):
+                return primeiro, primeiro + FATOR_COMPACTACAO
+
+        return None
+
+    def _agendar_compactacao(self):
+        if not self._compactando and self._grupo_compactavel(self._camadas[1]) is not None:
+            self._compactando = True
+            _compactador.submit(self._compactar_em_segundo_plano)
+
+    def _compactar_em_segundo_plano(self):
+        try:
+            while self.compactar():
+                pass
+        finally:
+            self._compactando = False
+
+# trechos (posição inicial, tipos, valores, datas) a partir da posição,
+# em ordem: os segmentos (memoryviews do mmap) e por fim a camada quente
+    def _trechos(self, inicio=0):
+        inicios, segmentos = self._camadas
+        base = self._base
+        primeiro = max(bisect_right(inicios, inicio) - 1, 0)
+
+        for posicao, segmento in zip(inicios[primeiro:], segmentos[primeiro:]):
+            deslocamento = max(inicio - posicao, 0)
+            if deslocamento < segmento.quantidade:
+                tipos, valores, datas = segmento.colunas()
+                yield posicao + deslocamento, tipos[deslocamento:], valores[deslocamento:], datas[deslocamento:]
+
+        deslocamento = max(inicio - base, 0)
+        if deslocamento == 0:
+            yield base, self._tipos, self._valores, self._datas
+        elif deslocamento <= len(self._tipos):
+            yield inicio, self._tipos[deslocamento:], self._valores[deslocamento:], self._datas[deslocamento:]
+
+# executa a leitura até ela não cruzar uma troca de camadas; no meio de
+# uma, a leitura pode misturar base e colunas de lados diferentes da troca
+# ou abrir um segmento que a compactação já apagou
+    def _estavel(self, leitura, *args):
+        while True:
+            mudancas = self._mudancas
+            try:
+                resultado = leitura(*args)
+            except (IndexError, FileNotFoundError):
+                if self._mudancas == mudancas:
+                    raise
+            else:
+                if self._mudancas == mudancas and not mudancas & 1:
+                    return resultado
+            time.sleep(0)
+
+    def _registro(self, posicao):
+        return self._estavel(self._ler_registro, posicao)
+
+    def _ler_registro(self, posicao):
+        if posicao < 0:
+            posicao += len(self)
+
+        if posicao >= self._base:
+            posicao -= self._base
+            return self._tipos[posicao], self._valores[posicao], self._datas[posicao]
+
+        inicios, segmentos = self._camadas
+        indice = bisect_right(inicios, posicao) - 1
+        tipos, valores, datas = segmentos[indice].colunas()
+        posicao -= inicios[indice]
+        return tipos[posicao], valores[posicao], datas[posicao]
+
+    def _colunas(self, inicio=0, fim=None):
+        tipos, valores, datas = array("B"), array("q"), array("d")
+
+        for posicao, *colunas in self._trechos(inicio):
+            if fim is not None and posicao >= fim:
+                break
+            for destino, coluna in zip((tipos, valores, datas), colunas):
+                destino.frombytes(memoryview(coluna)[:None if fim is None else fim - posicao].cast("B"))
+
+        return tipos, valores, datas
+
+    def total(self, tipo=None):
+        codigo = None if tipo is None else CODIGOS_TRANSACAO[tipo]
+        total = 0
+
+        for _, tipos, valores, _ in self._trechos():
+            if np is not None:
+                valores = np.frombuffer(valores, dtype=np.int64)
+                if codigo is not None:
+                    valores = valores[np.frombuffer(tipos, dtype=np.uint8) == codigo]
+                total += int(valores.sum())
+            else:
+                total += sum(valor for cod, valor in zip(tipos, valores) if codigo is None or cod == codigo)
+
+        return total
+
+    def totais_por_tipo(self):
+        totais = [[0, 0] for _ in TIPOS_TRANSACAO]
+
+        for _, tipos, valores, _ in self._trechos():
+            if np is not None:
+                tipos = np.frombuffer(tipos, dtype=np.uint8)
+                valores = np.frombuffer(valores, dtype=np.int64)
+                for codigo, quantidade in enumerate(np.bincount(tipos, minlength=len(TIPOS_TRANSACAO)).tolist()):
+                    if quantidade:
+                        totais[codigo][0] += quantidade
+                        totais[codigo][1] += int(valores[tipos == codigo].sum())
+            else:
+                for codigo, valor in zip(tipos, valores):
+                    totais[codigo][0] += 1
+                    totais[codigo][1] += valor
+
+        return [tuple(total) for total in totais]
+
+    def filtrar(self, tipo):
+        codigo = CODIGOS_TRANSACAO[tipo]
+
+        if np is not None:
+            indices = np.concatenate([
+                np.flatnonzero(np.frombuffer(tipos, dtype=np.uint8) == codigo) + inicio
+                for inicio, tipos, _, _ in self._trechos()
+            ])
+        else:
+            indices = [inicio + i for inicio, tipos, _, _ in self._trechos() for i, cod in enumerate(tipos)
+                       if cod == codigo]
+
+        return TransacoesView(self, indices)
+
+# período: na camada quente quando começa depois dela, senão busca
+# binária por todas as camadas; com o histórico inteiro em ordem, limitar
+# às primeiras `quantidade` é limitar o resultado
+    def _posicoes(self, inicio=None, fim=None, quantidade=None):
+        return self._estavel(self._localizar, inicio, fim, quantidade)
+
+    def _localizar(self, inicio, fim, quantidade):
+        quantidade = len(self) if quantidade is None else quantidade
+        de = _para_timestamp(inicio) if inicio is not None else None
+        ate = _para_timestamp(fim, fim_do_dia=True) if fim is not None else None
+
+        if self._ordenado:
+            primeira = min(self._buscar(bisect_left, de), quantidade) if de is not None else 0
+            ultima = min(self._buscar(bisect_right, ate), quantidade) if ate is not None else quantidade
+            return range(primeira, ultima)
+
+        return [
+            inicio_trecho + posicao
+            for inicio_trecho, _, _, datas in self._trechos()
+            for posicao, timestamp in enumerate(datas)
+            if inicio_trecho + posicao < quantidade
+            and (de is None or timestamp >= de) and (ate is None or timestamp <= ate)
+        ]
+
+    def _buscar(self, busca, timestamp):
+        datas = self._datas
+        if datas and (timestamp > datas[0] or (busca is bisect_right and timestamp == datas[0])):
+            return self._base + busca(datas, timestamp)
+
+        # o primeiro segmento que termina depois do momento (ou nele, para bisect_left)
+        for inicio, segmento in zip(*self._camadas):
+            datas = segmento.colunas()[2]
+            if timestamp < datas[-1] or (busca is bisect_left and timestamp == datas[-1]):
+                return inicio + busca(datas, timestamp)
+
+        return self._base
+
+    def saldo_em(self, momento):
+        limite = _para_timestamp(momento, fim_do_dia=True)
+
+        if not self._ordenado:
+            return sum(
+                SINAIS_TRANSACAO[codigo] * valor
+                for _, tipos, valores, datas in self._trechos()
+                for codigo, valor, timestamp in zip(tipos, valores, datas)
+                if timestamp <= limite
+            )
+
+        return self._saldo_ate(self._buscar(bisect_right, limite))
+
+    def _saldo_ate(self, quantidade):
+        intervalos = quantidade // self.INTERVALO_CHECKPOINT
+        inicio = intervalos * self.INTERVALO_CHECKPOINT
+        saldo = self._checkpoints[intervalos - 1] if intervalos else 0
+
+        for posicao, tipos, valores, _ in self._trechos(inicio):
+            restantes = quantidade - posicao
+            if restantes <= 0:
+                break
+            for codigo, valor in zip(tipos[:restantes], valores[:restantes]):
+                saldo += SINAIS_TRANSACAO[codigo] * valor
+
+        return saldo
+
+# como em Historico.verificar, trecho a trecho: os segmentos têm sempre
+# intervalos completos, então cada um fecha no seu último checkpoint
+    def verificar(self, completa=False):
+        intervalo = self.INTERVALO_CHECKPOINT
+        checkpoints, selos = self._checkpoints, self._selos
+        total = len(self)
+
+        for posicao, tipos, valores, datas in self._trechos(0 if completa else self._verificados * intervalo):
+            bloco = posicao // intervalo
+            fim = bloco + len(tipos) // intervalo
+            anterior = max(bloco - 1, 0)
+            ultimo = posicao + len(tipos) == total
+            saldo_final = self._saldo_acumulado if ultimo else checkpoints[fim - 1]
+
+            problema = verificar_colunas(tipos, valores, datas, checkpoints[anterior:fim],
+                                         selos[anterior * TAMANHO_SELO:fim * TAMANHO_SELO], saldo_final, bloco > 0,
+                                         self._cauda if ultimo else None)
+            if problema is not None:
+                return posicao + problema
+
+        self._verificados = len(checkpoints)
+        return None
+
+###############################
+# Função ESCALONAR_HISTORICOS #
+###############################
+#
+# Troca o Historico das contas com mais de `limite_quente` transações por
+# um HistoricoEscalonado, que já grava o excedente em segmentos. Contas
+# com histórico curto continuam com o Historico comum; pode ser chamada
+# de tempos em tempos (ex.: junto com o fim do dia) para escalonar as
+# que cresceram.
+#
+# Args:
+#    contas (iterável de Conta): contas a verificar
+#    diretorio (str): diretório dos segmentos, criado se não existir
+#    limite_quente (int): transações mantidas em memória por conta
+#    dias_quentes (int): dias mantidos em memória (opcional)
+# Retorna:
+#    int: quantidade de contas escalonadas
+#
+
+def escalonar_historicos(contas, diretorio, limite_quente=LIMITE_QUENTE, dias_quentes=None):
+    escalonadas = 0
+
+    for conta in contas:
+        historico = conta._historico
+        if historico is None or isinstance(historico, HistoricoEscalonado) or len(historico) <= limite_quente:
+            continue
+
+        with conta.trava:
+            conta._historico = HistoricoEscalonado.a_partir_de(conta._historico, diretorio, limite_quente,
+                                                                dias_quentes, conta.trava, _prefixo_conta(conta))
+        escalonadas += 1
+
+    return escalonadas
+
+###########################
+# Função LIMPAR_SEGMENTOS #
+###########################
+#
+# Apaga do diretório os segmentos (e temporários de gravações
+# interrompidas) que nenhum histórico das contas usa: os de uma execução
+# anterior, já que o escalonamento não sobrevive a um reinício, e os de
+# contas que não existem mais. Deve receber todas as contas que usam o
+# diretório; chamar ao iniciar, depois de recuperar o banco.
+#
+# Args:
+#    contas (iterável de Conta): todas as contas do banco
+#    diretorio (str): diretório dos segmentos
+# Retorna:
+#    int: quantidade de arquivos apagados
+#
+
+def limpar_segmentos(contas, diretorio):
+    em_uso = {
+        conta._historico._prefixo for conta in contas
+        if isinstance(conta._historico, HistoricoEscalonado) and conta._historico._diretorio == diretorio
+    }
+    return _remover_segmentos(diretorio, lambda prefixo: prefixo not in em_uso)
+
+# apaga os segmentos (e temporários) do diretório cujo prefixo atende ao critério
+def _remover_segmentos(diretorio, criterio):
+    removidos = 0
+
+    for nome in os.listdir(diretorio) if os.path.isdir(diretorio) else ():
+        base = nome[:-len(".tmp")] if nome.endswith(".tmp") else nome
+        if base.endswith(".seg") and criterio(base[:-len(".seg")].rpartition("-")[0]):
+            os.remove(os.path.join(diretorio, nome))
+            removidos += 1
+
+    return removidos
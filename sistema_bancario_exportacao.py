@@ -0,0 +1,305 @@
+# Sistema Bancário em Python - Exportação
+# Descrição: Exporta os históricos das contas para CSV ou JSON Lines,
+#            para conciliação e BI
+#
+# Uso:
+#    python sistema_bancario_exportacao.py --dados DIRETORIO saida.csv [--formato csv|jsonl]
+#                                          [--contas 1,2,3] [--de DD/MM/AAAA] [--ate DD/MM/AAAA]
+#                                          [--tipos Saque,Deposito] [--processos 4]
+#
+# Os dados vêm do journal do diretório (sistema_bancario_journal). Com
+# saída terminada em .gz o arquivo é compactado com gzip. Com
+# --processos N > 1 a saída é um diretório com um arquivo por processo.
+#
+# Cada linha é uma transação: agencia, conta, cpf do titular, data
+# (AAAA-MM-DD HH:MM:SS), tipo, valor e saldo da conta após a transação,
+# ambos em centavos. As linhas são montadas e gravadas em blocos, então
+# a memória usada não depende do tamanho do histórico.
+#
+# O histórico de uma conta é lido em trechos de posições seguidas (cópia
+# das colunas, com o saldo anterior ao trecho); na exportação em
+# paralelo são esses trechos que vão aos processos, por um Pipe, e não
+# as contas (que levariam o cliente e as demais contas dele junto).
+
+import argparse
+import gzip
+import json
+import os
+from datetime import datetime
+from multiprocessing import get_context
+
+import sistema_bancario_journal as journal
+
+from sistema_bancario_poo import CODIGOS_TRANSACAO, SINAIS_TRANSACAO, TIPOS_TRANSACAO
+
+FORMATOS = ("csv", "jsonl")
+CABECALHO_CSV = "agencia,conta,cpf,data,tipo,valor,saldo\n"
+TAMANHO_BLOCO = 100_000
+
+# nomes dos tipos já codificados em JSON, por código
+TIPOS_JSON = tuple(json.dumps(tipo) for tipo in TIPOS_TRANSACAO)
+
+# abre o destino (caminho ou arquivo já aberto) para escrita de texto
+def _abrir_destino(destino, compactar):
+    if hasattr(destino, "write"):
+        return destino, False
+
+    if compactar is None:
+        compactar = destino.endswith(".gz")
+
+    if compactar:
+        return gzip.open(destino, "wt", compresslevel=6, encoding="utf-8", newline=""), True
+
+    return open(destino, "w", encoding="utf-8", newline=""), True
+
+# trechos (agencia, numero, cpf, saldo anterior, tipos, valores, datas)
+# das transações do período, cada um com até `tamanho` posições seguidas;
+# as colunas são copiadas sob a trava da conta
+def _trechos_conta(conta, inicio, fim, tamanho):
+    historico = conta._historico
+    if historico is None or not len(historico):
+        return
+
+    identificacao = (conta.agencia, conta.numero, getattr(conta.cliente, "cpf", ""))
+    posicoes = historico._posicoes(inicio, fim)
+
+    # histórico fora de ordem: posições avulsas, agrupadas nas seguidas
+    sequencias = []
+    if isinstance(posicoes, range):
+        sequencias.append(posicoes)
+    else:
+        for posicao in posicoes:
+            if sequencias and sequencias[-1].stop == posicao:
+                sequencias[-1] = range(sequencias[-1].start, posicao + 1)
+            else:
+                sequencias.append(range(posicao, posicao + 1))
+
+    for sequencia in sequencias:
+        for primeira in range(sequencia.start, sequencia.stop, tamanho):
+            ultima = min(primeira + tamanho, sequencia.stop)
+            with conta.trava:
+                trecho = (historico._saldo_ate(primeira), *historico._colunas(primeira, ultima))
+            yield (*identificacao, *trecho)
+
+# linhas de um trecho, já formatadas; datas repetidas são formatadas uma
+# vez. No JSON Lines todo texto passa por json.dumps: a identificação da
+# conta uma vez por trecho, tipos e datas uma vez por valor distinto
+def _linhas_trecho(agencia, numero, cpf, saldo, tipos, valores, datas, formato, codigos, cache_datas):
+    ultimo_timestamp = data = None
+    if formato == "jsonl":
+        conta = json.dumps({"agencia": agencia, "conta": numero, "cpf": cpf})[:-1]
+
+    for codigo, valor, timestamp in zip(tipos, valores, datas):
+        saldo += SINAIS_TRANSACAO[codigo] * valor
+
+        if codigos is not None and codigo not in codigos:
+            continue
+
+        if timestamp != ultimo_timestamp:
+            ultimo_timestamp = timestamp
+            data = cache_datas.get(timestamp)
+            if data is None:
+                if len(cache_datas) > 10_000:
+                    cache_datas.clear()
+                data = datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
+                data = cache_datas[timestamp] = json.dumps(data) if formato == "jsonl" else data
+
+        if formato == "csv":
+            yield f"{agencia},{numero},{cpf},{data},{TIPOS_TRANSACAO[codigo]},{valor},{saldo}\n"
+        else:
+            yield f'{conta}, "data": {data}, "tipo": {TIPOS_JSON[codigo]}, "valor": {valor}, "saldo": {saldo}}}\n'
+
+# grava os trechos em blocos de `tamanho_bloco` linhas; devolve quantas
+def _gravar_trechos(arquivo, trechos, formato, codigos, cache_datas, tamanho_bloco):
+    exportadas = 0
+    bloco = []
+
+    for trecho in trechos:
+        for linha in _linhas_trecho(*trecho, formato, codigos, cache_datas):
+            bloco.append(linha)
+
+            if len(bloco) >= tamanho_bloco:
+                arquivo.write("".join(bloco))
+                exportadas += len(bloco)
+                bloco.clear()
+
+    arquivo.write("".join(bloco))
+    return exportadas + len(bloco)
+
+##############################
+# Função EXPORTAR_HISTORICOS #
+##############################
+#
+# Grava as transações das contas, conta a conta e em ordem cronológica,
+# em blocos de `tamanho_bloco` linhas
+#
+# Args:
+#    contas (iterável de Conta): contas a exportar
+#    destino (str | arquivo): caminho (.gz = compactado) ou arquivo aberto
+#    formato (str): "csv" ou "jsonl"
+#    inicio, fim (date | datetime): período, como no Historico.extrato
+#    tipos (iterável de str): apenas esses tipos - padrão: todos
+#    compactar (bool): força (ou não) o gzip - padrão: pela extensão
+# Retorna:
+#    int: quantidade de transações exportadas
+#
+
+def exportar_historicos(contas, destino, formato="csv", inicio=None, fim=None, tipos=None, compactar=None,
+                        tamanho_bloco=TAMANHO_BLOCO):
+
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato inválido: {formato!r}")
+
+    codigos = None if tipos is None else {CODIGOS_TRANSACAO[tipo] for tipo in tipos}
+    trechos = (trecho for conta in contas for trecho in _trechos_conta(conta, inicio, fim, tamanho_bloco))
+
+    arquivo, fechar = _abrir_destino(destino, compactar)
+    try:
+        if formato == "csv":
+            arquivo.write(CABECALHO_CSV)
+
+        return _gravar_trechos(arquivo, trechos, formato, codigos, {}, tamanho_bloco)
+
+    finally:
+        if fechar:
+            arquivo.close()
+
+############################
+# Função EXPORTAR_PARALELO #
+############################
+#
+# Divide as contas em `processos` partes de tamanho parecido (em
+# quantidade de transações) e exporta cada parte em um processo, para
+# um arquivo próprio no diretório. Os processos recebem os trechos das
+# contas da sua parte aos poucos, em lotes de até `tamanho_bloco`
+# transações: o Pipe cheio segura a leitura, então a memória em trânsito
+# fica limitada a alguns lotes por processo.
+#
+# Args:
+#    contas (list de Conta): contas a exportar
+#    diretorio (str): diretório de saída, criado se não existir
+#    processos (int): quantidade de processos - padrão: núcleos da máquina
+#    demais: como em exportar_historicos
+# Retorna:
+#    list: tuplas (caminho do arquivo, transações exportadas)
+#
+
+def exportar_paralelo(contas, diretorio, processos=None, formato="csv", inicio=None, fim=None, tipos=None,
+                      compactar=False, tamanho_bloco=TAMANHO_BLOCO):
+
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato inválido: {formato!r}")
+
+    processos = processos or os.cpu_count() or 1
+    os.makedirs(diretorio, exist_ok=True)
+
+    extensao = formato + (".gz" if compactar else "")
+    caminhos = [os.path.join(diretorio, f"extrato-{indice:03d}.{extensao}") for indice in range(processos)]
+
+    # spawn, como nos shards: um processo e um Pipe por arquivo
+    contexto = get_context("spawn")
+    conexoes, processos_exportacao = [], []
+    for caminho in caminhos:
+        conexao, conexao_processo = contexto.Pipe()
+        processo = contexto.Process(target=_exportar_recebidos,
+                                    args=(conexao_processo, caminho, formato, tipos, compactar, tamanho_bloco),
+                                    daemon=True)
+        processo.start()
+        conexao_processo.close()
+        conexoes.append(conexao)
+        processos_exportacao.append(processo)
+
+    try:
+        # maiores históricos primeiro, cada um na parte mais leve até agora
+        pesos = [0] * processos
+        lotes = [[] for _ in range(processos)]
+        tamanhos = [0] * processos
+
+        for conta in sorted(contas, key=lambda conta: -len(conta._historico or ())):
+            menor = pesos.index(min(pesos))
+            pesos[menor] += len(conta._historico or ())
+
+            for trecho in _trechos_conta(conta, inicio, fim, tamanho_bloco):
+                lotes[menor].append(trecho)
+                tamanhos[menor] += len(trecho[4])
+
+                if tamanhos[menor] >= tamanho_bloco:
+                    conexoes[menor].send(lotes[menor])
+                    lotes[menor], tamanhos[menor] = [], 0
+
+        for conexao, lote in zip(conexoes, lotes):
+            if lote:
+                conexao.send(lote)
+            conexao.send(None)
+
+        return [(caminho, conexao.recv()) for caminho, conexao in zip(caminhos, conexoes)]
+
+    finally:
+        for conexao, processo in zip(conexoes, processos_exportacao):
+            conexao.close()
+            processo.join()
+
+# executado nos processos: grava os lotes de trechos recebidos até um
+# lote None e responde a quantidade de transações exportadas
+def _exportar_recebidos(conexao, caminho, formato, tipos, compactar, tamanho_bloco):
+    codigos = None if tipos is None else {CODIGOS_TRANSACAO[tipo] for tipo in tipos}
+    cache_datas = {}
+    exportadas = 0
+
+    arquivo, _ = _abrir_destino(caminho, compactar)
+    with arquivo:
+        if formato == "csv":
+            arquivo.write(CABECALHO_CSV)
+
+        while True:
+            lote = conexao.recv()
+            if lote is None:
+                break
+            exportadas += _gravar_trechos(arquivo, lote, formato, codigos, cache_datas, tamanho_bloco)
+
+    conexao.send(exportadas)
+    conexao.close()
+
+#==================================
+# PROGRAMA PRINCIPAL
+#==================================
+
+def _ler_data(texto):
+    return datetime.strptime(texto, "%d/%m/%Y").date() if texto else None
+
+def main():
+    parser = argparse.ArgumentParser(description="Exportação dos históricos do Sistema Bancário")
+    parser.add_argument("saida", help="arquivo de saída (.gz = compactado), ou diretório com --processos")
+    parser.add_argument("--dados", required=True, help="diretório do journal e dos snapshots")
+    parser.add_argument("--formato", choices=FORMATOS, default="csv")
+    parser.add_argument("--contas", help="números das contas separados por vírgula - padrão: todas")
+    parser.add_argument("--de", help="início do período (DD/MM/AAAA)")
+    parser.add_argument("--ate", help="fim do período, inclusive (DD/MM/AAAA)")
+    parser.add_argument("--tipos", help="tipos separados por vírgula: " + ", ".join(TIPOS_TRANSACAO))
+    parser.add_argument("--processos", type=int, default=1, help="processos em paralelo (um arquivo cada)")
+    parser.add_argument("--gzip", action="store_true", help="compacta os arquivos gerados com --processos")
+    args = parser.parse_args()
+
+    tipos = args.tipos.split(",") if args.tipos else None
+    for tipo in tipos or ():
+        if tipo not in CODIGOS_TRANSACAO:
+            parser.error(f"tipo desconhecido: {tipo}")
+
+    _, contas = journal.recuperar(args.dados)
+
+    if args.contas:
+        numeros = {int(numero) for numero in args.contas.split(",")}
+        contas = [conta for conta in contas if conta.numero in numeros]
+
+    inicio, fim = _ler_data(args.de), _ler_data(args.ate)
+
+    if args.processos > 1:
+        partes = exportar_paralelo(contas, args.saida, args.processos, args.formato, inicio, fim, tipos, args.gzip)
+        total = sum(exportadas for _, exportadas in partes)
+    else:
+        total = exportar_historicos(contas, args.saida, args.formato, inicio, fim, tipos)
+
+    print(f"Transações exportadas: {total}")
+
+if __name__ == "__main__":
+    main()
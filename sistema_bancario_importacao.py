@@ -0,0 +1,181 @@
+# Sistema Bancário em Python - Importação em lote
+# Descrição: Carga de clientes (e contas) a partir de CSV, para a
+#            migração de bases existentes
+#
+# Uso:
+#    python sistema_bancario_importacao.py clientes.csv [--abrir-contas] [--separador ";"]
+#                                          [--dados DIRETORIO] [--rejeitados rejeitados.csv]
+#
+# O CSV tem cabeçalho com as colunas cpf, nome, data_nascimento
+# (DD/MM/AAAA) e endereco, em qualquer ordem; colunas a mais são
+# ignoradas. Com --dados os clientes vão para o journal do diretório
+# (sistema_bancario_journal); sem ele o arquivo só é validado.
+#
+# O arquivo é lido em blocos: os CPFs de cada bloco são normalizados
+# (limpar_cpf) e validados de uma vez (validar_cpfs); cada linha
+# recusada é registrada com o número da linha e o motivo.
+
+import argparse
+import csv
+import time
+from itertools import islice
+
+import sistema_bancario_journal as journal
+
+from sistema_bancario_poo import (ClienteRegistry, abrir_conta, cadastrar_cliente, limpar_cpf, validar_cpfs,
+                                  validar_dados_pessoais)
+
+COLUNAS = ("cpf", "nome", "data_nascimento", "endereco")
+
+#----------------------------------------
+# CLASSE: RelatorioImportacao
+#----------------------------------------
+#
+# - lidas: int - linhas de dados lidas (sem o cabeçalho)
+# - importados: int - clientes criados
+# - contas_abertas: int
+# - rejeicoes: list - tuplas (linha do arquivo, cpf, motivo)
+# - segundos: float - duração da importação
+#
+# + linhas_por_segundo(): float
+#
+
+class RelatorioImportacao:
+    __slots__ = ("lidas", "importados", "contas_abertas", "rejeicoes", "segundos")
+
+    def __init__(self):
+        self.lidas = 0
+        self.importados = 0
+        self.contas_abertas = 0
+        self.rejeicoes = []
+        self.segundos = 0.0
+
+    @property
+    def linhas_por_segundo(self):
+        return self.lidas / self.segundos if self.segundos else 0.0
+
+# quantidade de rejeições por motivo
+    def motivos(self):
+        contagem = {}
+        for _, _, motivo in self.rejeicoes:
+            contagem[motivo] = contagem.get(motivo, 0) + 1
+        return contagem
+
+############################
+# Função IMPORTAR_CLIENTES #
+############################
+#
+# Lê o CSV em blocos e cadastra os clientes válidos (cadastrar_cliente),
+# recusando CPF inválido, CPF já cadastrado (no registro ou antes no
+# próprio arquivo) e dados pessoais inválidos
+#
+# Args:
+#    arquivo: arquivo texto aberto (ou iterável de linhas) com o CSV
+#    clientes (ClienteRegistry): cadastro que recebe os clientes
+#    contas (list): se informada, abre uma conta corrente por cliente
+#                   importado (abrir_conta), numerada em sequência
+#    separador (str): separador de colunas do CSV
+#    tamanho_bloco (int): linhas validadas por vez
+# Retorna:
+#    RelatorioImportacao
+#
+
+def importar_clientes(arquivo, clientes, contas=None, separador=",", tamanho_bloco=50_000):
+    relatorio = RelatorioImportacao()
+    inicio = time.perf_counter()
+
+    leitor = csv.reader(arquivo, delimiter=separador)
+    cabecalho = [coluna.strip().lower() for coluna in next(leitor, [])]
+
+    faltando = [coluna for coluna in COLUNAS if coluna not in cabecalho]
+    if faltando:
+        raise ValueError(f"Colunas ausentes no cabeçalho: {', '.join(faltando)}")
+
+    posicoes = [cabecalho.index(coluna) for coluna in COLUNAS]
+    minimo_colunas = max(posicoes) + 1
+    numero_linha = 1
+
+    while True:
+        bloco = list(islice(leitor, tamanho_bloco))
+        if not bloco:
+            break
+
+        cpfs = [limpar_cpf(linha[posicoes[0]]) if len(linha) >= minimo_colunas else "" for linha in bloco]
+        validos = validar_cpfs(cpfs)
+
+        for linha, cpf, valido in zip(bloco, cpfs, validos):
+            numero_linha += 1
+
+            if len(linha) < minimo_colunas:
+                relatorio.rejeicoes.append((numero_linha, cpf, "Quantidade de colunas inválida"))
+                continue
+
+            if not valido:
+                relatorio.rejeicoes.append((numero_linha, cpf, "CPF inválido"))
+                continue
+
+            _, nome, data_nascimento, endereco = (linha[posicao].strip() for posicao in posicoes)
+
+            erro = validar_dados_pessoais(nome, data_nascimento, endereco)
+            if erro:
+                relatorio.rejeicoes.append((numero_linha, cpf, erro))
+                continue
+
+            cliente = cadastrar_cliente(clientes, cpf, nome, data_nascimento, endereco)
+            if cliente is None:
+                relatorio.rejeicoes.append((numero_linha, cpf, "Cliente já existe"))
+                continue
+
+            relatorio.importados += 1
+
+            if contas is not None:
+                abrir_conta(len(contas) + 1, cliente, contas)
+                relatorio.contas_abertas += 1
+
+        relatorio.lidas += len(bloco)
+
+    relatorio.segundos = time.perf_counter() - inicio
+    return relatorio
+
+#==================================
+# PROGRAMA PRINCIPAL
+#==================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Importação de clientes do Sistema Bancário a partir de CSV")
+    parser.add_argument("arquivo", help="CSV com as colunas cpf, nome, data_nascimento e endereco")
+    parser.add_argument("--abrir-contas", action="store_true", help="abre uma conta corrente por cliente importado")
+    parser.add_argument("--separador", default=",", help="separador de colunas do CSV")
+    parser.add_argument("--dados", help="diretório do journal que recebe os clientes (sem ele, só valida)")
+    parser.add_argument("--rejeitados", help="grava as linhas recusadas (linha, cpf, motivo) neste CSV")
+    args = parser.parse_args()
+
+    persistencia = None
+    if args.dados:
+        clientes, contas, persistencia = journal.abrir(args.dados)
+    else:
+        clientes, contas = ClienteRegistry(), []
+
+    try:
+        with open(args.arquivo, newline="", encoding="utf-8") as arquivo:
+            relatorio = importar_clientes(arquivo, clientes, contas if args.abrir_contas else None, args.separador)
+    finally:
+        if persistencia is not None:
+            journal.fechar(persistencia)
+
+    print(f"Linhas lidas: {relatorio.lidas}")
+    print(f"Clientes importados: {relatorio.importados}")
+    print(f"Contas abertas: {relatorio.contas_abertas}")
+    print(f"Linhas recusadas: {len(relatorio.rejeicoes)}")
+    for motivo, quantidade in sorted(relatorio.motivos().items(), key=lambda item: -item[1]):
+        print(f"    {quantidade:>10}  {motivo}")
+    print(f"Tempo: {relatorio.segundos:.2f} s ({relatorio.linhas_por_segundo:,.0f} linhas/s)")
+
+    if args.rejeitados:
+        with open(args.rejeitados, "w", newline="", encoding="utf-8") as arquivo:
+            escritor = csv.writer(arquivo)
+            escritor.writerow(("linha", "cpf", "motivo"))
+            escritor.writerows(relatorio.rejeicoes)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,389 @@
+# Sistema Bancário em Python - Persistência
+# Descrição: Journal binário append-only (redo log) com group commit e
+#            snapshots periódicos dos clientes, contas e históricos
+#
+# Uso:
+#    python sistema_bancario_journal.py --dados DIRETORIO [--lote-fsync 64] [--intervalo-snapshot 100000]
+#    python sistema_bancario_journal.py --dados DIRETORIO --fim-do-dia [--taxa-juros 0.0003] [--tarifa 0,50]
+#
+# Executa o menu do sistema_bancario_poo com os dados persistidos no
+# diretório informado (recuperados na abertura). Com --fim-do-dia executa
+# apenas o fechamento do dia (processar_fim_do_dia) e grava o resultado.
+#
+# Formato de cada registro do journal:
+#    cabeçalho <BII: tipo do registro, tamanho do conteúdo, crc32 do conteúdo
+#    conteúdo:
+#    - CLIENTE:       cpf, nome, data_nascimento, endereco (textos <H + utf-8)
+#    - CONTA:         <q numero + cpf
+#    - TRANSACAO:     <qBqd numero, código do tipo, valor (centavos), data (epoch)
+#    - TRANSFERENCIA: <qqqd origem, destino, valor (centavos), data (epoch)
+#    - FIM_DO_DIA:    <dI data (epoch), quantidade N + N números <q, N juros <q
+#                     e N tarifas <q (processar_fim_do_dia)
+#
+# A recuperação carrega o último snapshot e reaplica apenas o trecho do
+# journal gravado depois dele. Um registro incompleto no fim do arquivo
+# (queda no meio da escrita) é descartado. As contas são localizadas pelo
+# número gravado no registro, não pela posição na lista.
+#
+# Não é um write-ahead log (apesar do nome do arquivo, journal.wal): o
+# registro é gravado por um ouvinte, depois de a operação já ter sido
+# aplicada ao saldo e ao histórico em memória, e antes de o resultado
+# voltar a quem a chamou. Uma queda perde as operações cujo registro
+# ainda não chegou ao disco: a que estava sendo gravada e, com
+# lote_fsync diferente de 1, as já confirmadas desde o último fsync. Para
+# que cada operação confirmada sobreviva a uma queda, usar lote_fsync=1.
+
+import argparse
+import os
+import pickle
+import struct
+import sys
+import threading
+import zlib
+from array import array
+
+from sistema_bancario_poo import (CODIGOS_TRANSACAO, SINAIS_TRANSACAO, ClienteRegistry, ContaCorrente, PessoaFisica,
+                                  Transferencia, adicionar_ouvinte, exibir_relatorio_roteiro, executar_roteiro,
+                                  formatar_centavos, main as menu_principal, para_centavos, processar_fim_do_dia,
+                                  remover_ouvinte)
+
+ARQUIVO_JOURNAL = "journal.wal"
+ARQUIVO_SNAPSHOT = "snapshot.pkl"
+
+CLIENTE = 1
+CONTA = 2
+TRANSACAO = 3
+TRANSFERENCIA = 4
+FIM_DO_DIA = 5
+
+CABECALHO = struct.Struct("<BII")
+TEXTO = struct.Struct("<H")
+REGISTRO_CONTA = struct.Struct("<q")
+REGISTRO_TRANSACAO = struct.Struct("<qBqd")
+REGISTRO_TRANSFERENCIA = struct.Struct("<qqqd")
+REGISTRO_FIM_DO_DIA = struct.Struct("<dI")
+
+def _codificar_textos(*textos):
+    partes = []
+    for texto in textos:
+        dados = texto.encode()
+        partes.append(TEXTO.pack(len(dados)))
+        partes.append(dados)
+    return b"".join(partes)
+
+def _decodificar_textos(conteudo, inicio=0):
+    textos = []
+    while inicio < len(conteudo):
+        (tamanho,) = TEXTO.unpack_from(conteudo, inicio)
+        inicio += TEXTO.size
+        textos.append(str(conteudo[inicio:inicio + tamanho], "utf-8"))
+        inicio += tamanho
+    return textos
+
+#----------------------------------------
+# CLASSE: Persistencia
+#----------------------------------------
+#
+# Ouvinte de eventos (adicionar_ouvinte) que grava no journal cada
+# cliente criado, conta criada e transação bem-sucedida.
+#
+# Group commit: os registros vão para o arquivo a cada evento, mas o
+# fsync só é feito a cada `lote_fsync` registros (0 = nunca, deixa a
+# cargo do sistema operacional). A cada `intervalo_snapshot` registros
+# um snapshot completo é gravado, assim que o estado em memória bate com
+# o journal: depois do evento, ou, nos eventos de processar_lote (que
+# chegam depois de aplicado o grupo inteiro da conta), no fim do bloco
+# ("lote_processado").
+#
+# O snapshot periódico supõe um único escritor (menu ou servidor
+# asyncio); com várias threads, chamar salvar_snapshot() com o sistema
+# parado.
+#
+# + sincronizar()
+# + salvar_snapshot()
+# + fechar()
+#
+
+class Persistencia:
+    def __init__(self, diretorio, clientes, contas, lote_fsync=64, intervalo_snapshot=100_000):
+        os.makedirs(diretorio, exist_ok=True)
+
+        self._diretorio = diretorio
+        self._clientes = clientes
+        self._contas = contas
+        self._lote_fsync = lote_fsync
+        self._intervalo_snapshot = intervalo_snapshot
+
+        self._arquivo = open(os.path.join(diretorio, ARQUIVO_JOURNAL), "ab")
+        self._pendentes = 0
+        self._desde_snapshot = 0
+        self._snapshot_pendente = False
+        self._trava = threading.Lock()
+
+    def __call__(self, evento, **dados):
+        self._registrar(evento, dados)
+
+        if self._snapshot_pendente and not dados.get("em_lote"):
+            self.salvar_snapshot()
+
+    def _registrar(self, evento, dados):
+        if evento == "transacao":
+            if not dados["resultado"]:
+                return
+
+            conta, transacao = dados["conta"], dados["transacao"]
+            timestamp = dados["data"].timestamp()
+
+            if isinstance(transacao, Transferencia):
+                conteudo = REGISTRO_TRANSFERENCIA.pack(conta.numero, transacao.destino.numero,
+                                                       transacao.valor, timestamp)
+                self._gravar(TRANSFERENCIA, conteudo)
+            else:
+                codigo = CODIGOS_TRANSACAO[transacao.__class__.__name__]
+                conteudo = REGISTRO_TRANSACAO.pack(conta.numero, codigo, transacao.valor, timestamp)
+                self._gravar(TRANSACAO, conteudo)
+
+        elif evento == "cliente_criado":
+            cliente = dados["cliente"]
+            self._gravar(CLIENTE, _codificar_textos(cliente.cpf, cliente.nome,
+                                                    cliente.data_nascimento, cliente.endereco))
+
+        elif evento == "conta_criada":
+            conta = dados["conta"]
+            self._gravar(CONTA, REGISTRO_CONTA.pack(conta.numero) + _codificar_textos(conta.cliente.cpf))
+
+        elif evento == "fim_do_dia":
+            numeros = dados["numeros"]
+            self._gravar(FIM_DO_DIA, REGISTRO_FIM_DO_DIA.pack(dados["data"].timestamp(), len(numeros))
+                         + numeros.tobytes() + dados["juros"].tobytes() + dados["tarifas"].tobytes())
+
+    def _gravar(self, tipo, conteudo):
+        with self._trava:
+            self._arquivo.write(CABECALHO.pack(tipo, len(conteudo), zlib.crc32(conteudo)))
+            self._arquivo.write(conteudo)
+
+            self._pendentes += 1
+            if self._lote_fsync and self._pendentes >= self._lote_fsync:
+                self._sincronizar()
+
+            # só marca: no meio de um lote o journal ainda não tem todo o
+            # grupo que já está aplicado nas contas
+            self._desde_snapshot += 1
+            if self._intervalo_snapshot and self._desde_snapshot >= self._intervalo_snapshot:
+                self._snapshot_pendente = True
+
+#
+# MÉTODO sincronizar
+#
+# Força a gravação em disco (flush + fsync) dos registros pendentes
+#
+
+    def sincronizar(self):
+        with self._trava:
+            self._sincronizar()
+
+    def _sincronizar(self):
+        self._arquivo.flush()
+        os.fsync(self._arquivo.fileno())
+        self._pendentes = 0
+
+#
+# MÉTODO salvar_snapshot
+#
+# Grava clientes, contas (saldos, históricos e contadores) e a posição
+# do journal até onde eles já refletem. O arquivo é escrito em um
+# temporário e renomeado, então um snapshot é sempre completo.
+#
+
+    def salvar_snapshot(self):
+        with self._trava:
+            self._salvar_snapshot()
+
+    def _salvar_snapshot(self):
+        self._sincronizar()
+
+        estado = {
+            "posicao_journal": self._arquivo.tell(),
+            "clientes": list(self._clientes),
+            "contas": self._contas,
+        }
+
+        caminho = os.path.join(self._diretorio, ARQUIVO_SNAPSHOT)
+        temporario = caminho + ".tmp"
+
+        with open(temporario, "wb") as arquivo:
+            pickle.dump(estado, arquivo, protocol=pickle.HIGHEST_PROTOCOL)
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+
+        os.replace(temporario, caminho)
+        self._desde_snapshot = 0
+        self._snapshot_pendente = False
+
+    def fechar(self):
+        with self._trava:
+            self._sincronizar()
+            self._arquivo.close()
+
+####################
+# Função RECUPERAR #
+####################
+#
+# Reconstrói o estado a partir do snapshot + trecho final do journal
+#
+# Args:
+#    diretorio (str): diretório dos dados
+# Retorna:
+#    tuple: (ClienteRegistry, lista de contas)
+#
+
+def recuperar(diretorio):
+    clientes = ClienteRegistry()
+    contas = []
+    posicao = 0
+
+    caminho_snapshot = os.path.join(diretorio, ARQUIVO_SNAPSHOT)
+    if os.path.exists(caminho_snapshot):
+        with open(caminho_snapshot, "rb") as arquivo:
+            estado = pickle.load(arquivo)
+
+        clientes = ClienteRegistry(estado["clientes"])
+        contas = estado["contas"]
+        posicao = estado["posicao_journal"]
+
+    caminho_journal = os.path.join(diretorio, ARQUIVO_JOURNAL)
+    if not os.path.exists(caminho_journal):
+        return clientes, contas
+
+    with open(caminho_journal, "rb") as arquivo:
+        arquivo.seek(posicao)
+        dados = memoryview(arquivo.read())
+
+    valido = _reaplicar(dados, clientes, contas)
+
+    # registro incompleto no fim (queda durante a escrita): descarta
+    if valido < len(dados):
+        with open(caminho_journal, "r+b") as arquivo:
+            arquivo.truncate(posicao + valido)
+
+    return clientes, contas
+
+# reaplica os registros e devolve quantos bytes eram válidos
+def _reaplicar(dados, clientes, contas):
+    inicio = 0
+    tamanho_total = len(dados)
+    unpack_cabecalho = CABECALHO.unpack_from
+    unpack_transacao = REGISTRO_TRANSACAO.unpack_from
+    por_numero = {conta.numero: conta for conta in contas}
+
+    while inicio + CABECALHO.size <= tamanho_total:
+        tipo, tamanho, crc = unpack_cabecalho(dados, inicio)
+        comeco = inicio + CABECALHO.size
+        fim = comeco + tamanho
+
+        if fim > tamanho_total or zlib.crc32(dados[comeco:fim]) != crc:
+            break
+
+        if tipo == TRANSACAO:
+            numero, codigo, valor, timestamp = unpack_transacao(dados, comeco)
+            conta = por_numero[numero]
+            conta._saldo += SINAIS_TRANSACAO[codigo] * valor
+            conta.historico._adicionar_registro(codigo, valor, timestamp)
+
+        elif tipo == TRANSFERENCIA:
+            origem, destino, valor, timestamp = REGISTRO_TRANSFERENCIA.unpack_from(dados, comeco)
+            conta_origem, conta_destino = por_numero[origem], por_numero[destino]
+            conta_origem._saldo -= valor
+            conta_destino._saldo += valor
+            conta_origem.historico._adicionar_registro(CODIGOS_TRANSACAO["TransferenciaEnviada"], valor, timestamp)
+            conta_destino.historico._adicionar_registro(CODIGOS_TRANSACAO["TransferenciaRecebida"], valor, timestamp)
+
+        elif tipo == FIM_DO_DIA:
+            timestamp, quantidade = REGISTRO_FIM_DO_DIA.unpack_from(dados, comeco)
+            colunas = []
+            for coluna in range(3):
+                inicio_coluna = comeco + REGISTRO_FIM_DO_DIA.size + coluna * quantidade * 8
+                valores = array("q")
+                valores.frombytes(dados[inicio_coluna:inicio_coluna + quantidade * 8])
+                colunas.append(valores)
+
+            for numero, juros, tarifa in zip(*colunas):
+                conta = por_numero[numero]
+                conta._saldo += juros - tarifa
+                conta.historico._adicionar_fechamento(juros, tarifa, timestamp)
+
+            for conta in contas:
+                if conta._historico is not None:
+                    conta._historico._zerar_contadores()
+
+        elif tipo == CLIENTE:
+            cpf, nome, data_nascimento, endereco = _decodificar_textos(dados[comeco:fim])
+            clientes.adicionar(PessoaFisica(nome=nome, data_nascimento=data_nascimento, cpf=cpf, endereco=endereco))
+
+        elif tipo == CONTA:
+            (numero,) = REGISTRO_CONTA.unpack_from(dados, comeco)
+            (cpf,) = _decodificar_textos(dados[comeco + REGISTRO_CONTA.size:fim])
+            cliente = clientes.buscar(cpf)
+            conta = ContaCorrente.nova_conta(cliente=cliente, numero=numero)
+            contas.append(conta)
+            por_numero[numero] = conta
+            cliente.adicionar_conta(conta)
+
+        inicio = fim
+
+    return inicio
+
+################
+# Função ABRIR #
+################
+#
+# Recupera o estado do diretório e passa a persistir os novos eventos
+#
+# Retorna:
+#    tuple: (ClienteRegistry, lista de contas, Persistencia)
+#
+
+def abrir(diretorio, lote_fsync=64, intervalo_snapshot=100_000):
+    clientes, contas = recuperar(diretorio)
+
+    persistencia = Persistencia(diretorio, clientes, contas, lote_fsync, intervalo_snapshot)
+    adicionar_ouvinte(persistencia)
+
+    return clientes, contas, persistencia
+
+def fechar(persistencia):
+    remover_ouvinte(persistencia)
+    persistencia.fechar()
+
+#==================================
+# PROGRAMA PRINCIPAL
+#==================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Sistema Bancário com persistência em disco")
+    parser.add_argument("--dados", required=True, help="diretório do journal e dos snapshots")
+    parser.add_argument("--lote-fsync", type=int, default=64, help="registros por fsync (0 = sem fsync)")
+    parser.add_argument("--intervalo-snapshot", type=int, default=100_000, help="registros entre snapshots")
+    parser.add_argument("--fim-do-dia", action="store_true", help="executa o fechamento do dia em vez do menu")
+    parser.add_argument("--taxa-juros", default="0", help="taxa de juros diária do fechamento - ex.: 0.0003")
+    parser.add_argument("--tarifa", default="0", help="tarifa diária por conta do fechamento, em reais")
+    parser.add_argument("--roteiro", help="arquivo de comandos do menu (- = entrada padrão), sem interação")
+    args = parser.parse_args()
+
+    clientes, contas, persistencia = abrir(args.dados, args.lote_fsync, args.intervalo_snapshot)
+
+    try:
+        if args.fim_do_dia:
+            juros, tarifas = processar_fim_do_dia(contas, args.taxa_juros, para_centavos(args.tarifa))
+            print(f"Juros pagos: R$ {formatar_centavos(juros)}")
+            print(f"Tarifas cobradas: R$ {formatar_centavos(tarifas)}")
+        elif args.roteiro:
+            with (sys.stdin if args.roteiro == "-" else open(args.roteiro, encoding="utf-8")) as roteiro:
+                exibir_relatorio_roteiro(executar_roteiro(roteiro, clientes, contas))
+        else:
+            menu_principal(clientes, contas)
+    finally:
+        fechar(persistencia)
+
+if __name__ == "__main__":
+    main()
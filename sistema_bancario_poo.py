@@ -4,11 +4,242 @@
 # Descrição: Atualização do Sistema Bancário criado anteriormente, adicionando POO
 # Parte do desafio do DIO/NTT - Modulo Trabalhando com Coleções em Pyhton
 
+import argparse
+import gc
+import os
+import sys
 import textwrap
 import re
-from datetime import datetime
+import struct
+import threading
+import time
+import unicodedata
+from array import array
+from itertools import islice, takewhile
+from bisect import bisect_left, bisect_right, insort
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from collections import OrderedDict
+from contextlib import redirect_stdout
+from functools import lru_cache
+from hashlib import blake2b
+from heapq import heapify, heappop, heappush
+from operator import attrgetter, index
 from abc import ABC, abstractmethod
 
+# NumPy é opcional: acelera somas e filtros sobre o histórico
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+#----------------------------------------
+# VALORES MONETÁRIOS
+#----------------------------------------
+#
+# Todo valor monetário (saldo, limite, valor das transações) é um int
+# em centavos: aritmética exata e somas em lote sobre arrays int64.
+# A conversão de/para reais só acontece na entrada e na exibição.
+#
+
+########################
+# Função PARA_CENTAVOS #
+########################
+#
+# Converte um valor em reais (texto, float ou Decimal) para centavos,
+# arredondando meio centavo para cima
+#
+# Args:
+#    valor (str | float | Decimal): valor em reais - aceita "10,50"
+# Retorna:
+#    int: valor em centavos
+#
+
+def para_centavos(valor):
+
+    if isinstance(valor, str):
+        valor = valor.strip().replace(",", ".")
+
+    try:
+        reais = Decimal(str(valor))
+    except InvalidOperation:
+        raise ValueError(f"Valor inválido: {valor!r}") from None
+
+    if not reais.is_finite():
+        raise ValueError(f"Valor inválido: {valor!r}")
+
+    return int((reais * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+############################
+# Função FORMATAR_CENTAVOS #
+############################
+#
+# Args:
+#    centavos (int): valor em centavos
+# Retorna:
+#    str: valor em reais com duas casas decimais - ex.: "1234.56"
+#
+
+def formatar_centavos(centavos):
+
+    sinal = "-" if centavos < 0 else ""
+    reais, resto = divmod(abs(centavos), 100)
+
+    return f"{sinal}{reais}.{resto:02d}"
+
+#########################
+# Função SOMAR_CENTAVOS #
+#########################
+#
+# Soma exata de valores em centavos. Com NumPy, arrays int64 (ou
+# array('q')) são somados em lote, sem laço em Python.
+#
+# Args:
+#    valores: array('q'), numpy.ndarray ou iterável de int
+# Retorna:
+#    int: soma em centavos
+#
+
+def somar_centavos(valores):
+
+    if np is not None and isinstance(valores, (array, np.ndarray)):
+        return int(np.asarray(valores, dtype=np.int64).sum())
+
+    return sum(valores)
+
+##########################
+# Função SALDOS_CENTAVOS #
+##########################
+#
+# Extrai os saldos das contas para um array int64 contíguo, base das
+# agregações de fim de dia
+#
+# Args:
+#    contas (iterável de Conta)
+# Retorna:
+#    array('q'): saldos em centavos, na ordem das contas
+#
+
+def saldos_centavos(contas):
+    return array("q", map(attrgetter("_saldo"), contas))
+
+###########################
+# Função TOTALIZAR_SALDOS #
+###########################
+#
+# Soma exata dos saldos de todas as contas, em centavos
+#
+
+def totalizar_saldos(contas):
+    return somar_centavos(saldos_centavos(contas))
+
+#----------------------------------------
+# CLASSE: ResultadoOperacao
+#----------------------------------------
+#
+# Resultado compacto de uma operação (saque, depósito): nada é impresso
+# pelas classes do domínio, quem quiser exibir mensagens registra um
+# ouvinte (adicionar_ouvinte). Avalia como True quando status == OK.
+#
+# - status: int - OK, VALOR_INVALIDO, SALDO_INSUFICIENTE, ...
+# - motivo: str - descrição do status
+# - saldo: int - saldo da conta após a operação, em centavos
+#
+
+OK = 0
+VALOR_INVALIDO = 1
+SALDO_INSUFICIENTE = 2
+LIMITE_EXCEDIDO = 3
+SAQUES_EXCEDIDOS = 4
+CONTA_INEXISTENTE = 5
+TIPO_INVALIDO = 6
+BLOQUEADA = 7
+
+MOTIVOS = (
+    "Operação realizada com sucesso",
+    "Valor inválido, deve ser maior que zero",
+    "Saldo insuficiente",
+    "Valor excede o limite por operação",
+    "Limite de saques diários atingido",
+    "Conta inexistente",
+    "Tipo de transação inválido",
+    "Transação bloqueada por suspeita de fraude",
+)
+
+class ResultadoOperacao:
+    __slots__ = ("status", "saldo")
+
+    def __init__(self, status, saldo):
+        self.status = status
+        self.saldo = saldo
+
+    def __bool__(self):
+        return self.status == OK
+
+    def __repr__(self):
+        return f"ResultadoOperacao(status={self.status}, motivo={self.motivo!r}, saldo={self.saldo})"
+
+    @property
+    def motivo(self):
+        return MOTIVOS[self.status]
+
+#----------------------------------------
+# OUVINTES DE EVENTOS
+#----------------------------------------
+#
+# Ouvintes são chamados como ouvinte(evento, **dados) após cada
+# operação. Sem ouvintes registrados nenhum evento é montado.
+#
+# Eventos:
+# - "transacao": conta, transacao, resultado, data (e em_lote=True nos de
+#   processar_lote, emitidos depois de aplicado o grupo da conta inteiro)
+# - "lote_processado": quantidade - fim de um bloco de processar_lote;
+#   a partir daqui o estado reflete todos os eventos já emitidos
+# - "cliente_criado": cliente
+# - "conta_criada": conta
+# - "fim_do_dia": numeros, juros, tarifas (arrays paralelos), data
+# - "transacao_suspeita": conta, transacao, tipo, motivos, bloqueada, data
+#
+
+_ouvintes = []
+
+def adicionar_ouvinte(ouvinte):
+    _ouvintes.append(ouvinte)
+
+def remover_ouvinte(ouvinte):
+    _ouvintes.remove(ouvinte)
+
+def notificar(evento, **dados):
+    for ouvinte in _ouvintes:
+        ouvinte(evento, **dados)
+
+#----------------------------------------
+# VERIFICADORES DE TRANSAÇÃO
+#----------------------------------------
+#
+# Verificadores são chamados como verificador(conta, transacao, tipo,
+# data) antes de cada Saque, Deposito, Transferencia (tipo
+# "TransferenciaEnviada") e registro de processar_lote, sob a trava da
+# conta e antes de alterar saldo ou histórico. Retornam OK para seguir
+# ou outro status (ex.: BLOQUEADA), que vira o ResultadoOperacao da
+# transação recusada. Sem verificadores registrados nada é chamado.
+#
+
+_verificadores = []
+
+def adicionar_verificador(verificador):
+    _verificadores.append(verificador)
+
+def remover_verificador(verificador):
+    _verificadores.remove(verificador)
+
+def _verificar(conta, transacao, tipo, data):
+    for verificador in _verificadores:
+        status = verificador(conta, transacao, tipo, data)
+        if status != OK:
+            return status
+    return OK
+
 #----------------------------------------
 # CLASSE: Cliente
 #----------------------------------------
@@ -23,12 +254,14 @@ from abc import ABC, abstractmethod
 #
 
 class Cliente:
+  __slots__ = ("endereco", "contas")
+
   def __init__(self, endereco):
     self.endereco = endereco
     self.contas = []
 
   def realizar_transacao(self, conta, transacao):
-    transacao.registrar(conta)
+    return transacao.registrar(conta)
 
   def adicionar_conta(self, conta):
     self.contas.append(conta)
@@ -43,37 +276,115 @@ class Cliente:
 #
 
 class PessoaFisica (Cliente):
+  __slots__ = ("nome", "data_nascimento", "cpf")
+
   def __init__(self, nome, data_nascimento, cpf, endereco):
     super().__init__(endereco)
     self.nome = nome
     self.data_nascimento = data_nascimento
     self.cpf = cpf
 
+#----------------------------------------
+# CLASSE: ClienteRegistry
+#----------------------------------------
+#
+# Cadastro de clientes indexado pelo CPF normalizado (limpar_cpf),
+# substitui a lista de clientes: busca, inclusão e verificação de
+# duplicidade em O(1), independente da quantidade de clientes.
+#
+# - _clientes: dict - cpf -> Cliente
+#
+# + adicionar(cliente: Cliente): bool
+# + buscar(cpf: str): Cliente
+#
+
+class ClienteRegistry:
+    def __init__(self, clientes=()):
+        self._clientes = {}
+
+        for cliente in clientes:
+            self.adicionar(cliente)
+
+    def __len__(self):
+        return len(self._clientes)
+
+    def __iter__(self):
+        return iter(self._clientes.values())
+
+    def __contains__(self, cpf):
+        return limpar_cpf(cpf) in self._clientes
+
+#
+# MÉTODO adicionar
+#
+# Inclui o cliente no cadastro, recusando CPF já existente.
+#
+# Args:
+#    cliente (Cliente): cliente a ser incluído
+# Retorna:
+#    bool: T ou F - incluído ou CPF duplicado
+#
+
+    def adicionar(self, cliente):
+        cpf = limpar_cpf(cliente.cpf)
+
+        if cpf in self._clientes:
+            return False
+
+        self._clientes[cpf] = cliente
+        return True
+
+#
+# MÉTODO buscar
+#
+# Args:
+#    cpf (str): cpf a ser pesquisado, com ou sem pontuação
+# Retorna:
+#    Cliente: cliente encontrado ou None
+#
+
+    def buscar(self, cpf):
+        return self._clientes.get(limpar_cpf(cpf))
+
 #----------------------------------------
 # CLASSE: Conta
 #----------------------------------------
 #
 # UML: 1 Conta - N Historico
 #
-# - saldo: float
+# - saldo: int - centavos
 # - numero: int
-# - agencia: str - senpre 0001
+# - agencia: str - senpre 0001, compartilhada por todas as contas (AGENCIA)
 # - cliente: Cliente
-# - historico: Historico
+# - historico: Historico - criado na primeira movimentação
+# - trava: RLock - protege saldo e histórico no acesso concorrente
 #
-# + saldo(): float
+# Leituras para exibição (extrato, saldo) não precisam da trava: um
+# instantaneo() traz as transações de uma versão do histórico e o saldo
+# da conta lido junto (ver Instantaneo: os dois podem divergir).
+#
+# Atributos em __slots__ (sem __dict__ por instância): com milhões de
+# contas em memória, cada uma custa apenas o necessário.
+#
+# + saldo(): int - centavos
 # + nova_conta(cliente: Cliente, numero: int): Conta
-# + sacar(valor: float): bool
-# + depositar(valor: floar): bool
+# + saldo_em(momento: datetime): int - centavos
+# + instantaneo(): Instantaneo
+# + sacar(valor: int): ResultadoOperacao
+# + depositar(valor: int): ResultadoOperacao
 #
 
 class Conta:
+    __slots__ = ("_saldo", "_numero", "_cliente", "_historico", "_trava")
+
+    AGENCIA = "0001"
+
     def __init__(self, numero, cliente):
         self._saldo = 0
         self._numero = numero
-        self._agencia = "0001"
         self._cliente = cliente
-        self._historico = Historico()
+        self._historico = None
+        self._trava = threading.RLock()
 
     @classmethod
     def nova_conta(cls, cliente, numero):
@@ -89,50 +400,108 @@ class Conta:
 
     @property
     def agencia(self):
-        return self._agencia
+        return self.AGENCIA
 
     @property
     def cliente(self):
         return self._cliente
 
+# o Historico só é criado quando pedido, contas sem movimentação não têm um
     @property
     def historico(self):
+        if self._historico is None:
+            with self._trava:
+                if self._historico is None:
+                    self._historico = Historico()
         return self._historico
 
+    @property
+    def trava(self):
+        return self._trava
+
+# saldo da conta em uma data/hora passada (Historico.saldo_em)
+    def saldo_em(self, momento):
+        return self.historico.saldo_em(momento)
+
+# transações de uma versão e o saldo da conta, lidos sem a trava; conta
+# sem histórico: nenhuma transação e o saldo atual
+    def instantaneo(self):
+        historico = self._historico
+        if historico is None:
+            return Instantaneo(None, 0, self._saldo)
+
+        quantidade, saldo_historico = historico._versao
+        return Instantaneo(historico, quantidade, self._saldo, saldo_historico)
+
+# a trava não é serializável: fica fora do pickle (snapshots) e é recriada
+    def __getstate__(self):
+        return {
+            atributo: getattr(self, atributo)
+            for classe in type(self).__mro__
+            for atributo in getattr(classe, "__slots__", ())
+            if atributo != "_trava"
+        }
+
+    def __setstate__(self, estado):
+        for atributo, valor in estado.items():
+            setattr(self, atributo, valor)
+        self._trava = threading.RLock()
+
 #
 # MÉTODO sacar
 #
 # Realiza saque da conta.
 #
 # Args:
-#    valor (float): valor do saque.
+#    valor (int): valor do saque, em centavos.
 # Retorna:
-#    bool: T ou F, dependendo do sucesso ou não da operação
+#    ResultadoOperacao: status da operação e saldo atualizado
 #
 
     def sacar(self, valor):
 
-      saldo = self.saldo
-      excedeu_saldo = valor > saldo
+      with self._trava:
+        historico = self._historico
+        saques_no_dia = historico.transacoes_do_dia("Saque") if historico is not None else 0
+        status = self._validar_saque(valor, saques_no_dia)
 
-      if excedeu_saldo:
-        print("\n==================================================")
-        print(f"Saldo insuficiente. Seu saldo atual é de R$ {saldo:.2f}.")
-        print("==================================================")
+        if status == OK:
+          self._saldo -= valor
 
-      elif valor > 0:
-        self._saldo -= valor
-        print("\n==================================================")
-        print(f"Saque de R$ {valor:.2f} realizado com sucesso.")
-        print("==================================================")
-        return True
+        return ResultadoOperacao(status, self._saldo)
 
-      else:
-        print("\n==================================================")
-        print("Valor inválido, deve ser maior que zero.")
-        print("==================================================")
+#
+# MÉTODO _validar_saque
+#
+# Regras do saque, sem alterar a conta. Usado pelo sacar e pelo
+# processamento em lote, que controla a quantidade de saques do dia.
+#
+# Args:
+#    valor (int): valor do saque, em centavos.
+#    saques_no_dia (int): saques já realizados no dia
+# Retorna:
+#    int: status (OK, SALDO_INSUFICIENTE, VALOR_INVALIDO, ...)
+#
 
-      return False
+    def _validar_saque(self, valor, saques_no_dia):
+      return self._validar_debito(valor)
+
+#
+# MÉTODO _validar_debito
+#
+# Regras de qualquer débito (saque ou transferência): valor positivo
+# e saldo suficiente
+#
+
+    def _validar_debito(self, valor):
+
+      if valor > self._saldo:
+        return SALDO_INSUFICIENTE
+
+      if valor <= 0:
+        return VALOR_INVALIDO
+
+      return OK
 
 #
 # MÉTODO depositar
@@ -140,185 +509,1695 @@ class Conta:
 # Realiza depósito na conta.
 #
 # Args:
-#    valor (float): valor do depósito.
+#    valor (int): valor do depósito, em centavos.
 # Retorna:
-#    bool: T ou F, dependendo do sucesso ou não da operação
+#    ResultadoOperacao: status da operação e saldo atualizado
 #
 
     def depositar(self, valor):
 
-      if valor > 0:
-        self._saldo += valor
-        print("\n==================================================")
-        print(f"Depósito de R$ {valor:.2f} realizado com sucesso.")
-        print("==================================================")
-
-      else:
-        print("\n==================================================")
-        print("Valor inválido, deve ser maior que zero.")
-        print("==================================================")
-        return False
+      if valor <= 0:
+        return ResultadoOperacao(VALOR_INVALIDO, self._saldo)
 
-      return True
+      with self._trava:
+        self._saldo += valor
+        return ResultadoOperacao(OK, self._saldo)
 
 #----------------------------------------
 # CLASSE: ContaCorrente
 # Estende: Conta
 #----------------------------------------
 #
-# - limite: float - 500
+# - limite: int - 500_00 (centavos)
 # - limite_saques: int - 3
 #
 
-class ContaCorrente (Conta):
-  def __init__(self, numero, cliente, limite=500, limite_saques=3):
-    super().__init__(numero, cliente)
-    self._limite = limite
-    self._limite_saques = limite_saques
+class ContaCorrente (Conta):
+  __slots__ = ("_limite", "_limite_saques")
+
+  def __init__(self, numero, cliente, limite=500_00, limite_saques=3):
+    super().__init__(numero, cliente)
+    self._limite = limite
+    self._limite_saques = limite_saques
+
+  @property
+  def limite(self):
+    return self._limite
+
+  @property
+  def limite_saques(self):
+    return self._limite_saques
+
+# sobrescreve a validação do SACAR, para incluir os limites da conta corrente
+# (o contador diário de saques vem do Historico, sem percorrer as transações)
+  def _validar_saque(self, valor, saques_no_dia):
+
+    excedeu_limite = valor > self._limite                    # T or F
+    excedeu_saques = saques_no_dia >= self._limite_saques    # T or F
+
+    if excedeu_limite:
+      return LIMITE_EXCEDIDO
+
+    if excedeu_saques:
+      return SAQUES_EXCEDIDOS
+
+    # se deu tudo certo, valida as regras do método pai
+    return super()._validar_saque(valor, saques_no_dia)
+
+# método STR, que representa a classe ContaCorrente
+  def __str__(self):
+    return f"""\
+      Agência:\t{self.agencia}
+      C/C:\t\t{self.numero}
+      Titular:\t{self.cliente.nome}
+    """
+
+#----------------------------------------
+# CLASSE: Historico
+#----------------------------------------
+#
+# UML: 1 Conta - N Historico
+#
+# Armazenamento colunar: cada transação ocupa uma posição em três
+# arrays paralelos (tipo, valor em centavos e data em epoch), em vez
+# de um dicionário por transação.
+#
+# - _tipos: array('B') - código do tipo (TIPOS_TRANSACAO)
+# - _valores: array('q') - valor em centavos
+# - _datas: array('d') - data/hora em segundos desde a epoch
+#
+# Como o histórico só recebe transações novas, _datas já é um índice
+# ordenado por tempo: o extrato localiza períodos por busca binária.
+#
+# Checkpoints de saldo: a cada INTERVALO_CHECKPOINT transações o saldo
+# acumulado é guardado em _checkpoints, então o saldo em qualquer data
+# sai de uma busca binária + no máximo INTERVALO_CHECKPOINT transações.
+#
+# Selos: cada intervalo completo recebe um selo (blake2b de 16 bytes) das
+# suas colunas e do checkpoint, encadeado ao selo do intervalo anterior,
+# em _selos. As transações do intervalo ainda incompleto (as mais
+# recentes) são encadeadas uma a uma em _cauda, a partir do último selo.
+# Alterar qualquer transação, checkpoint ou selo já gravado quebra a
+# cadeia a partir daquele ponto; verificar() confere a cadeia, a cauda e
+# as somas a partir do último intervalo já verificado.
+#
+# Versões: as colunas só crescem (uma posição gravada nunca muda), e cada
+# transação publica em _versao a tupla (quantidade, saldo acumulado) com
+# uma única atribuição, depois de gravada. Quem lê essa tupla tem um
+# estado consistente e pode percorrer as primeiras `quantidade` posições
+# sem trava enquanto novas transações são gravadas (instantaneo()).
+#
+# + transacoes(): TransacoesView
+# + instantaneo(): Instantaneo
+# + adicionar_transacao (transacao: Transacao, data: datetime, tipo: str)
+# + transacoes_do_dia (tipo: str, dia: date): int
+# + total (tipo: str): int
+# + totais_por_tipo (): list - (quantidade, centavos) por tipo
+# + filtrar (tipo: str): TransacoesView
+# + extrato (inicio, fim, ultimas, pagina, tamanho_pagina): gerador
+# + saldo_em (momento: datetime): int
+# + selo (): bytes
+# + verificar (completa: bool): int | None
+
+# tipos de transação suportados, o índice é o código gravado no histórico
+# (Juros e Tarifa são lançados pelo processamento de fim do dia)
+TIPOS_TRANSACAO = ("Deposito", "Saque", "TransferenciaEnviada", "TransferenciaRecebida", "Juros", "Tarifa")
+CODIGOS_TRANSACAO = {tipo: codigo for codigo, tipo in enumerate(TIPOS_TRANSACAO)}
+
+# efeito de cada tipo no saldo da conta: crédito (+1) ou débito (-1)
+SINAIS_TRANSACAO = (1, -1, -1, 1, 1, -1)
+CODIGO_JUROS = CODIGOS_TRANSACAO["Juros"]
+CODIGO_TARIFA = CODIGOS_TRANSACAO["Tarifa"]
+
+class Historico:
+  __slots__ = ("_tipos", "_valores", "_datas", "_ordenado", "_saldo_acumulado", "_versao", "_checkpoints", "_selos",
+               "_cauda", "_verificados", "_dia", "_contagem_dia")
+
+  INTERVALO_CHECKPOINT = 256
+
+# colunas das transacoes, versão publicada, checkpoints de saldo (e seus selos) e contadores do dia corrente, por tipo
+  def __init__(self):
+    self._tipos = array("B")
+    self._valores = array("q")
+    self._datas = array("d")
+    self._ordenado = True
+    self._saldo_acumulado = 0
+    self._versao = (0, 0)
+    self._checkpoints = array("q")
+    self._selos = bytearray()
+    self._cauda = b""
+    self._verificados = 0
+    self._dia = None
+    self._contagem_dia = {}
+
+  def __len__(self):
+    return len(self._tipos)
+
+  @property
+  def transacoes(self):
+    return TransacoesView(self)
+
+# estado da última versão publicada, para leitura sem trava
+  def instantaneo(self):
+    quantidade, saldo = self._versao
+    return Instantaneo(self, quantidade, saldo)
+
+# (código, valor, timestamp) da transação na posição; acesso pontual usado
+# pela TransacoesView e pela exportação (subclasses podem guardar as
+# colunas de outra forma, ex.: sistema_bancario_camadas)
+  def _registro(self, posicao):
+    return self._tipos[posicao], self._valores[posicao], self._datas[posicao]
+
+# cópia das colunas entre as posições, para enviar a outro processo
+  def _colunas(self, inicio=0, fim=None):
+    return self._tipos[inicio:fim], self._valores[inicio:fim], self._datas[inicio:fim]
+
+#
+# MÉTODO adicionar_transacao
+#
+# Adiciona a transação às colunas do histórico e atualiza o contador
+# do tipo no dia; ao virar o dia os contadores são zerados. O tipo
+# padrão é o nome da classe da transação.
+#
+# Deve ser chamado com a trava da conta adquirida (Transacao.registrar).
+#
+
+  def adicionar_transacao(self, transacao, data=None, tipo=None):
+    data = data or datetime.now()
+    tipo = tipo or transacao.__class__.__name__
+
+    timestamp = data.timestamp()
+    self._verificar_ordem(timestamp)
+
+    codigo = CODIGOS_TRANSACAO[tipo]
+    self._tipos.append(codigo)
+    self._valores.append(transacao.valor)
+    self._datas.append(timestamp)
+
+    self._acumular(codigo, transacao.valor)
+    self._contar(tipo, data.date(), 1)
+
+#
+# MÉTODO adicionar_lote
+#
+# Adiciona várias transações de uma vez, todas com a mesma data
+#
+# Args:
+#    codigos (array('B')): códigos dos tipos (CODIGOS_TRANSACAO)
+#    valores (array('q')): valores em centavos
+#    data (datetime): data das transações - padrão: agora
+#
+
+  def adicionar_lote(self, codigos, valores, data=None):
+    data = data or datetime.now()
+    timestamp = data.timestamp()
+    self._verificar_ordem(timestamp)
+
+    # valores e datas antes dos tipos: o selo de um intervalo completado
+    # no meio do lote precisa das três colunas
+    self._valores.extend(valores)
+    self._datas.extend(array("d", [timestamp]) * len(codigos))
+
+    for codigo, valor in zip(codigos, valores):
+      self._tipos.append(codigo)
+      self._acumular(codigo, valor)
+
+    dia = data.date()
+    for codigo in set(codigos):
+      self._contar(TIPOS_TRANSACAO[codigo], dia, codigos.count(codigo))
+
+# lançamentos do fim do dia (juros e tarifa, valores zerados são omitidos)
+# e zera os contadores do dia, liberando os limites diários da conta
+  def _adicionar_fechamento(self, juros, tarifa, timestamp):
+    self._verificar_ordem(timestamp)
+
+    if juros:
+      self._tipos.append(CODIGO_JUROS)
+      self._valores.append(juros)
+      self._datas.append(timestamp)
+      self._acumular(CODIGO_JUROS, juros)
+
+    if tarifa:
+      self._tipos.append(CODIGO_TARIFA)
+      self._valores.append(tarifa)
+      self._datas.append(timestamp)
+      self._acumular(CODIGO_TARIFA, tarifa)
+
+    self._dia = None
+    self._contagem_dia = {}
+
+  def _zerar_contadores(self):
+    self._dia = None
+    self._contagem_dia = {}
+
+# grava uma entrada já codificada (reaplicação do journal), sem Transacao
+  def _adicionar_registro(self, codigo, valor, timestamp):
+    self._verificar_ordem(timestamp)
+
+    self._tipos.append(codigo)
+    self._valores.append(valor)
+    self._datas.append(timestamp)
+
+    self._acumular(codigo, valor)
+    self._contar(TIPOS_TRANSACAO[codigo], date.fromtimestamp(timestamp), 1)
+
+# soma a transação (já anexada às colunas) ao saldo acumulado, publica a
+# versão nova (uma única atribuição, lida sem trava pelos instantâneos) e
+# encadeia a transação na cauda; ao completar um intervalo grava o
+# checkpoint e o selo, que passa a ser o começo da cauda
+  def _acumular(self, codigo, valor):
+    self._saldo_acumulado += SINAIS_TRANSACAO[codigo] * valor
+    self._versao = (len(self), self._saldo_acumulado)
+
+    fim = len(self._tipos)
+    if fim % self.INTERVALO_CHECKPOINT == 0:
+      self._checkpoints.append(self._saldo_acumulado)
+
+      inicio = fim - self.INTERVALO_CHECKPOINT
+      selo = _selar_intervalo(self._selos[-TAMANHO_SELO:], self._tipos[inicio:fim],
+                              self._valores[inicio:fim], self._datas[inicio:fim], self._saldo_acumulado)
+      self._selos += selo
+      self._cauda = selo
+    else:
+      self._cauda = _selar_registro(self._cauda, codigo, valor, self._datas[fim - 1])
+
+# uma transação com data anterior à última desfaz a ordenação do índice
+# de tempo; o extrato passa a filtrar o período percorrendo as datas
+  def _verificar_ordem(self, timestamp):
+    if self._datas and timestamp < self._datas[-1]:
+      self._ordenado = False
+
+# atualiza o contador do tipo no dia; ao virar o dia os contadores são zerados
+  def _contar(self, tipo, dia, quantidade):
+
+    # virou o dia: recomeça a contagem
+    if self._dia is None or dia > self._dia:
+      self._dia = dia
+      self._contagem_dia = {}
+
+    # transações de dias anteriores não entram na contagem do dia corrente
+    if dia == self._dia:
+      self._contagem_dia[tipo] = self._contagem_dia.get(tipo, 0) + quantidade
+
+#
+# MÉTODO transacoes_do_dia
+#
+# Quantidade de transações do tipo informado realizadas no dia, em O(1)
+#
+# Args:
+#    tipo (str): nome da transação - "Saque" ou "Deposito"
+#    dia (date): dia da contagem - padrão: hoje
+# Retorna:
+#    int: quantidade de transações
+#
+
+  def transacoes_do_dia(self, tipo, dia=None):
+    dia = dia or date.today()
+
+    if dia != self._dia:
+      return 0
+
+    return self._contagem_dia.get(tipo, 0)
+
+#
+# MÉTODO total
+#
+# Soma dos valores, em centavos, de todas as transações ou só das do
+# tipo informado; usa NumPy sobre os arrays quando disponível
+#
+# Args:
+#    tipo (str): nome da transação - padrão: todas
+# Retorna:
+#    int: soma em centavos
+#
+
+  def total(self, tipo=None):
+    if tipo is None:
+      return somar_centavos(self._valores)
+
+    codigo = CODIGOS_TRANSACAO[tipo]
+
+    if np is not None:
+      valores = np.frombuffer(self._valores, dtype=np.int64)
+      tipos = np.frombuffer(self._tipos, dtype=np.uint8)
+      return int(valores[tipos == codigo].sum())
+
+    return sum(valor for cod, valor in zip(self._tipos, self._valores) if cod == codigo)
+
+# quantidade e soma dos valores de cada tipo, na ordem de TIPOS_TRANSACAO
+  def totais_por_tipo(self):
+    if np is not None:
+      tipos = np.frombuffer(self._tipos, dtype=np.uint8)
+      valores = np.frombuffer(self._valores, dtype=np.int64)
+      quantidades = np.bincount(tipos, minlength=len(TIPOS_TRANSACAO)).tolist()
+      return [(quantidade, int(valores[tipos == codigo].sum()) if quantidade else 0)
+              for codigo, quantidade in enumerate(quantidades)]
+
+    totais = [[0, 0] for _ in TIPOS_TRANSACAO]
+    for codigo, valor in zip(self._tipos, self._valores):
+      totais[codigo][0] += 1
+      totais[codigo][1] += valor
+    return [tuple(total) for total in totais]
+
+#
+# MÉTODO filtrar
+#
+# Args:
+#    tipo (str): nome da transação - "Saque" ou "Deposito"
+# Retorna:
+#    TransacoesView: visão somente com as transações do tipo
+#
+
+  def filtrar(self, tipo):
+    codigo = CODIGOS_TRANSACAO[tipo]
+
+    if np is not None:
+      indices = np.flatnonzero(np.frombuffer(self._tipos, dtype=np.uint8) == codigo)
+    else:
+      indices = [i for i, cod in enumerate(self._tipos) if cod == codigo]
+
+    return TransacoesView(self, indices)
+
+#
+# MÉTODO extrato
+#
+# Gera as transações do período, em ordem cronológica, sem montar o
+# extrato inteiro: o período é localizado por busca binária nas datas,
+# então o custo é proporcional ao que é gerado, não ao histórico.
+#
+# Args:
+#    inicio (date | datetime): início do período - padrão: desde o começo
+#    fim (date | datetime): fim do período, inclusive - padrão: até agora
+#    ultimas (int): apenas as N transações mais recentes do período
+#    pagina (int): página a gerar, a partir de 0
+#    tamanho_pagina (int): transações por página - padrão: todas
+# Retorna:
+#    gerador de dicionários (tipo, valor em centavos, data)
+#
+
+  def extrato(self, inicio=None, fim=None, ultimas=None, pagina=0, tamanho_pagina=None):
+    return _gerar_extrato(self, self._posicoes(inicio, fim), ultimas, pagina, tamanho_pagina)
+
+# posições das transações do período, em ordem, entre as primeiras
+# `quantidade` (padrão: todas): um range localizado por busca binária, ou
+# uma lista se o histórico estiver fora de ordem
+  def _posicoes(self, inicio=None, fim=None, quantidade=None):
+    datas = self._datas
+    quantidade = len(datas) if quantidade is None else quantidade
+    de = _para_timestamp(inicio) if inicio is not None else None
+    ate = _para_timestamp(fim, fim_do_dia=True) if fim is not None else None
+
+    if self._ordenado:
+      primeira = bisect_left(datas, de, 0, quantidade) if de is not None else 0
+      ultima = bisect_right(datas, ate, 0, quantidade) if ate is not None else quantidade
+      return range(primeira, ultima)
+
+    return [
+        posicao for posicao, timestamp in zip(range(quantidade), datas)
+        if (de is None or timestamp >= de) and (ate is None or timestamp <= ate)
+    ]
+
+#
+# MÉTODO saldo_em
+#
+# Saldo da conta em um momento, a partir dos checkpoints: busca binária
+# da última transação até o momento + reaplicação das transações desde
+# o checkpoint anterior a ela.
+#
+# Args:
+#    momento (datetime | date): momento da consulta; uma date vale
+#                               como o fim do dia
+# Retorna:
+#    int: saldo em centavos
+#
+
+  def saldo_em(self, momento):
+    limite = _para_timestamp(momento, fim_do_dia=True)
+
+    # histórico fora de ordem: soma as transações até o momento
+    if not self._ordenado:
+      return sum(
+          SINAIS_TRANSACAO[codigo] * valor
+          for codigo, valor, timestamp in zip(self._tipos, self._valores, self._datas)
+          if timestamp <= limite
+      )
+
+    return self._saldo_ate(bisect_right(self._datas, limite))
+
+# saldo depois das primeiras `quantidade` transações (na ordem de inclusão):
+# checkpoint anterior + no máximo INTERVALO_CHECKPOINT transações
+  def _saldo_ate(self, quantidade):
+    intervalos = quantidade // self.INTERVALO_CHECKPOINT
+    inicio = intervalos * self.INTERVALO_CHECKPOINT
+
+    saldo = self._checkpoints[intervalos - 1] if intervalos else 0
+    for posicao in range(inicio, quantidade):
+      saldo += SINAIS_TRANSACAO[self._tipos[posicao]] * self._valores[posicao]
+
+    return saldo
+
+# selo do último intervalo completo: resume todo o histórico selado até ali
+  def selo(self):
+    return bytes(self._selos[-TAMANHO_SELO:])
+
+#
+# MÉTODO verificar
+#
+# Confere a cadeia de selos, os checkpoints e o saldo acumulado contra
+# as colunas. Por padrão começa no primeiro intervalo ainda não
+# verificado (a cauda, depois do último selo, é sempre conferida de novo).
+#
+# Deve ser chamado com a trava da conta adquirida.
+#
+# Args:
+#    completa (bool): refaz a verificação desde a primeira transação
+# Retorna:
+#    int: posição da primeira transação do trecho inconsistente
+#    None: histórico íntegro
+#
+
+  def verificar(self, completa=False):
+    inicio = 0 if completa else self._verificados
+    posicao = inicio * self.INTERVALO_CHECKPOINT
+
+    # memoryviews: sem cópia das colunas
+    problema = verificar_colunas(
+        memoryview(self._tipos)[posicao:], memoryview(self._valores)[posicao:], memoryview(self._datas)[posicao:],
+        self._checkpoints[max(inicio - 1, 0):], self._selos[max(inicio - 1, 0) * TAMANHO_SELO:],
+        self._saldo_acumulado, inicio > 0, self._cauda)
+
+    if problema is not None:
+      return posicao + problema
+
+    self._verificados = len(self._checkpoints)
+    return None
+
+# transações nas posições, depois de aplicados `ultimas` e a paginação
+def _gerar_extrato(historico, posicoes, ultimas, pagina, tamanho_pagina):
+  if ultimas is not None:
+    posicoes = posicoes[max(0, len(posicoes) - ultimas):]
+
+  if tamanho_pagina is not None:
+    posicoes = posicoes[pagina * tamanho_pagina:(pagina + 1) * tamanho_pagina]
+
+  transacoes = TransacoesView(historico)
+  for posicao in posicoes:
+    yield transacoes[posicao]
+
+# converte date/datetime para epoch; uma date como fim vale até o fim do dia
+def _para_timestamp(valor, fim_do_dia=False):
+  if not isinstance(valor, datetime):
+    valor = datetime.combine(valor, datetime.max.time() if fim_do_dia else datetime.min.time())
+  return valor.timestamp()
+
+TAMANHO_SELO = 16
+
+# selo de um intervalo: blake2b do selo anterior, das colunas e do checkpoint
+def _selar_intervalo(anterior, tipos, valores, datas, saldo):
+    selo = blake2b(anterior, digest_size=TAMANHO_SELO)
+    selo.update(tipos)
+    selo.update(valores)
+    selo.update(datas)
+    selo.update(saldo.to_bytes(8, "little", signed=True))
+    return selo.digest()
+
+REGISTRO_SELO = struct.Struct("<Bqd")
+
+# elo da cauda: blake2b do elo anterior e de uma transação
+def _selar_registro(anterior, codigo, valor, timestamp):
+    return blake2b(anterior + REGISTRO_SELO.pack(codigo, valor, timestamp), digest_size=TAMANHO_SELO).digest()
+
+############################
+# Função VERIFICAR_COLUNAS #
+############################
+#
+# Núcleo da verificação de um Historico, sobre as colunas (ou um trecho
+# delas que comece no início de um intervalo), para rodar também em
+# outro processo (sistema_bancario_auditoria)
+#
+# Args:
+#    tipos, valores, datas: colunas do trecho (arrays ou memoryviews)
+#    checkpoints (array('q')), selos (bytes): dos intervalos do trecho;
+#        com `continuacao`, precedidos pelos do intervalo anterior
+#    saldo_final (int): saldo acumulado guardado no histórico
+#    continuacao (bool): o trecho não começa na primeira transação
+#    cauda (bytes): elo da cauda guardado no histórico, se o trecho vai
+#        até a última transação (None = trecho final não é conferido)
+# Retorna:
+#    int: posição (no trecho) do primeiro intervalo inconsistente
+#    None: trecho íntegro
+#
+
+def verificar_colunas(tipos, valores, datas, checkpoints, selos, saldo_final, continuacao=False, cauda=None):
+    intervalo = Historico.INTERVALO_CHECKPOINT
+    saldo = checkpoints[0] if continuacao else 0
+    anterior = bytes(selos[:TAMANHO_SELO]) if continuacao else b""
+    if continuacao:
+        checkpoints, selos = checkpoints[1:], selos[TAMANHO_SELO:]
+
+    quantidade = len(checkpoints)
+    if len(selos) != quantidade * TAMANHO_SELO or len(tipos) // intervalo != quantidade:
+        return 0
+
+    # somas de cada intervalo e do trecho final, sem selo
+    if np is not None:
+        sinais = np.array(SINAIS_TRANSACAO, dtype=np.int64)
+        movimentos = np.frombuffer(valores, dtype=np.int64) * sinais[np.frombuffer(tipos, dtype=np.uint8)]
+        por_intervalo = movimentos[:quantidade * intervalo].reshape(quantidade, intervalo).sum(axis=1)
+        acumulados = saldo + np.cumsum(por_intervalo)
+        divergentes = np.flatnonzero(acumulados != np.frombuffer(checkpoints, dtype=np.int64))
+        if len(divergentes):
+            return int(divergentes[0]) * intervalo
+        final = (int(acumulados[-1]) if quantidade else saldo) + int(movimentos[quantidade * intervalo:].sum())
+
+    else:
+        final = saldo
+        for posicao, (codigo, valor) in enumerate(zip(tipos, valores)):
+            final += SINAIS_TRANSACAO[codigo] * valor
+            if (posicao + 1) % intervalo == 0 and final != checkpoints[posicao // intervalo]:
+                return posicao + 1 - intervalo
+
+    # cadeia de selos
+    for bloco in range(quantidade):
+        inicio, fim = bloco * intervalo, (bloco + 1) * intervalo
+        selo = _selar_intervalo(anterior, tipos[inicio:fim], valores[inicio:fim], datas[inicio:fim], checkpoints[bloco])
+        if selo != selos[bloco * TAMANHO_SELO:(bloco + 1) * TAMANHO_SELO]:
+            return inicio
+        anterior = selo
+
+    # cauda: transações depois do último intervalo, uma a uma
+    inicio = quantidade * intervalo
+    if cauda is not None:
+        for codigo, valor, timestamp in zip(tipos[inicio:], valores[inicio:], datas[inicio:]):
+            anterior = _selar_registro(anterior, codigo, valor, timestamp)
+        if anterior != cauda:
+            return inicio
+
+    if final != saldo_final:
+        return inicio
+
+    return None
+
+#----------------------------------------
+# CLASSE: TransacoesView
+#----------------------------------------
+#
+# Visão somente leitura das transações de um Historico. Mantém a
+# interface antiga (sequência de dicionários com tipo, valor em centavos
+# e data),
+# montando cada dicionário apenas quando a posição é acessada.
+#
+
+class TransacoesView:
+  __slots__ = ("_historico", "_indices")
+
+  def __init__(self, historico, indices=None):
+    self._historico = historico
+    self._indices = indices
+
+  def __len__(self):
+    if self._indices is None:
+      return len(self._historico)
+    return len(self._indices)
+
+  def __bool__(self):
+    return len(self) > 0
+
+  def __iter__(self):
+    for posicao in range(len(self)):
+      yield self[posicao]
+
+  def __getitem__(self, posicao):
+    if isinstance(posicao, slice):
+      return [self[i] for i in range(*posicao.indices(len(self)))]
+
+    if posicao < 0:
+      posicao += len(self)
+
+    if self._indices is not None:
+      posicao = int(self._indices[posicao])
+
+    codigo, valor, timestamp = self._historico._registro(posicao)
+
+    return {
+        "tipo": TIPOS_TRANSACAO[codigo],
+        "valor": valor,
+        "data": datetime.fromtimestamp(timestamp).strftime("%d/%m/%Y %H:%M:%S"),
+    }
+
+#----------------------------------------
+# CLASSE: Instantaneo
+#----------------------------------------
+#
+# Leitura de uma conta em uma versão do histórico (MVCC): saldo e
+# transações são os das primeiras `quantidade` transações, consistentes
+# entre si, e nada aqui usa a trava da conta. Saques e depósitos
+# continuam sendo gravados durante a leitura sem aparecer nela (nem
+# esperar por ela).
+#
+# A versão é a própria quantidade de transações, que só cresce.
+#
+# O saldo de Conta.instantaneo() é o da conta (_saldo), lido logo depois
+# da versão, e pode divergir da soma das transações (saldo_historico):
+# movimentações feitas direto por Conta.depositar/sacar (sem Transacao)
+# e reservas de transferências entre shards ainda na fase 1 alteram o
+# saldo sem gravar no histórico, e uma transação em andamento pode já
+# estar no saldo e ainda não na versão. Historico.instantaneo(), sem a
+# conta, usa a soma nos dois.
+#
+# - saldo: int - centavos, saldo da conta
+# - saldo_historico: int - centavos, soma das transações da versão
+# - quantidade: int - transações da versão
+#
+# + versao(): int
+# + transacoes(): TransacoesView - só as transações da versão
+# + extrato (inicio, fim, ultimas, pagina, tamanho_pagina): gerador
+#
+
+class Instantaneo:
+  __slots__ = ("saldo", "saldo_historico", "quantidade", "_historico")
+
+  def __init__(self, historico, quantidade, saldo, saldo_historico=None):
+    self._historico = historico
+    self.quantidade = quantidade
+    self.saldo = saldo
+    self.saldo_historico = saldo if saldo_historico is None else saldo_historico
+
+  @property
+  def versao(self):
+    return self.quantidade
+
+  def __len__(self):
+    return self.quantidade
+
+  @property
+  def transacoes(self):
+    return TransacoesView(self._historico, range(self.quantidade))
+
+# como Historico.extrato, limitado às transações da versão
+  def extrato(self, inicio=None, fim=None, ultimas=None, pagina=0, tamanho_pagina=None):
+    if not self.quantidade:
+      return iter(())
+
+    posicoes = self._historico._posicoes(inicio, fim, self.quantidade)
+    return _gerar_extrato(self._historico, posicoes, ultimas, pagina, tamanho_pagina)
+
+#----------------------------------------
+# CLASSE: CacheIdempotencia
+#----------------------------------------
+#
+# Resultados das transações com chave de idempotência, para que a
+# repetição de um pedido (ex.: cliente que reenvia após timeout) devolva
+# o resultado original sem aplicar a transação de novo.
+#
+# LRU limitado a `capacidade` chaves (OrderedDict: busca, inclusão e
+# descarte em O(1)), e cada chave vale por `validade` segundos a partir
+# do primeiro registro. A memória usada é limitada pela capacidade,
+# qualquer que seja a carga.
+#
+# - capacidade: int - 100_000 chaves
+# - validade: float - 86_400 segundos (24 h)
+#
+# + buscar(chave): ResultadoOperacao ou None
+# + guardar(chave, resultado: ResultadoOperacao)
+#
+
+class CacheIdempotencia:
+  def __init__(self, capacidade=100_000, validade=86_400):
+    self.capacidade = capacidade
+    self.validade = validade
+    self._resultados = OrderedDict()
+    self._trava = threading.Lock()
+
+  def __len__(self):
+    return len(self._resultados)
+
+  def buscar(self, chave):
+    with self._trava:
+      registro = self._resultados.get(chave)
+      if registro is None:
+        return None
+
+      expira_em, resultado = registro
+      if expira_em <= time.monotonic():
+        del self._resultados[chave]
+        return None
+
+      self._resultados.move_to_end(chave)
+      return resultado
+
+  def guardar(self, chave, resultado):
+    agora = time.monotonic()
+
+    with self._trava:
+      resultados = self._resultados
+      resultados[chave] = (agora + self.validade, resultado)
+      resultados.move_to_end(chave)
+
+      # descarta as menos usadas além da capacidade e as vencidas no início
+      while len(resultados) > self.capacidade:
+        resultados.popitem(last=False)
+
+      while resultados:
+        expira_em, _ = next(iter(resultados.values()))
+        if expira_em > agora:
+          break
+        resultados.popitem(last=False)
+
+# cache usado por Transacao.registrar; configurar_idempotencia troca os limites
+_idempotencia = CacheIdempotencia()
+
+def configurar_idempotencia(capacidade=100_000, validade=86_400):
+    global _idempotencia
+    _idempotencia = CacheIdempotencia(capacidade, validade)
+    return _idempotencia
+
+#
+# CLASS: <<interface>>Transacao
+#
+# Estende ABC (classe abstrata)
+#
+# Toda transação aceita uma chave de idempotência opcional (ex.:
+# Saque(100_00, chave="pedido-123")): registrar a mesma chave de novo,
+# na mesma conta e com o mesmo tipo de transação, dentro da validade do
+# cache, devolve o ResultadoOperacao original sem alterar saldo nem
+# histórico. A chave no cache inclui agência, conta e tipo: a mesma
+# chave em outra conta (ou em outra operação) é outra transação. Como a
+# conta faz parte da chave, a verificação sob a trava da conta basta
+# para que repetições simultâneas sejam aplicadas uma vez.
+#
+
+class Transacao(ABC):
+  __slots__ = ()
+
+  @property
+  @abstractmethod
+  def valor(self):
+    pass
+
+# chave de idempotência informada pelo cliente (None = sem chave)
+  @property
+  def chave(self):
+    return self._chave
+
+# chave no cache de idempotência: a do cliente restrita à conta e ao tipo
+  def _chave_cache(self, conta):
+    return conta.agencia, conta.numero, type(self).__name__, self._chave
+
+#
+# MÉTODO registrar
+#
+# Recebe a conta
+#
+
+  @classmethod
+  @abstractmethod
+  def registrar(self, conta):
+    pass
+
+#----------------------------------------
+# TRANSAÇÕES COMPARTILHADAS (flyweight)
+#----------------------------------------
+#
+# Saque e Deposito são objetos de valor imutáveis (só guardam o valor):
+# Deposito(100_00) devolve sempre a mesma instância, em vez de criar um
+# objeto por operação. O cache é limitado a LIMITE_TRANSACOES_COMPARTILHADAS
+# valores; além disso as instâncias são criadas normalmente. Transações
+# com chave de idempotência nunca são compartilhadas.
+#
+
+LIMITE_TRANSACOES_COMPARTILHADAS = 4_096
+
+_transacoes_compartilhadas = {}
+
+def _transacao_compartilhada(classe, valor, chave_idempotencia=None):
+    # valor em centavos (int), recusa float para não perder precisão
+    valor = index(valor)
+
+    if chave_idempotencia is not None:
+        transacao = object.__new__(classe)
+        transacao._valor = valor
+        transacao._chave = chave_idempotencia
+        return transacao
+
+    chave = (classe, valor)
+
+    transacao = _transacoes_compartilhadas.get(chave)
+    if transacao is None:
+        transacao = object.__new__(classe)
+        transacao._valor = valor
+        transacao._chave = None
+        if len(_transacoes_compartilhadas) < LIMITE_TRANSACOES_COMPARTILHADAS:
+            _transacoes_compartilhadas[chave] = transacao
+
+    return transacao
+
+#----------------------------------------
+# CLASSE: Saque
+# Estende: Transacao
+#----------------------------------------
+#
+
+class Saque(Transacao):
+  __slots__ = ("_valor", "_chave")
+
+  def __new__(cls, valor, chave=None):
+    return _transacao_compartilhada(cls, valor, chave)
+
+  @property
+  def valor(self):
+    return self._valor
+
+  def registrar(self, conta):
+
+    # operação e histórico sob a mesma trava: atômicos entre threads
+    with conta.trava:
+
+      # repetição de uma chave já registrada: devolve o resultado original
+      chave = self._chave_cache(conta) if self._chave is not None else None
+      if chave is not None:
+        anterior = _idempotencia.buscar(chave)
+        if anterior is not None:
+          return anterior
+
+      data = datetime.now()
+      status = _verificar(conta, self, "Saque", data) if _verificadores else OK
+
+      if status == OK:
+        resultado_operacao = conta.sacar(self.valor)
+      else:
+        resultado_operacao = ResultadoOperacao(status, conta._saldo)
+
+# se retornou TRUE - operação bem-sucedida
+      if resultado_operacao:
+        conta.historico.adicionar_transacao(self, data)
+
+      if chave is not None:
+        _idempotencia.guardar(chave, resultado_operacao)
+
+      if _ouvintes:
+        notificar("transacao", conta=conta, transacao=self, resultado=resultado_operacao, data=data)
+
+    return resultado_operacao
+
+#----------------------------------------
+# CLASSE: Deposito
+# Estende: Transacao
+#----------------------------------------
+#
+
+class Deposito(Transacao):
+  __slots__ = ("_valor", "_chave")
+
+  def __new__(cls, valor, chave=None):
+    return _transacao_compartilhada(cls, valor, chave)
+
+  @property
+  def valor(self):
+    return self._valor
+
+  def registrar(self, conta):
+
+    # operação e histórico sob a mesma trava: atômicos entre threads
+    with conta.trava:
+
+      # repetição de uma chave já registrada: devolve o resultado original
+      chave = self._chave_cache(conta) if self._chave is not None else None
+      if chave is not None:
+        anterior = _idempotencia.buscar(chave)
+        if anterior is not None:
+          return anterior
+
+      data = datetime.now()
+      status = _verificar(conta, self, "Deposito", data) if _verificadores else OK
+
+      if status == OK:
+        resultado_operacao = conta.depositar(self.valor)
+      else:
+        resultado_operacao = ResultadoOperacao(status, conta._saldo)
+
+#se retornou TRUE - operação bem-sucedida
+      if resultado_operacao:
+        conta.historico.adicionar_transacao(self, data)
+
+      if chave is not None:
+        _idempotencia.guardar(chave, resultado_operacao)
+
+      if _ouvintes:
+        notificar("transacao", conta=conta, transacao=self, resultado=resultado_operacao, data=data)
+
+    return resultado_operacao
+
+#----------------------------------------
+# CLASSE: Transferencia
+# Estende: Transacao
+#----------------------------------------
+#
+# Debita a conta de origem (registrar) e credita a conta destino de
+# forma atômica. As travas das duas contas são adquiridas sempre na
+# ordem do número da conta, o que impede deadlock entre transferências
+# cruzadas (A -> B e B -> A ao mesmo tempo).
+#
+# - valor: int - centavos
+# - destino: Conta
+# - chave: chave de idempotência (opcional)
+#
+
+class Transferencia(Transacao):
+  __slots__ = ("_valor", "_destino", "_chave")
+
+  def __init__(self, valor, destino, chave=None):
+    self._valor = index(valor)
+    self._destino = destino
+    self._chave = chave
+
+  @property
+  def valor(self):
+    return self._valor
+
+  @property
+  def destino(self):
+    return self._destino
+
+  def registrar(self, conta):
+    destino = self._destino
+    primeira, segunda = sorted((conta, destino), key=lambda c: (c.numero, id(c)))
+
+    with primeira.trava, segunda.trava:
+      chave = self._chave_cache(conta) if self._chave is not None else None
+      if chave is not None:
+        anterior = _idempotencia.buscar(chave)
+        if anterior is not None:
+          return anterior
+
+      data = datetime.now()
+      status = _verificar(conta, self, "TransferenciaEnviada", data) if _verificadores else OK
+      if status == OK:
+        status = conta._validar_debito(self.valor)
+
+      if status == OK:
+        conta._saldo -= self.valor
+        destino._saldo += self.valor
+        conta.historico.adicionar_transacao(self, data, "TransferenciaEnviada")
+        destino.historico.adicionar_transacao(self, data, "TransferenciaRecebida")
+
+      resultado_operacao = ResultadoOperacao(status, conta._saldo)
+
+      if chave is not None:
+        _idempotencia.guardar(chave, resultado_operacao)
+
+      if _ouvintes:
+        notificar("transacao", conta=conta, transacao=self, resultado=resultado_operacao, data=data)
+
+    return resultado_operacao
+
+
+#----------------------------------------
+# CLASSE: _ListaOrdenada
+#----------------------------------------
+#
+# Lista ordenada em blocos de até 2 * CARGA itens: inclusão e remoção
+# movem só o bloco afetado (em vez da lista inteira), o que mantém
+# baratas as atualizações de um índice com milhões de entradas.
+#
+# + adicionar(item)
+# + remover(item)
+# + a_partir_de(chave): gerador dos itens >= chave, em ordem
+#
+
+class _ListaOrdenada:
+  __slots__ = ("_blocos", "_maximos", "_tamanho")
+
+  CARGA = 512
+
+  def __init__(self, itens=()):
+    itens = sorted(itens)
+    self._blocos = [itens[inicio:inicio + self.CARGA] for inicio in range(0, len(itens), self.CARGA)]
+    self._maximos = [bloco[-1] for bloco in self._blocos]
+    self._tamanho = len(itens)
+
+  def __len__(self):
+    return self._tamanho
+
+  def adicionar(self, item):
+    self._tamanho += 1
+
+    if not self._blocos:
+      self._blocos.append([item])
+      self._maximos.append(item)
+      return
+
+    posicao = min(bisect_left(self._maximos, item), len(self._blocos) - 1)
+    bloco = self._blocos[posicao]
+    insort(bloco, item)
+    self._maximos[posicao] = bloco[-1]
+
+    # bloco cheio: divide ao meio
+    if len(bloco) > 2 * self.CARGA:
+      self._blocos[posicao:posicao + 1] = [bloco[:self.CARGA], bloco[self.CARGA:]]
+      self._maximos[posicao:posicao + 1] = [bloco[self.CARGA - 1], bloco[-1]]
+
+  def remover(self, item):
+    posicao = bisect_left(self._maximos, item)
+    bloco = self._blocos[posicao]
+    del bloco[bisect_left(bloco, item)]
+    self._tamanho -= 1
+
+    if bloco:
+      self._maximos[posicao] = bloco[-1]
+    else:
+      del self._blocos[posicao]
+      del self._maximos[posicao]
+
+  def a_partir_de(self, chave):
+    posicao = bisect_left(self._maximos, chave)
+    if posicao == len(self._blocos):
+      return
+
+    bloco = self._blocos[posicao]
+    yield from islice(bloco, bisect_left(bloco, chave), None)
+
+    for bloco in self._blocos[posicao + 1:]:
+      yield from bloco
+
+#----------------------------------------
+# CLASSE: IndiceContas
+#----------------------------------------
+#
+# Índices secundários das contas, para consultas do atendimento:
+#
+# - por agência e número: dicionário agencia -> numero -> Conta
+# - por nome do titular: lista ordenada (nome normalizado, agencia,
+#   numero), consultada por prefixo
+# - por saldo: lista ordenada (saldo, agencia, numero), consultada por
+#   faixa
+#
+# É um ouvinte (adicionar_ouvinte): contas criadas, transações
+# bem-sucedidas e o fechamento do dia atualizam os índices. O saldo de
+# cada conta é reindexado (sai o valor anterior, entra o atual) a cada
+# evento, sem reordenar o restante. Alterações de saldo fora dos
+# eventos (ex.: Conta.depositar direto) pedem atualizar_saldo.
+#
+# As consultas devolvem uma página (pagina, tamanho_pagina), como o
+# Historico.extrato, sem percorrer nem formatar as demais contas.
+#
+# + adicionar(conta: Conta)
+# + atualizar_saldo(conta: Conta)
+# + buscar(numero: int, agencia: str): Conta
+# + por_agencia(agencia: str, pagina, tamanho_pagina): list
+# + por_nome(prefixo: str, pagina, tamanho_pagina): list
+# + por_saldo(minimo: int, maximo: int, pagina, tamanho_pagina): list
+#
+
+class IndiceContas:
+  def __init__(self, contas=()):
+    self._agencias = {}
+    self._saldos = {}
+    self._trava = threading.Lock()
+
+    nomes, saldos = [], []
+    for conta in contas:
+      chave = (conta.agencia, conta.numero)
+      self._agencias.setdefault(conta.agencia, {})[conta.numero] = conta
+      self._saldos[chave] = conta._saldo
+      nomes.append((_normalizar_nome(conta), *chave))
+      saldos.append((conta._saldo, *chave))
+
+    self._nomes = _ListaOrdenada(nomes)
+    self._por_saldo = _ListaOrdenada(saldos)
+
+  def __len__(self):
+    return len(self._saldos)
+
+  def __call__(self, evento, **dados):
+    if evento == "transacao":
+      if dados["resultado"]:
+        self.atualizar_saldo(dados["conta"])
+        if isinstance(dados["transacao"], Transferencia):
+          self.atualizar_saldo(dados["transacao"].destino)
+
+    elif evento == "conta_criada":
+      self.adicionar(dados["conta"])
+
+    elif evento == "fim_do_dia":
+      for numero in dados["numeros"]:
+        conta = self.buscar(numero)
+        if conta is not None:
+          self.atualizar_saldo(conta)
+
+  def adicionar(self, conta):
+    chave = (conta.agencia, conta.numero)
+
+    with self._trava:
+      if chave in self._saldos:
+        return
+
+      self._agencias.setdefault(conta.agencia, {})[conta.numero] = conta
+      self._saldos[chave] = conta._saldo
+      self._nomes.adicionar((_normalizar_nome(conta), *chave))
+      self._por_saldo.adicionar((conta._saldo, *chave))
+
+  def atualizar_saldo(self, conta):
+    chave = (conta.agencia, conta.numero)
+
+    with self._trava:
+      anterior = self._saldos.get(chave)
+      saldo = conta._saldo
+
+      if anterior is None or anterior == saldo:
+        return
+
+      self._por_saldo.remover((anterior, *chave))
+      self._por_saldo.adicionar((saldo, *chave))
+      self._saldos[chave] = saldo
+
+  def buscar(self, numero, agencia=Conta.AGENCIA):
+    return self._agencias.get(agencia, {}).get(numero)
+
+  def por_agencia(self, agencia, pagina=0, tamanho_pagina=None):
+    with self._trava:
+      return self._pagina(self._agencias.get(agencia, {}).values(), pagina, tamanho_pagina)
+
+#
+# MÉTODO por_nome
+#
+# Contas cujo titular tem o nome iniciado pelo prefixo, em ordem
+# alfabética; maiúsculas e acentos não importam ("joao" acha "João")
+#
+
+  def por_nome(self, prefixo, pagina=0, tamanho_pagina=None):
+    prefixo = _normalizar_texto(prefixo)
+
+    with self._trava:
+      entradas = takewhile(lambda entrada: entrada[0].startswith(prefixo), self._nomes.a_partir_de((prefixo,)))
+      return self._pagina(self._contas_das(entradas), pagina, tamanho_pagina)
+
+#
+# MÉTODO por_saldo
+#
+# Contas com saldo entre minimo e maximo (inclusive, em centavos), do
+# menor para o maior saldo; sem minimo/maximo a faixa fica aberta
+#
+
+  def por_saldo(self, minimo=None, maximo=None, pagina=0, tamanho_pagina=None):
+    with self._trava:
+      entradas = self._por_saldo.a_partir_de((minimo,) if minimo is not None else ())
+      if maximo is not None:
+        entradas = takewhile(lambda entrada: entrada[0] <= maximo, entradas)
+      return self._pagina(self._contas_das(entradas), pagina, tamanho_pagina)
+
+  def _contas_das(self, entradas):
+    for _, agencia, numero in entradas:
+      yield self._agencias[agencia][numero]
+
+  @staticmethod
+  def _pagina(contas, pagina, tamanho_pagina):
+    if tamanho_pagina is None:
+      return list(contas)
+    return list(islice(contas, pagina * tamanho_pagina, (pagina + 1) * tamanho_pagina))
+
+#----------------------------------------
+# CLASSE: AgregadosContas
+#----------------------------------------
+#
+# Agregados gerenciais mantidos a cada evento, sem percorrer as contas
+# na leitura:
+#
+# - por agência e no total: quantidade de contas, soma dos saldos e,
+#   por tipo de transação, quantidade e volume (centavos)
+# - maiores saldos: heap (heapq) de (-saldo, agencia, numero). Cada
+#   alteração de saldo empilha uma entrada nova e a anterior fica
+#   obsoleta; a leitura descarta as obsoletas que encontrar e o heap é
+#   reconstruído quando elas passam do dobro das contas.
+#
+# É um ouvinte (adicionar_ouvinte), como o IndiceContas. Os volumes de
+# contas já existentes vêm dos seus históricos na criação.
+#
+# + adicionar(conta: Conta)
+# + atualizar_saldo(conta: Conta)
+# + quantidade_contas(agencia: str): int
+# + total_saldos(agencia: str): int - centavos
+# + volumes(agencia: str): dict - tipo -> (quantidade, centavos)
+# + maiores_saldos(quantidade: int): list de Conta
+#
+
+class AgregadosContas:
+  def __init__(self, contas=()):
+    self._contas = {}
+    self._saldos = {}
+    self._heap = []
+    self._trava = threading.Lock()
+
+    # por agência (e None = todas): [contas, soma dos saldos, quantidades por tipo, volumes por tipo]
+    self._agregados = {None: self._novo_agregado()}
+
+    for conta in contas:
+      self._incluir(conta)
+
+      if conta._historico is not None:
+        for codigo, (quantidade, volume) in enumerate(conta._historico.totais_por_tipo()):
+          self._somar_volume(conta.agencia, codigo, quantidade, volume)
+
+    self._heap = [(-saldo, *chave) for chave, saldo in self._saldos.items()]
+    heapify(self._heap)
+
+  @staticmethod
+  def _novo_agregado():
+    return [0, 0, [0] * len(TIPOS_TRANSACAO), [0] * len(TIPOS_TRANSACAO)]
+
+  def __call__(self, evento, **dados):
+    if evento == "transacao":
+      if not dados["resultado"]:
+        return
+
+      conta, transacao = dados["conta"], dados["transacao"]
+
+      with self._trava:
+        if isinstance(transacao, Transferencia):
+          self._somar_volume(conta.agencia, CODIGOS_TRANSACAO["TransferenciaEnviada"], 1, transacao.valor)
+          self._somar_volume(transacao.destino.agencia, CODIGOS_TRANSACAO["TransferenciaRecebida"], 1,
+                             transacao.valor)
+          self._atualizar_saldo(transacao.destino)
+        else:
+          self._somar_volume(conta.agencia, CODIGOS_TRANSACAO[transacao.__class__.__name__], 1, transacao.valor)
+
+        self._atualizar_saldo(conta)
+
+    elif evento == "conta_criada":
+      self.adicionar(dados["conta"])
+
+    elif evento == "fim_do_dia":
+      with self._trava:
+        for numero, juros, tarifa in zip(dados["numeros"], dados["juros"], dados["tarifas"]):
+          conta = self._contas.get((Conta.AGENCIA, numero))
+          if conta is None:
+            continue
+
+          if juros:
+            self._somar_volume(conta.agencia, CODIGO_JUROS, 1, juros)
+          if tarifa:
+            self._somar_volume(conta.agencia, CODIGO_TARIFA, 1, tarifa)
+          self._atualizar_saldo(conta)
+
+  def adicionar(self, conta):
+    with self._trava:
+      if (conta.agencia, conta.numero) not in self._saldos:
+        self._incluir(conta)
+        heappush(self._heap, (-conta._saldo, conta.agencia, conta.numero))
+
+  def atualizar_saldo(self, conta):
+    with self._trava:
+      self._atualizar_saldo(conta)
+
+# inclui a conta nos totais (sem a entrada do heap)
+  def _incluir(self, conta):
+    chave = (conta.agencia, conta.numero)
+    saldo = conta._saldo
+
+    self._contas[chave] = conta
+    self._saldos[chave] = saldo
+
+    for agregado in (self._agregados[None], self._agregado(conta.agencia)):
+      agregado[0] += 1
+      agregado[1] += saldo
+
+  def _agregado(self, agencia):
+    agregado = self._agregados.get(agencia)
+    if agregado is None:
+      agregado = self._agregados[agencia] = self._novo_agregado()
+    return agregado
+
+  def _somar_volume(self, agencia, codigo, quantidade, volume):
+    for agregado in (self._agregados[None], self._agregado(agencia)):
+      agregado[2][codigo] += quantidade
+      agregado[3][codigo] += volume
+
+  def _atualizar_saldo(self, conta):
+    chave = (conta.agencia, conta.numero)
+    anterior = self._saldos.get(chave)
+    saldo = conta._saldo
+
+    if anterior is None or anterior == saldo:
+      return
+
+    self._saldos[chave] = saldo
+    for agregado in (self._agregados[None], self._agregados[conta.agencia]):
+      agregado[1] += saldo - anterior
+
+    heappush(self._heap, (-saldo, *chave))
+
+    # entradas obsoletas demais: reconstrói o heap só com as atuais
+    if len(self._heap) > 2 * len(self._saldos) + 1_024:
+      self._heap = [(-saldo, *chave) for chave, saldo in self._saldos.items()]
+      heapify(self._heap)
+
+  def quantidade_contas(self, agencia=None):
+    agregado = self._agregados.get(agencia)
+    return agregado[0] if agregado else 0
+
+  def total_saldos(self, agencia=None):
+    agregado = self._agregados.get(agencia)
+    return agregado[1] if agregado else 0
+
+  def volumes(self, agencia=None):
+    agregado = self._agregados.get(agencia) or self._novo_agregado()
+    return {tipo: (agregado[2][codigo], agregado[3][codigo]) for codigo, tipo in enumerate(TIPOS_TRANSACAO)}
+
+#
+# MÉTODO maiores_saldos
+#
+# Contas com os maiores saldos, do maior para o menor (empate: menor
+# agência/número primeiro). Retira do heap as entradas atuais e as
+# devolve; as obsoletas encontradas no caminho são descartadas.
+#
+# Args:
+#    quantidade (int): tamanho do ranking - padrão: 100
+# Retorna:
+#    list: contas
+#
+
+  def maiores_saldos(self, quantidade=100):
+    with self._trava:
+      heap, saldos = self._heap, self._saldos
+      atuais = []
+      vistas = set()
+
+      while heap and len(atuais) < quantidade:
+        entrada = heappop(heap)
+        chave = entrada[1:]
+
+        if saldos.get(chave) == -entrada[0] and chave not in vistas:
+          atuais.append(entrada)
+          vistas.add(chave)
+
+      for entrada in atuais:
+        heappush(heap, entrada)
+
+      return [self._contas[entrada[1:]] for entrada in atuais]
+
+# nome do titular sem acentos e em minúsculas, chave do índice por nome
+def _normalizar_nome(conta):
+  return _normalizar_texto(getattr(conta.cliente, "nome", ""))
+
+def _normalizar_texto(texto):
+  decomposto = unicodedata.normalize("NFKD", texto.strip())
+  return "".join(caractere for caractere in decomposto if not unicodedata.combining(caractere)).casefold()
+
+#########################
+# Função PROCESSAR_LOTE #
+#########################
+#
+# Aplica um fluxo de registros (numero da conta, tipo, valor) em blocos:
+# dentro de cada bloco os registros são agrupados por conta e aplicados
+# na ordem de chegada, com as mesmas regras de ContaCorrente.sacar (e
+# os verificadores registrados), e o histórico de cada conta recebe as
+# transações aceitas de uma só vez. Apenas um bloco fica em memória,
+# qualquer que seja o tamanho da entrada. Um valor que não é inteiro
+# recusa só o seu registro (VALOR_INVALIDO).
+#
+# Args:
+#    registros (iterável): tuplas (numero, tipo, valor) - tipo "Saque"
+#                          ou "Deposito", valor em centavos
+#    contas (dict): numero -> Conta (uma lista de contas também é aceita)
+#    tamanho_bloco (int): registros por bloco
+# Retorna:
+#    gerador de ResultadoOperacao, um por registro, na ordem da entrada
+#
+
+def processar_lote(registros, contas, tamanho_bloco=10_000):
+
+    if not hasattr(contas, "get"):
+        contas = {conta.numero: conta for conta in contas}
+
+    registros = iter(registros)
+
+    while True:
+        bloco = list(islice(registros, tamanho_bloco))
+        if not bloco:
+            return
+
+        resultados = [None] * len(bloco)
+        data = datetime.now()
+
+        # agrupa as posições do bloco por conta, preservando a ordem
+        grupos = {}
+        for posicao, (numero, tipo, valor) in enumerate(bloco):
+            grupos.setdefault(numero, []).append(posicao)
+
+        for numero, posicoes in grupos.items():
+            conta = contas.get(numero)
+
+            if conta is None:
+                for posicao in posicoes:
+                    resultados[posicao] = ResultadoOperacao(CONTA_INEXISTENTE, 0)
+                continue
+
+            # a conta fica travada enquanto o seu grupo é aplicado
+            with conta.trava:
+                _aplicar_grupo(conta, bloco, posicoes, resultados, data)
+
+        if _ouvintes:
+            notificar("lote_processado", quantidade=len(bloco))
+
+        yield from resultados
 
-# sobrescreve o método SACAR, para fazer validações
-  def sacar(self, valor):
+# aplica, em ordem, os registros de uma conta e grava o histórico de uma vez
+def _aplicar_grupo(conta, bloco, posicoes, resultados, data):
 
-    # percorre o Historico (transacoes) para contar os que sejam do tipo "Saque"
-    cont_saques = 0
-    for transacao in self.historico.transacoes:
-        if transacao["tipo"] == "Saque":
-            cont_saques += 1
+    codigos = array("B")
+    valores = array("q")
+    convertidos = []
+    historico = conta._historico
+    saques_no_dia = historico.transacoes_do_dia("Saque", data.date()) if historico is not None else 0
 
-    excedeu_limite = valor > self._limite                  # T or F
-    excedeu_saques = cont_saques >= self._limite_saques    # T or F
+    for posicao in posicoes:
+        _, tipo, valor = bloco[posicao]
 
-    if excedeu_limite:
-      print("\n==================================================")
-      print("O valor do saque excede o limite máximo por operação, que é de R$ 500.")
-      print("==================================================")
+        # valor que não é inteiro (centavos) recusa só o registro: os
+        # anteriores do grupo já alteraram o saldo e vão para o histórico
+        try:
+            valor = index(valor)
+        except TypeError:
+            convertidos.append(None)
+            resultados[posicao] = ResultadoOperacao(VALOR_INVALIDO, conta._saldo)
+            continue
 
-    elif excedeu_saques:
-      print("\n==================================================")
-      print("Você atingiu o limite máximo de 3 saques diários.")
-      print("==================================================")
+        convertidos.append(valor)
 
-    # se deu tudo certo, chama o método pai SACAR
-    else:
-      return super().sacar(valor)
+        if _verificadores and (tipo == "Saque" or tipo == "Deposito"):
+            transacao = Saque(valor) if tipo == "Saque" else Deposito(valor)
+            status = _verificar(conta, transacao, tipo, data)
+            if status != OK:
+                resultados[posicao] = ResultadoOperacao(status, conta._saldo)
+                continue
 
-    # se não entrou no else, siginifica que entrou em alguma das excessÕes acima
-    return False
+        if tipo == "Saque":
+            status = conta._validar_saque(valor, saques_no_dia)
+            if status == OK:
+                conta._saldo -= valor
+                saques_no_dia += 1
 
-# método STR, que representa a classe ContaCorrente
-  def __str__(self):
-    return f"""\
-      Agência:\t{self.agencia}
-      C/C:\t\t{self.numero}
-      Titular:\t{self.cliente.nome}
-    """
+        elif tipo == "Deposito":
+            status = OK if valor > 0 else VALOR_INVALIDO
+            if status == OK:
+                conta._saldo += valor
 
-#----------------------------------------
-# CLASSE: Historico
-#----------------------------------------
-#
-# UML: 1 Conta - N Historico
-#
-# + adicionar_transacao (transacao: Transacao)
+        else:
+            status = TIPO_INVALIDO
 
-class Historico:
+        if status == OK:
+            codigos.append(CODIGOS_TRANSACAO[tipo])
+            valores.append(valor)
 
-# lista de transacoes
-  def __init__(self):
-    self._transacoes = []
+        resultados[posicao] = ResultadoOperacao(status, conta._saldo)
 
-  @property
-  def transacoes(self):
-    return self._transacoes
+    if codigos:
+        conta.historico.adicionar_lote(codigos, valores, data)
 
+    # registros com valor inválido não viram Transacao nem evento
+    if _ouvintes:
+        for posicao, valor in zip(posicoes, convertidos):
+            tipo = bloco[posicao][1]
+            if valor is not None and (tipo == "Saque" or tipo == "Deposito"):
+                transacao = Saque(valor) if tipo == "Saque" else Deposito(valor)
+                notificar("transacao", conta=conta, transacao=transacao, resultado=resultados[posicao], data=data,
+                          em_lote=True)
+
+# taxas de juros são guardadas como inteiros nesta escala (9 casas decimais)
+ESCALA_JUROS = 1_000_000_000
+
+###############################
+# Função PROCESSAR_FIM_DO_DIA #
+###############################
 #
-# MÉTODO adicionar_transacao
+# Fechamento do dia de todas as contas em uma passada: juros sobre o
+# saldo positivo, tarifa fixa (limitada ao saldo, a conta não fica
+# negativa) e reinício dos contadores diários (limite de saques).
 #
-# Adiciona transação à lista de transações (dicionário)
+# Os valores são calculados sobre um snapshot dos saldos (array int64,
+# NumPy quando disponível) com aritmética inteira exata; só as contas
+# com lançamento são visitadas para gravar saldo e histórico. O saldo
+# recebe a diferença (juros - tarifa), então uma operação concorrente
+# entre o snapshot e a gravação não é perdida. Os ouvintes recebem um
+# único evento "fim_do_dia" com os lançamentos.
 #
-# Dicionário:
-# - tipo: str - nome da transação - "Saque" ou "Deposito"
-# - valor: float - valor da transação
+# Args:
+#    contas (list de Conta): todas as contas
+#    taxa_juros (str | Decimal): taxa diária - ex.: "0.0003" = 0,03% a.d.
+#    tarifa (int): tarifa diária por conta, em centavos
+#    data (datetime): data dos lançamentos - padrão: agora
+# Retorna:
+#    tuple: (juros pagos, tarifas cobradas), em centavos
 #
 
-  def adicionar_transacao(self, transacao):
-    self._transacoes.append(
-        {   
-            "tipo": transacao.__class__.__name__,
-            "valor": transacao.valor,
-        }
-    )
+def processar_fim_do_dia(contas, taxa_juros=0, tarifa=0, data=None):
 
+    data = data or datetime.now()
+    timestamp = data.timestamp()
+    taxa = int((Decimal(str(taxa_juros)) * ESCALA_JUROS).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+    tarifa = index(tarifa)
 
+    if taxa < 0 or tarifa < 0:
+        raise ValueError("Taxa de juros e tarifa não podem ser negativas")
 
-#
-# CLASS: <<interface>>Transacao
-#
-# Estende ABC (classe abstrata)
-#
+    saldos = saldos_centavos(contas)
+    vetorizado = False
 
-class Transacao(ABC):
+    # em int64 o produto saldo * taxa precisa caber em 64 bits
+    if np is not None:
+        saldos = np.maximum(np.frombuffer(saldos, dtype=np.int64), 0)
+        vetorizado = not taxa or not len(saldos) or int(saldos.max()) <= np.iinfo(np.int64).max // taxa
 
-  @property
-  @abstractmethod
-  def valor(self):
-    pass
+    # juros arredondados meio centavo para cima, como em para_centavos
+    if vetorizado:
+        juros = (saldos * taxa + ESCALA_JUROS // 2) // ESCALA_JUROS
+        tarifas = np.minimum(saldos + juros, tarifa)
+        lancadas = np.flatnonzero(juros | tarifas).tolist()
+        juros, tarifas = juros.tolist(), tarifas.tolist()
+    else:
+        saldos = [max(int(saldo), 0) for saldo in saldos]
+        juros = [(saldo * taxa + ESCALA_JUROS // 2) // ESCALA_JUROS for saldo in saldos]
+        tarifas = [min(saldo + valor, tarifa) for saldo, valor in zip(saldos, juros)]
+        lancadas = [posicao for posicao, (valor, cobrada) in enumerate(zip(juros, tarifas)) if valor or cobrada]
+
+    # a gravação cria um Historico por conta ainda sem movimento: com milhões
+    # de objetos novos o coletor de ciclos domina o tempo, fica pausado
+    coletor_ativo = gc.isenabled()
+    gc.disable()
+    try:
+        for posicao in lancadas:
+            conta = contas[posicao]
+            with conta._trava:
+                conta._saldo += juros[posicao] - tarifas[posicao]
+                conta.historico._adicionar_fechamento(juros[posicao], tarifas[posicao], timestamp)
+    finally:
+        if coletor_ativo:
+            gc.enable()
+
+    # contas sem lançamento: só os contadores do dia
+    for conta in contas:
+        historico = conta._historico
+        if historico is not None and historico._dia is not None:
+            historico._zerar_contadores()
+
+    numeros = array("q", [contas[posicao]._numero for posicao in lancadas])
+    valores_juros = array("q", [juros[posicao] for posicao in lancadas])
+    valores_tarifas = array("q", [tarifas[posicao] for posicao in lancadas])
 
+    if _ouvintes:
+        notificar("fim_do_dia", numeros=numeros, juros=valores_juros, tarifas=valores_tarifas, data=data)
+
+    return somar_centavos(valores_juros), somar_centavos(valores_tarifas)
+
+################################
+# Função VALIDAR_DADOS_CLIENTE #
+################################
 #
-# MÉTODO registrar
+# Regras de cadastro do cliente, sem interação com o usuário
 #
-# Recebe a conta
+# Retorna:
+#    str: mensagem do primeiro problema encontrado, ou None se válido
 #
 
-  @classmethod
-  @abstractmethod
-  def registrar(self, conta):
-    pass
+def validar_dados_cliente(cpf, nome, data_nascimento, endereco):
 
-#----------------------------------------
-# CLASSE: Saque
-# Estende: Transacao
-#----------------------------------------
-#
+    if not validar_cpf(cpf):
+        return "CPF inválido"
 
-class Saque(Transacao):
+    return validar_dados_pessoais(nome, data_nascimento, endereco)
 
-  def __init__(self, valor):
-    self._valor = valor
+# as mesmas regras, exceto o CPF (a importação em lote valida os CPFs à parte)
+def validar_dados_pessoais(nome, data_nascimento, endereco):
 
-  @property
-  def valor(self):
-    return self._valor
+    if not nome or len(nome.split()) < 2:
+        return "O nome deve conter pelo menos duas palavras (nome e sobrenome)"
 
-  def registrar(self, conta):
-    resultado_operacao = conta.sacar(self.valor)
+    if not _data_valida(data_nascimento or ""):
+        return "Data de nascimento inválida. Utilize o formato DD/MM/AAAA"
 
-# se retornou TRUE - operação bem-sucedida
-    if resultado_operacao:
-      conta.historico.adicionar_transacao(self)
+    if not endereco:
+        return "O endereço não pode ser vazio"
 
-#----------------------------------------
-# CLASSE: Deposito
-# Estende: Transacao
-#----------------------------------------
+    return None
+
+# strptime é lento e as datas de nascimento se repetem muito numa
+# importação: cada texto distinto é conferido uma vez só
+@lru_cache(maxsize=65_536)
+def _data_valida(texto):
+    try:
+        datetime.strptime(texto, '%d/%m/%Y')
+    except ValueError:
+        return False
+    return True
+
+############################
+# Função CADASTRAR_CLIENTE #
+############################
+#
+# Cria a PessoaFisica e inclui no cadastro (sem interação). Os dados já
+# devem ter sido validados (validar_dados_cliente).
+#
+# Retorna:
+#    PessoaFisica: cliente criado, ou None se o CPF já existir
 #
 
-class Deposito(Transacao):
+def cadastrar_cliente(clientes, cpf, nome, data_nascimento, endereco):
 
-  def __init__(self, valor):
-    self._valor = valor
+    cliente = PessoaFisica(nome=nome, data_nascimento=data_nascimento, cpf=limpar_cpf(cpf), endereco=endereco)
 
-  @property
-  def valor(self):
-    return self._valor
+    if not clientes.adicionar(cliente):
+        return None
 
-  def registrar(self, conta):
-    resultado_operacao = conta.depositar(self.valor)
+    if _ouvintes:
+        notificar("cliente_criado", cliente=cliente)
 
-#se retornou TRUE - operação bem-sucedida
-    if resultado_operacao:
-      conta.historico.adicionar_transacao(self)
+    return cliente
+
+######################
+# Função ABRIR_CONTA #
+######################
+#
+# Cria a conta corrente do cliente e inclui na lista de contas
+#
+# Args:
+#    numero (int): número da nova conta
+#    cliente (Cliente): titular
+#    contas (list): lista com as contas existentes
+# Retorna:
+#    ContaCorrente: conta criada
+#
+
+def abrir_conta(numero, cliente, contas):
+
+    conta = ContaCorrente.nova_conta(cliente=cliente, numero=numero)
 
+    contas.append(conta)
+    cliente.adicionar_conta(conta)
+
+    if _ouvintes:
+        notificar("conta_criada", conta=conta)
+
+    return conta
 
 #====================================================================
 # Desafio Extra - Atualizar os métodos que tratam as opções do Menu, 
@@ -329,6 +2208,10 @@ class Deposito(Transacao):
 # Ajuste de nomenclatura: usuario virou cliente
 #                                          
 
+# leitura das respostas do menu; executar_roteiro troca pelas respostas
+# lidas do roteiro
+_entrada = input
+
 
 ###############
 # Função MENU #
@@ -351,16 +2234,16 @@ def menu():
     [E]  Extrato
     [N]  Novo cliente
     [C]  Criar conta corrente
-    [L]  Listar contas
+    [L]  Listar/consultar contas
     [X]  Sair\n
     => """
-    return input(textwrap.dedent(menu))
+    return _entrada(textwrap.dedent(menu))
 
 ######################
 # Função VALIDAR_CPF #
 ######################
 #                                          
-# Valida o CPF informado
+# Valida o CPF informado, inclusive os dois dígitos verificadores
 #
 # Args:
 #    cpf (str): cpf do cliente
@@ -377,11 +2260,79 @@ def validar_cpf(cpf):
     if len(cpf) != 11:
       return False
 
-    # Verifica se todos os caracteres são dígitos
-    elif not cpf.isdigit():
+    # Verifica se todos os caracteres são dígitos 0-9 (isdigit sozinho
+    # aceita outros, ex.: '²')
+    elif not (cpf.isascii() and cpf.isdigit()):
       return False
 
-    return True
+    # Sequências repetidas (111.111.111-11) passam no cálculo, mas não são CPFs
+    elif cpf == cpf[0] * 11:
+      return False
+
+    # Confere os dígitos verificadores
+    return cpf == completar_cpf(cpf[:9])
+
+########################
+# Função COMPLETAR_CPF #
+########################
+#
+# Calcula os dois dígitos verificadores do CPF: cada dígito é a soma
+# ponderada dos anteriores (pesos decrescentes até 2), vezes 10, módulo
+# 11, com 10 virando 0
+#
+# Args:
+#    base (str): os 9 primeiros dígitos
+# Retorna:
+#    str: CPF completo, com 11 dígitos
+#
+
+def completar_cpf(base):
+
+    digitos = [int(digito) for digito in base]
+
+    for _ in range(2):
+        soma = sum(digito * peso for digito, peso in zip(digitos, range(len(digitos) + 1, 1, -1)))
+        digitos.append(soma * 10 % 11 % 10)
+
+    return "".join(map(str, digitos))
+
+#######################
+# Função VALIDAR_CPFS #
+#######################
+#
+# Valida um bloco de CPFs (já limpos) de uma vez: com NumPy os dígitos
+# de todos viram uma matriz N x 11 e os verificadores são calculados
+# por produto matricial, sem laço em Python por CPF
+#
+# Args:
+#    cpfs (list): CPFs somente com números (limpar_cpf)
+# Retorna:
+#    list: bool por CPF, na mesma ordem - T ou F
+#
+
+PESOS_CPF = (tuple(range(10, 1, -1)), tuple(range(11, 1, -1)))
+
+def validar_cpfs(cpfs):
+
+    if np is None:
+        return [validar_cpf(cpf) for cpf in cpfs]
+
+    # só os que têm o formato certo entram na matriz de dígitos
+    formato = [len(cpf) == 11 and cpf.isascii() and cpf.isdigit() for cpf in cpfs]
+    validos = np.zeros(len(cpfs), dtype=bool)
+
+    bem_formados = [cpf for cpf, ok in zip(cpfs, formato) if ok]
+    if bem_formados:
+        digitos = np.frombuffer("".join(bem_formados).encode("ascii"), dtype=np.uint8).reshape(-1, 11) - ord("0")
+        digitos = digitos.astype(np.int64)
+
+        primeiro = digitos[:, :9] @ np.array(PESOS_CPF[0]) * 10 % 11 % 10
+        segundo = digitos[:, :10] @ np.array(PESOS_CPF[1]) * 10 % 11 % 10
+        repetidos = (digitos == digitos[:, :1]).all(axis=1)
+
+        validos[np.array(formato)] = (primeiro == digitos[:, 9]) & (segundo == digitos[:, 10]) & ~repetidos
+
+    return validos.tolist()
 
 ######################
 # Função LIMPAR_CPF #
@@ -409,20 +2360,16 @@ def limpar_cpf(cpf):
 # Valida se o cliente ja existe ou não
 #
 # Args:
-#    cpf (float): cpf a ser pesquisado
-#    clientes (list): lista de clientes
+#    cpf (str): cpf a ser pesquisado
+#    clientes (ClienteRegistry): cadastro de clientes
+# Retorna:
+#    Cliente: cliente encontrado ou None
 #
 
 def validar_cliente(cpf, clientes):
 
-    cliente_existente = None
-                  
-    # percorre a lista, comparando o cpf
-    # se existir, retorna o cliente
-    for cliente in clientes:
-        if cliente.cpf == cpf:
-            cliente_existente = cliente
-            break  # para o for quando o cliente é encontrado
+    # busca direta pelo cpf no cadastro (dicionário)
+    return clientes.buscar(cpf)
 
 #######################
 # Função BUSCAR_CONTA #
@@ -450,13 +2397,13 @@ def buscar_conta(cliente):
 # Função DEPOSITAR #
 ####################
 #                                          
-# Recebe: lista de CLIENTES
+# Recebe: cadastro de CLIENTES (ClienteRegistry)
 #
 # Possivel melhoria: pedir em qual conta do cliente quer depositar                                          
 
 def depositar(clientes):
 
-    cpf = input("\nInforme o CPF do cliente (somente números): ")
+    cpf = _entrada("\nInforme o CPF do cliente (somente números): ")
 
     # cpf inválido
     if not validar_cpf(cpf):
@@ -477,7 +2424,10 @@ def depositar(clientes):
             print("=========================================================")
             return
 
-        valor = float(input("\nDigite o valor que quer depositar: "))
+        try:
+            valor = para_centavos(_entrada("\nDigite o valor que quer depositar: "))
+        except ValueError:
+            valor = 0
 
         if valor <= 0:
             print("\n==================================================")
@@ -502,12 +2452,12 @@ def depositar(clientes):
 # Função SACAR #
 ################
 #
-# Recebe: lista de CLIENTES
+# Recebe: cadastro de CLIENTES (ClienteRegistry)
 #
 
 def sacar(clientes):
 
-    cpf = input("\nInforme o CPF do cliente (somente números): ")
+    cpf = _entrada("\nInforme o CPF do cliente (somente números): ")
 
     # cpf inválido
     if not validar_cpf(cpf):
@@ -528,7 +2478,10 @@ def sacar(clientes):
             print("=========================================================")
             return
 
-        valor = float(input("\nDigite o valor que quer sacar: "))
+        try:
+            valor = para_centavos(_entrada("\nDigite o valor que quer sacar: "))
+        except ValueError:
+            valor = 0
 
         if valor <= 0:
             print("\n==================================================")
@@ -549,18 +2502,50 @@ def sacar(clientes):
 
             cliente.realizar_transacao(conta, transacao)
                   
+# quantidade de movimentações do extrato quando nenhum período é informado
+ULTIMAS_EXTRATO = 20
+
+######################
+# Função LER_PERIODO #
+######################
+#
+# Converte o período digitado no extrato
+#
+# Args:
+#    periodo (str): "DD/MM/AAAA-DD/MM/AAAA", "DD/MM/AAAA" (um dia) ou vazio
+# Retorna:
+#    tuple: (inicio, fim) como date, ou (None, None) se vazio
+#
+
+def ler_periodo(periodo):
+
+    periodo = periodo.strip()
+
+    if not periodo:
+        return None, None
+
+    partes = periodo.split("-")
+
+    if len(partes) > 2:
+        raise ValueError(f"Período inválido: {periodo!r}")
+
+    inicio = datetime.strptime(partes[0].strip(), '%d/%m/%Y').date()
+    fim = datetime.strptime(partes[-1].strip(), '%d/%m/%Y').date()
+
+    return inicio, fim
+
 #########################
 # Função MOSTRA_EXTRATO #
 #########################
 #                  
-# Mostra o extrato completo da conta
+# Mostra o extrato da conta: as últimas movimentações ou as do período
 #
-# Recebe: lista de CLIENTES
+# Recebe: cadastro de CLIENTES (ClienteRegistry)
 #
 
 def mostra_extrato(clientes):
 
-    cpf = input("\nInforme o CPF do cliente (somente números): ")
+    cpf = _entrada("\nInforme o CPF do cliente (somente números): ")
 
     # cpf inválido
     if not validar_cpf(cpf):
@@ -587,30 +2572,43 @@ def mostra_extrato(clientes):
         if not conta:
               return
 
+        # período do extrato: vazio = últimas movimentações
+        periodo = _entrada(f"\nInforme o período (DD/MM/AAAA-DD/MM/AAAA) ou Enter para as últimas {ULTIMAS_EXTRATO}: ")
+
+        try:
+            inicio, fim = ler_periodo(periodo)
+        except ValueError:
+            print("\n=========================")
+            print("Período inválido. Utilize o formato DD/MM/AAAA-DD/MM/AAAA.")
+            print("=========================")
+            return
+
+        ultimas = ULTIMAS_EXTRATO if not periodo.strip() else None
+
         # cliente existe e tem conta                                 
         print("\n==================================================")
         print("Extrato:")
         print("==================================================\n")
 
-        transacoes = conta.historico.transacoes
+        # imprime transação a transação, sem montar o extrato inteiro, sem
+        # travar os saques e depósitos; o saldo exibido é o da conta
+        instantaneo = conta.instantaneo()
+        vazio = True
+        for transacao in instantaneo.extrato(inicio, fim, ultimas):
+            if vazio:
+                print("\n=========================")
+                vazio = False
 
-        extrato = ""
+            print(f"Data: {transacao['data']}")
+            print(f"Tipo: {transacao['tipo']}")
+            print(f"Valor: R$ {formatar_centavos(transacao['valor'])}")
 
-        # nao ha transacoes para a conta
-        if not transacoes:
-            extrato = "Não foram realizadas movimentações nessa conta."
-        
-        # ha trasacoes para a conta              
-        else:
-            print("\n=========================")
-            for transacao in transacoes:
-                  extrato += f"Data: {transacao['data']}\n"
-                  extrato += f"Tipo: {transacao['tipo']}\n"
-                  extrato += f"Valor: {transacao['valor']}\n"
+        # nao ha transacoes para a conta (no período)
+        if vazio:
+            print("Não foram realizadas movimentações nessa conta.")
 
-        print(extrato)
         print("\n=========================")
-        print(f"Saldo atual: R$ {conta.saldo:.2f}")
+        print(f"Saldo atual: R$ {formatar_centavos(instantaneo.saldo)}")
         print("=========================")
 
 ########################                
@@ -620,7 +2618,7 @@ def mostra_extrato(clientes):
 # Cria um cliente
 #
 # Args:
-#    clientes (list): Lista com todos os clientes
+#    clientes (ClienteRegistry): cadastro com todos os clientes
 #
 
 def criar_cliente(clientes):
@@ -629,7 +2627,7 @@ def criar_cliente(clientes):
 # CPF
 #---------------------   
               
-    cpf = input("\nInforme o CPF do cliente (somente números): ")
+    cpf = _entrada("\nInforme o CPF do cliente (somente números): ")
 
     # cpf inválido
     if not validar_cpf(cpf):
@@ -656,7 +2654,7 @@ def criar_cliente(clientes):
 #---------------------
 
     print("\n=========================")
-    nome = input("Informe o nome completo (nome + sobrenome): ")
+    nome = _entrada("Informe o nome completo (nome + sobrenome): ")
     print("=========================")
 
     # Verifica se um nome foi informado
@@ -679,7 +2677,7 @@ def criar_cliente(clientes):
 #---------------------
 
     print("\n=========================")
-    data_nascimento = input("Informe a data de nascimento (DD/MM/AAAA): ")
+    data_nascimento = _entrada("Informe a data de nascimento (DD/MM/AAAA): ")
     print("=========================")
 
     # Verifica se a data de nascimento foi informada
@@ -702,7 +2700,7 @@ def criar_cliente(clientes):
 # Endereço
 #---------------------
 
-    endereco = input("Informe o endereço (Logradouro - Num - Bairro - Cidade/Sigla do estado): ")
+    endereco = _entrada("Informe o endereço (Logradouro - Num - Bairro - Cidade/Sigla do estado): ")
 
     # Verifica se o endereço foi informado
     if not endereco:
@@ -714,11 +2712,8 @@ def criar_cliente(clientes):
     # Passou em todas as validações
     else:
 
-        # cria pessoa fisica (instancia)              
-        cliente = PessoaFisica (nome = nome, data_nascimento = data_nascimento, cpf = cpf, endereco = endereco)
-
-        # adiciona o cliente à lista              
-        clientes.append(cliente)    
+        # cria pessoa fisica (instancia) e adiciona ao cadastro
+        cadastrar_cliente(clientes, cpf, nome, data_nascimento, endereco)
 
         print("\n=======================================================")
         print(f"Cliente {cpf} cadastrado com sucesso!")
@@ -738,7 +2733,7 @@ def criar_cliente(clientes):
 
 def criar_conta(numero_conta, clientes, contas):
 
-    cpf = input("\nInforme o CPF do cliente (somente números): ")
+    cpf = _entrada("\nInforme o CPF do cliente (somente números): ")
 
     # cpf inválido
     if not validar_cpf(cpf):
@@ -759,15 +2754,8 @@ def criar_conta(numero_conta, clientes, contas):
             print("=========================================================")
             return
 
-        # chama o construtor da conta
-        conta = ContaCorrente.nova_conta(cliente = cliente,
-                                         numero = numero_conta)
-        
-        # atualiza a lista de contas          
-        contas.append(conta)
-
-        # atualiza a lista de contas do cliente                            
-        cliente.contas.append(conta)
+        # cria a conta e atualiza a lista de contas geral e do cliente
+        abrir_conta(numero_conta, cliente, contas)
                   
         print("\n=========================")
         print(f"Conta número {numero_conta} criada com sucesso para o cliente {cpf}")
@@ -777,69 +2765,357 @@ def criar_conta(numero_conta, clientes, contas):
 # Função LISTAR_CONTAS #
 ########################
 #                      
-# Lista as conta correntes existentes
+# Lista as conta correntes existentes, ou só uma página delas
 #
 # Args:
 #    contas (list): lista com as contas existentes
+#    pagina (int): página a listar, a partir de 0
+#    tamanho_pagina (int): contas por página - padrão: todas
+# Retorna:
+#    int: quantidade de contas listadas
 #
 
-def listar_contas(contas):
+def listar_contas(contas, pagina=0, tamanho_pagina=None):
 
     print("\n==================================================")
     print("Listagem de Contas")
     print("==================================================\n")
 
-    # repete até listar todas as contas
+    if tamanho_pagina is not None:
+        contas = islice(contas, pagina * tamanho_pagina, (pagina + 1) * tamanho_pagina)
+
+    # repete até listar todas as contas (da página)
+    listadas = 0
     for conta in contas:
         print("=" * 100)
         print(textwrap.dedent(str(conta)))
+        listadas += 1
+
+    return listadas
+
+# contas exibidas por página na consulta de contas do menu
+TAMANHO_PAGINA_CONTAS = 20
+
+###########################
+# Função CONSULTAR_CONTAS #
+###########################
+#
+# Consulta de contas do menu: todas, por início do nome do titular, por
+# faixa de saldo ou por agência e número (IndiceContas), exibidas uma
+# página por vez
+#
+# Args:
+#    contas (list): lista com as contas existentes
+#    indice (IndiceContas): índices das contas
+#
+
+def consultar_contas(contas, indice):
+
+    filtro = _entrada("\nFiltrar por [N]ome, [S]aldo, [A]gência/número ou Enter para todas: ").strip().upper()
+
+    try:
+        if filtro == "N":
+            prefixo = _entrada("Início do nome do titular: ")
+
+        elif filtro == "S":
+            minimo = _entrada("Saldo mínimo (R$) ou Enter para sem mínimo: ").strip()
+            maximo = _entrada("Saldo máximo (R$) ou Enter para sem máximo: ").strip()
+            minimo = para_centavos(minimo) if minimo else None
+            maximo = para_centavos(maximo) if maximo else None
+
+        elif filtro == "A":
+            agencia = _entrada(f"Agência (Enter para {Conta.AGENCIA}): ").strip() or Conta.AGENCIA
+            conta = indice.buscar(int(_entrada("Número da conta: ")), agencia)
+
+    except ValueError:
+        print("\n=========================")
+        print("Valor inválido.")
+        print("=========================")
+        return
+
+    pagina = 0
+    while True:
+        inicio = pagina * TAMANHO_PAGINA_CONTAS
+
+        if filtro == "N":
+            selecao = indice.por_nome(prefixo, pagina, TAMANHO_PAGINA_CONTAS)
+        elif filtro == "S":
+            selecao = indice.por_saldo(minimo, maximo, pagina, TAMANHO_PAGINA_CONTAS)
+        elif filtro == "A":
+            selecao = [conta] if conta is not None and pagina == 0 else []
+        else:
+            selecao = contas[inicio:inicio + TAMANHO_PAGINA_CONTAS]
+
+        listadas = listar_contas(selecao)
+
+        if pagina == 0 and not listadas:
+            print("Nenhuma conta encontrada.")
+
+        if listadas < TAMANHO_PAGINA_CONTAS:
+            return
+
+        resposta = _entrada("\nEnter para a próxima página ou X para voltar: ")
+        if resposta.strip().upper() == "X":
+            return
+
+        pagina += 1
                   
+###########################
+# Função EXIBIR_RESULTADO #
+###########################
+#
+# Ouvinte do menu interativo: exibe a mensagem de cada transação
+#
+# Args:
+#    evento (str): nome do evento
+#    conta (Conta), transacao (Transacao), resultado (ResultadoOperacao)
+#
+
+def exibir_resultado(evento, conta=None, transacao=None, resultado=None, **dados):
+
+    if evento != "transacao":
+        return
+
+    status = resultado.status
+
+    if status == OK and isinstance(transacao, Saque):
+        mensagem = f"Saque de R$ {formatar_centavos(transacao.valor)} realizado com sucesso."
+
+    elif status == OK and isinstance(transacao, Transferencia):
+        mensagem = (f"Transferência de R$ {formatar_centavos(transacao.valor)} para a conta "
+                    f"{transacao.destino.numero} realizada com sucesso.")
+
+    elif status == OK:
+        mensagem = f"Depósito de R$ {formatar_centavos(transacao.valor)} realizado com sucesso."
+
+    elif status == SALDO_INSUFICIENTE:
+        mensagem = f"Saldo insuficiente. Seu saldo atual é de R$ {formatar_centavos(resultado.saldo)}."
+
+    elif status == LIMITE_EXCEDIDO:
+        mensagem = f"O valor do saque excede o limite máximo por operação, que é de R$ {formatar_centavos(conta.limite)}."
+
+    elif status == SAQUES_EXCEDIDOS:
+        mensagem = f"Você atingiu o limite máximo de {conta.limite_saques} saques diários."
+
+    else:
+        mensagem = f"{resultado.motivo}."
+
+    print("\n==================================================")
+    print(mensagem)
+    print("==================================================")
+
 #==================================
 # PROGRAMA PRINCIPAL
 #==================================
 
-def main():
+def main(clientes=None, contas=None):
 
-    # listas
-    clientes = []
-    contas = []
+    # cadastro de clientes (indexado por cpf) e lista de contas, vazios ou
+    # recuperados do disco (sistema_bancario_journal)
+    clientes = ClienteRegistry() if clientes is None else clientes
+    contas = [] if contas is None else contas
+
+    # o menu é apenas um ouvinte que exibe o resultado das transações;
+    # os índices da consulta de contas acompanham os mesmos eventos
+    adicionar_ouvinte(exibir_resultado)
+    indice = IndiceContas(contas)
+    adicionar_ouvinte(indice)
 
     while True:
-        opcao = menu()
+        if not executar_opcao(menu(), clientes, contas, indice):
+            break
+
+#########################
+# Função EXECUTAR_OPCAO #
+#########################
+#
+# Executa uma opção do menu, com as respostas lidas por _entrada
+#
+# Args:
+#    opcao (str): letra da opção
+#    clientes (ClienteRegistry), contas (list), indice (IndiceContas)
+# Retorna:
+#    bool: False para a opção de sair
+#
+
+def executar_opcao(opcao, clientes, contas, indice):
 
 # DEPOSITAR
-        if opcao == "D" or opcao == "d":
-            depositar(clientes)
+    if opcao == "D" or opcao == "d":
+        depositar(clientes)
 
 # SACAR
-        elif opcao == "s" or opcao == "S":
-            sacar(clientes)
+    elif opcao == "s" or opcao == "S":
+        sacar(clientes)
 
 # EXTRATO
-        elif opcao == "e" or opcao == "E":
-            mostra_extrato(clientes)
+    elif opcao == "e" or opcao == "E":
+        mostra_extrato(clientes)
 
 # CRIAR cliente
-        elif opcao == "n" or opcao == "N":
-            criar_cliente(clientes)
+    elif opcao == "n" or opcao == "N":
+        criar_cliente(clientes)
 
 # CRIAR CC
-        elif opcao == "C" or opcao == "c":
-            numero_conta = len(contas) + 1
-            criar_conta(numero_conta, clientes, contas)
+    elif opcao == "C" or opcao == "c":
+        numero_conta = len(contas) + 1
+        criar_conta(numero_conta, clientes, contas)
 
 # LISTAR CC
-        elif opcao == "L" or opcao == "l":
-            listar_contas(contas)
+    elif opcao == "L" or opcao == "l":
+        consultar_contas(contas, indice)
 
 # SAIR
-        elif opcao == "x" or opcao == "X":
-            break
+    elif opcao == "x" or opcao == "X":
+        return False
 
 # OP INVÁLIDA
-        else:
-            print("\n=========================")
-            print("Opção inválida.")
-            print("=========================")
+    else:
+        print("\n=========================")
+        print("Opção inválida.")
+        print("=========================")
+
+    return True
+
+#----------------------------------------
+# CLASSE: RelatorioRoteiro
+#----------------------------------------
+#
+# - comandos: int - comandos executados
+# - tempos: dict - opção -> array("d") com a duração (s) de cada execução
+# - resultados: dict - motivo -> quantidade de transações
+# - segundos: float - duração do roteiro
+#
+# + comandos_por_segundo(): float
+#
+
+class RelatorioRoteiro:
+    __slots__ = ("comandos", "tempos", "resultados", "segundos")
+
+    def __init__(self):
+        self.comandos = 0
+        self.tempos = {}
+        self.resultados = {}
+        self.segundos = 0.0
+
+    @property
+    def comandos_por_segundo(self):
+        return self.comandos / self.segundos if self.segundos else 0.0
+
+# ouvinte do roteiro: conta as transações por resultado
+    def __call__(self, evento, resultado=None, **dados):
+        if evento == "transacao":
+            self.resultados[resultado.motivo] = self.resultados.get(resultado.motivo, 0) + 1
+
+###########################
+# Função EXECUTAR_ROTEIRO #
+###########################
+#
+# Modo não interativo do menu: cada linha do roteiro é uma opção seguida
+# das respostas às perguntas dela, separadas por ";", executada pelas
+# mesmas funções do menu (depositar, sacar, criar_cliente...). Linhas
+# vazias e iniciadas por "#" são ignoradas; pergunta sem resposta no
+# roteiro recebe Enter (""). Exemplo:
+#
+#    N 12345678909;Maria Silva;01/01/1990;Rua A - 1 - Centro - Cidade/SP
+#    C 12345678909
+#    D 12345678909;100,00
+#    S 12345678909;30,50
+#    E 12345678909
+#
+# Args:
+#    linhas (iterável de str): o roteiro (arquivo aberto, sys.stdin...)
+#    clientes (ClienteRegistry), contas (list): como em main
+#    silencioso (bool): descarta as mensagens do menu
+# Retorna:
+#    RelatorioRoteiro
+#
+
+def executar_roteiro(linhas, clientes=None, contas=None, silencioso=True):
+    global _entrada
+
+    clientes = ClienteRegistry() if clientes is None else clientes
+    contas = [] if contas is None else contas
+    indice = IndiceContas(contas)
+    relatorio = RelatorioRoteiro()
+    respostas = []
+
+    # respostas da linha atual, na ordem das perguntas; depois, Enter
+    def responder(pergunta=""):
+        return respostas.pop() if respostas else ""
 
-main()
\ No newline at end of file
+    ouvintes = (indice, relatorio) if silencioso else (indice, relatorio, exibir_resultado)
+    for ouvinte in ouvintes:
+        adicionar_ouvinte(ouvinte)
+
+    entrada_anterior, _entrada = _entrada, responder
+    saida = open(os.devnull, "w") if silencioso else sys.stdout
+    inicio_roteiro = time.perf_counter()
+
+    try:
+        with redirect_stdout(saida):
+            for linha in linhas:
+                linha = linha.strip()
+                if not linha or linha.startswith("#"):
+                    continue
+
+                opcao, _, argumentos = linha.partition(" ")
+                respostas[:] = reversed(argumentos.split(";")) if argumentos else ()
+
+                inicio = time.perf_counter()
+                continuar = executar_opcao(opcao, clientes, contas, indice)
+                decorrido = time.perf_counter() - inicio
+
+                opcao = opcao.upper()
+                if opcao not in relatorio.tempos:
+                    relatorio.tempos[opcao] = array("d")
+                relatorio.tempos[opcao].append(decorrido)
+                relatorio.comandos += 1
+
+                if not continuar:
+                    break
+
+    finally:
+        _entrada = entrada_anterior
+        for ouvinte in ouvintes:
+            remover_ouvinte(ouvinte)
+        if silencioso:
+            saida.close()
+
+    relatorio.segundos = time.perf_counter() - inicio_roteiro
+    return relatorio
+
+# resumo do roteiro: tempos por opção (média e percentis) e resultados
+def exibir_relatorio_roteiro(relatorio):
+
+    print(f"\nComandos: {relatorio.comandos}  tempo: {relatorio.segundos:.2f} s  "
+          f"({relatorio.comandos_por_segundo:,.0f} comandos/s)\n")
+    print(f"{'opção':>6}{'execuções':>12}{'total ms':>12}{'média µs':>12}{'p50 µs':>12}{'p99 µs':>12}{'máx µs':>12}")
+
+    for opcao, tempos in sorted(relatorio.tempos.items()):
+        ordenados = sorted(tempos)
+        quantidade = len(ordenados)
+        total = sum(ordenados)
+        p50 = ordenados[quantidade // 2]
+        p99 = ordenados[min(quantidade - 1, int(quantidade * 0.99))]
+        print(f"{opcao:>6}{quantidade:>12,}{total * 1e3:>12,.1f}{total / quantidade * 1e6:>12,.1f}"
+              f"{p50 * 1e6:>12,.1f}{p99 * 1e6:>12,.1f}{ordenados[-1] * 1e6:>12,.1f}")
+
+    if relatorio.resultados:
+        print("\nTransações:")
+        for motivo, quantidade in sorted(relatorio.resultados.items(), key=lambda item: -item[1]):
+            print(f"    {quantidade:>10}  {motivo}")
+
+# sem argumentos: menu interativo; --roteiro ARQUIVO (ou - para a entrada
+# padrão) executa o roteiro e exibe o resumo
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sistema Bancário em Python")
+    parser.add_argument("--roteiro", help="arquivo de comandos (- = entrada padrão), executado sem interação")
+    parser.add_argument("--verboso", action="store_true", help="exibe as mensagens do menu durante o roteiro")
+    args = parser.parse_args()
+
+    if args.roteiro:
+        with (sys.stdin if args.roteiro == "-" else open(args.roteiro, encoding="utf-8")) as roteiro:
+            exibir_relatorio_roteiro(executar_roteiro(roteiro, silencioso=not args.verboso))
+    else:
+        main()
\ No newline at end of file
@@ -0,0 +1,334 @@
+# Sistema Bancário em Python - Servidor asyncio
+# Descrição: Expõe as operações do sistema_bancario_poo por socket local
+#            (TCP ou Unix), com protocolo JSON delimitado por linha
+#
+# Uso:
+#    python sistema_bancario_servidor.py servidor [--host 127.0.0.1 --porta 8765 | --unix /tmp/banco.sock]
+#    python sistema_bancario_servidor.py carga [--conexoes 1000 --pedidos 100]
+#
+# Protocolo: cada linha é um objeto JSON com o campo "op", a resposta é
+# uma linha JSON com "ok" (bool) e "id" repetido quando informado.
+# Valores monetários são inteiros em centavos.
+#
+#    {"op": "criar_cliente", "cpf": "...", "nome": "...", "data_nascimento": "DD/MM/AAAA", "endereco": "..."}
+#    {"op": "criar_conta", "cpf": "..."}                  -> {"ok": true, "conta": 1}
+#    {"op": "depositar", "conta": 1, "valor": 10000}      -> {"ok": true, "status": 0, "motivo": "...", "saldo": 10000}
+#    {"op": "sacar", "conta": 1, "valor": 5000}
+#        opcional em depositar/sacar: "chave" (idempotência) - repetir o
+#        pedido com a mesma chave, na mesma conta e operação, devolve a
+#        resposta original sem reaplicar
+#    {"op": "extrato", "conta": 1}                        -> {"ok": true, "saldo": ..., "versao": ..., "transacoes": [...]}
+#        opcionais: "de"/"ate" (DD/MM/AAAA), "ultimas", "pagina" e "tamanho";
+#        sem nenhum deles, retorna as 50 movimentações mais recentes. Saldo
+#        e transações são da mesma versão (Conta.instantaneo); páginas
+#        pedidas em sequência podem ser de versões diferentes
+#    {"op": "listar_contas", "pagina": 0, "tamanho": 50}  -> {"ok": true, "contas": [...]}
+#        "pagina" começa em 0 e "tamanho" vai de 1 a 1000; fora disso (ou
+#        se não forem inteiros) a resposta é {"ok": false, "erro": "..."}.
+#        O mesmo vale para "pagina", "tamanho" e "ultimas" do extrato
+
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime
+
+from sistema_bancario_poo import (ClienteRegistry, Deposito, Saque, abrir_conta, cadastrar_cliente, completar_cpf,
+                                  validar_dados_cliente)
+
+PORTA_PADRAO = 8765
+TAMANHO_PAGINA = 50
+
+#----------------------------------------
+# CLASSE: ServicoBancario
+#----------------------------------------
+#
+# Estado do banco (cadastro de clientes e contas) e execução dos
+# pedidos do protocolo. As operações do domínio são síncronas e não há
+# await no meio delas, então cada pedido é atômico no loop de eventos.
+#
+# - clientes: ClienteRegistry
+# - contas: list - conta de número N na posição N - 1
+#
+# + executar(pedido: dict): dict
+#
+
+class ServicoBancario:
+    def __init__(self):
+        self.clientes = ClienteRegistry()
+        self.contas = []
+
+        self._operacoes = {
+            "criar_cliente": self._criar_cliente,
+            "criar_conta": self._criar_conta,
+            "depositar": self._depositar,
+            "sacar": self._sacar,
+            "extrato": self._extrato,
+            "listar_contas": self._listar_contas,
+        }
+
+#
+# MÉTODO executar
+#
+# Args:
+#    pedido (dict): pedido já decodificado do JSON
+# Retorna:
+#    dict: resposta a ser enviada ao cliente
+#
+
+    def executar(self, pedido):
+        operacao = self._operacoes.get(pedido.get("op"))
+
+        if operacao is None:
+            resposta = {"ok": False, "erro": "Operação inválida"}
+        else:
+            try:
+                resposta = operacao(pedido)
+            except (KeyError, TypeError, ValueError) as erro:
+                resposta = {"ok": False, "erro": f"Pedido inválido: {erro}"}
+
+        if "id" in pedido:
+            resposta["id"] = pedido["id"]
+
+        return resposta
+
+    def _buscar_conta(self, numero):
+        if _inteiro(numero, 1) and numero <= len(self.contas):
+            return self.contas[numero - 1]
+        return None
+
+    def _criar_cliente(self, pedido):
+        cpf, nome = pedido["cpf"], pedido["nome"]
+        data_nascimento, endereco = pedido["data_nascimento"], pedido["endereco"]
+
+        erro = validar_dados_cliente(cpf, nome, data_nascimento, endereco)
+        if erro:
+            return {"ok": False, "erro": erro}
+
+        if not cadastrar_cliente(self.clientes, cpf, nome, data_nascimento, endereco):
+            return {"ok": False, "erro": "Cliente já existe"}
+
+        return {"ok": True}
+
+    def _criar_conta(self, pedido):
+        cliente = self.clientes.buscar(pedido["cpf"])
+
+        if cliente is None:
+            return {"ok": False, "erro": "Cliente não encontrado"}
+
+        conta = abrir_conta(len(self.contas) + 1, cliente, self.contas)
+        return {"ok": True, "conta": conta.numero}
+
+    def _transacao(self, pedido, classe):
+        conta = self._buscar_conta(pedido["conta"])
+
+        if conta is None:
+            return {"ok": False, "erro": "Conta não encontrada"}
+
+        resultado = classe(pedido["valor"], pedido.get("chave")).registrar(conta)
+        return {"ok": bool(resultado), "status": resultado.status, "motivo": resultado.motivo, "saldo": resultado.saldo}
+
+    def _depositar(self, pedido):
+        return self._transacao(pedido, Deposito)
+
+    def _sacar(self, pedido):
+        return self._transacao(pedido, Saque)
+
+    def _extrato(self, pedido):
+        conta = self._buscar_conta(pedido["conta"])
+
+        if conta is None:
+            return {"ok": False, "erro": "Conta não encontrada"}
+
+        inicio = _ler_data(pedido.get("de"))
+        fim = _ler_data(pedido.get("ate"))
+        ultimas = pedido.get("ultimas")
+        tamanho = pedido.get("tamanho")
+        pagina = pedido.get("pagina", 0)
+
+        if ultimas is not None and not _inteiro(ultimas, 1):
+            return {"ok": False, "erro": "ultimas deve ser um inteiro maior que zero"}
+        if tamanho is not None and not _inteiro(tamanho, 1):
+            return {"ok": False, "erro": "tamanho deve ser um inteiro maior que zero"}
+        if not _inteiro(pagina, 0):
+            return {"ok": False, "erro": "pagina deve ser um inteiro maior ou igual a zero"}
+
+        # sem período nem paginação: apenas as movimentações mais recentes
+        if inicio is None and fim is None and ultimas is None and tamanho is None:
+            ultimas = TAMANHO_PAGINA
+
+        instantaneo = conta.instantaneo()
+        transacoes = instantaneo.extrato(inicio, fim, ultimas, pagina, tamanho)
+        return {"ok": True, "saldo": instantaneo.saldo, "versao": instantaneo.versao, "transacoes": list(transacoes)}
+
+    def _listar_contas(self, pedido):
+        pagina = pedido.get("pagina", 0)
+        tamanho = pedido.get("tamanho", TAMANHO_PAGINA)
+
+        if not _inteiro(pagina, 0):
+            return {"ok": False, "erro": "pagina deve ser um inteiro maior ou igual a zero"}
+        if not _inteiro(tamanho, 1):
+            return {"ok": False, "erro": "tamanho deve ser um inteiro maior que zero"}
+
+        tamanho = min(tamanho, 1_000)
+        inicio = pagina * tamanho
+
+        contas = [
+            {"agencia": conta.agencia, "conta": conta.numero, "titular": conta.cliente.nome}
+            for conta in self.contas[inicio:inicio + tamanho]
+        ]
+
+        return {"ok": True, "contas": contas, "total": len(self.contas)}
+
+# inteiro do pedido com valor >= minimo; bool não conta (JSON true não é 1)
+def _inteiro(valor, minimo):
+    return isinstance(valor, int) and not isinstance(valor, bool) and valor >= minimo
+
+# data "DD/MM/AAAA" do pedido (ou None)
+def _ler_data(texto):
+    if texto is None:
+        return None
+    return datetime.strptime(texto, "%d/%m/%Y").date()
+
+#---------------------------------
+# Função TRATAR_CONEXAO (asyncio)
+#---------------------------------
+#
+# Lê pedidos linha a linha e responde na mesma ordem, até o cliente
+# fechar a conexão
+#
+
+async def tratar_conexao(servico, leitor, escritor):
+    try:
+        while True:
+            linha = await leitor.readline()
+            if not linha:
+                break
+
+            try:
+                pedido = json.loads(linha)
+            except ValueError:
+                pedido = None
+
+            if isinstance(pedido, dict):
+                resposta = servico.executar(pedido)
+            else:
+                resposta = {"ok": False, "erro": "JSON inválido"}
+
+            escritor.write(json.dumps(resposta, ensure_ascii=False).encode() + b"\n")
+            await escritor.drain()
+
+    except ConnectionError:
+        pass
+
+    finally:
+        escritor.close()
+
+#--------------------------
+# Função SERVIR (asyncio)
+#--------------------------
+#
+# Sobe o servidor TCP (host/porta) ou Unix (caminho) e atende até ser
+# interrompido
+#
+
+async def servir(host="127.0.0.1", porta=PORTA_PADRAO, unix=None, servico=None):
+    servico = servico or ServicoBancario()
+
+    async def atender(leitor, escritor):
+        await tratar_conexao(servico, leitor, escritor)
+
+    if unix:
+        servidor = await asyncio.start_unix_server(atender, path=unix, backlog=4096)
+    else:
+        servidor = await asyncio.start_server(atender, host, porta, backlog=4096)
+
+    async with servidor:
+        print(f"Servidor bancário ouvindo em {unix or f'{host}:{porta}'}")
+        await servidor.serve_forever()
+
+#===================================
+# GERADOR DE CARGA
+#===================================
+#
+# Abre N conexões simultâneas; cada uma cria seu cliente e sua conta e
+# em seguida envia pedidos de depósito/saque/extrato em sequência,
+# medindo a latência de cada resposta.
+#
+
+async def _conectar(host, porta, unix):
+    if unix:
+        return await asyncio.open_unix_connection(unix)
+    return await asyncio.open_connection(host, porta)
+
+async def _pedir(leitor, escritor, pedido):
+    escritor.write(json.dumps(pedido).encode() + b"\n")
+    await escritor.drain()
+    return json.loads(await leitor.readline())
+
+async def _sessao_carga(indice, pedidos, host, porta, unix, latencias):
+    leitor, escritor = await _conectar(host, porta, unix)
+    cpf = completar_cpf(f"{indice:09d}")
+
+    await _pedir(leitor, escritor, {"op": "criar_cliente", "cpf": cpf, "nome": f"Cliente {indice}",
+                                    "data_nascimento": "01/01/1990", "endereco": "Rua A - 1"})
+    conta = (await _pedir(leitor, escritor, {"op": "criar_conta", "cpf": cpf}))["conta"]
+
+    operacoes = (
+        {"op": "depositar", "conta": conta, "valor": 100_00},
+        {"op": "sacar", "conta": conta, "valor": 10_00},
+        {"op": "depositar", "conta": conta, "valor": 5_00},
+    )
+
+    for i in range(pedidos):
+        inicio = time.perf_counter()
+        await _pedir(leitor, escritor, operacoes[i % len(operacoes)])
+        latencias.append(time.perf_counter() - inicio)
+
+    escritor.close()
+    await escritor.wait_closed()
+
+async def gerar_carga(conexoes=1_000, pedidos=100, host="127.0.0.1", porta=PORTA_PADRAO, unix=None):
+    latencias = []
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(
+        _sessao_carga(indice, pedidos, host, porta, unix, latencias)
+        for indice in range(1, conexoes + 1)
+    ))
+    decorrido = time.perf_counter() - inicio
+
+    latencias.sort()
+    total = len(latencias)
+
+    print(f"\nConexões: {conexoes}  pedidos: {total}  tempo: {decorrido:.2f} s")
+    print(f"Vazão: {total / decorrido:,.0f} pedidos/s")
+    print(f"Latência p50: {latencias[total // 2] * 1e3:.2f} ms  "
+          f"p99: {latencias[min(total - 1, int(total * 0.99))] * 1e3:.2f} ms")
+
+    return total / decorrido, latencias
+
+#==================================
+# PROGRAMA PRINCIPAL
+#==================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor do Sistema Bancário (JSON por linha)")
+    parser.add_argument("modo", choices=("servidor", "carga"))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=PORTA_PADRAO)
+    parser.add_argument("--unix", help="caminho do socket Unix (em vez de TCP)")
+    parser.add_argument("--conexoes", type=int, default=1_000, help="carga: conexões simultâneas")
+    parser.add_argument("--pedidos", type=int, default=100, help="carga: pedidos por conexão")
+    args = parser.parse_args()
+
+    try:
+        if args.modo == "servidor":
+            asyncio.run(servir(args.host, args.porta, args.unix))
+        else:
+            asyncio.run(gerar_carga(args.conexoes, args.pedidos, args.host, args.porta, args.unix))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
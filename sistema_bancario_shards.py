@@ -0,0 +1,369 @@
+# Sistema Bancário em Python - Execução particionada
+# Descrição: Distribui as contas do sistema_bancario_poo entre processos
+#            (shards), contornando o limite de um núcleo por processo
+#
+# Uso:
+#    with BancoParticionado(4) as banco:
+#        numeros = banco.abrir_contas(1_000)
+#        resultados = banco.executar([("depositar", 1, 100_00), ("transferir", 1, 2, 50_00)])
+#
+# Cada shard é um processo dono das suas contas (Conta + Historico): a
+# conta de número N fica no shard N % quantidade_shards. O roteador (o
+# processo que criou o BancoParticionado) agrupa as operações por shard
+# e envia um lote por pipe a cada um; os shards trabalham em paralelo.
+#
+# Transferência entre contas de shards diferentes usa commit em duas
+# fases coordenado pelo roteador:
+#    1. preparar: a origem valida e reserva o valor (sai do saldo, ainda
+#       sem histórico); o destino confirma que a conta existe
+#    2. confirmar, se os dois votaram OK (origem grava o histórico,
+#       destino credita), ou abortar (origem devolve a reserva)
+# O crédito só aparece no destino ao final do lote em que a
+# transferência foi enviada.
+
+import multiprocessing
+from datetime import datetime
+from itertools import count
+from operator import index
+
+from sistema_bancario_poo import (CONTA_INEXISTENTE, OK, TIPO_INVALIDO, VALOR_INVALIDO, ContaCorrente, Deposito,
+                                  ResultadoOperacao, Saque, Transferencia)
+
+#----------------------------------------
+# SHARD (processo de trabalho)
+#----------------------------------------
+#
+# Recebe lotes de comandos (tuplas com o nome da operação na primeira
+# posição) e responde, na mesma ordem, uma tupla (status, saldo) por
+# comando. Um lote None encerra o processo.
+#
+# Um comando inválido não derruba o shard (nem as contas dele): operação
+# desconhecida vira TIPO_INVALIDO e argumentos inválidos (valor que não é
+# inteiro, quantidade errada), VALOR_INVALIDO. Os valores são convertidos
+# antes de alterar qualquer saldo. Outros erros são defeitos e sobem.
+#
+
+def _executar_shard(conexao):
+    contas = {}
+    pendentes = {}
+
+    while True:
+        comandos = conexao.recv()
+        if comandos is None:
+            break
+
+        conexao.send([_executar_comando(contas, pendentes, comando) for comando in comandos])
+
+    conexao.close()
+
+def _executar_comando(contas, pendentes, comando):
+    operacao = _OPERACOES.get(comando[0])
+    if operacao is None:
+        return TIPO_INVALIDO, 0
+
+    try:
+        return operacao(contas, pendentes, *comando[1:])
+    except (TypeError, ValueError):
+        return VALOR_INVALIDO, 0
+
+def _abrir(contas, pendentes, numero, limite, limite_saques):
+    contas[numero] = ContaCorrente(numero, None, limite, limite_saques)
+    return OK, 0
+
+def _transacao(contas, classe, numero, valor):
+    conta = contas.get(numero)
+    if conta is None:
+        return CONTA_INEXISTENTE, 0
+
+    resultado = classe(valor).registrar(conta)
+    return resultado.status, resultado.saldo
+
+def _depositar(contas, pendentes, numero, valor):
+    return _transacao(contas, Deposito, numero, valor)
+
+def _sacar(contas, pendentes, numero, valor):
+    return _transacao(contas, Saque, numero, valor)
+
+# origem e destino no mesmo shard: a Transferencia já é atômica
+def _transferir(contas, pendentes, origem, destino, valor):
+    conta, conta_destino = contas.get(origem), contas.get(destino)
+    if conta is None or conta_destino is None:
+        return CONTA_INEXISTENTE, conta._saldo if conta is not None else 0
+
+    resultado = Transferencia(valor, conta_destino).registrar(conta)
+    return resultado.status, resultado.saldo
+
+# fase 1 na origem: valida o débito e reserva o valor
+def _preparar_debito(contas, pendentes, transacao, numero, valor):
+    valor = index(valor)
+    conta = contas.get(numero)
+    if conta is None:
+        return CONTA_INEXISTENTE, 0
+
+    with conta.trava:
+        status = conta._validar_debito(valor)
+        if status == OK:
+            conta._saldo -= valor
+            pendentes[transacao] = (conta, valor, "TransferenciaEnviada")
+        return status, conta._saldo
+
+# fase 1 no destino: só verifica que a conta existe
+def _preparar_credito(contas, pendentes, transacao, numero, valor):
+    valor = index(valor)
+    conta = contas.get(numero)
+    if conta is None:
+        return CONTA_INEXISTENTE, 0
+
+    pendentes[transacao] = (conta, valor, "TransferenciaRecebida")
+    return OK, conta._saldo
+
+# fase 2: efetiva o crédito e grava o histórico nos dois lados
+def _confirmar(contas, pendentes, transacao):
+    conta, valor, tipo = pendentes.pop(transacao, (None, 0, None))
+    if conta is None:
+        return CONTA_INEXISTENTE, 0
+
+    with conta.trava:
+        if tipo == "TransferenciaRecebida":
+            conta._saldo += valor
+        conta.historico.adicionar_transacao(Transferencia(valor, None), datetime.now(), tipo)
+        return OK, conta._saldo
+
+# fase 2: desfaz a reserva da origem (sem efeito se o shard não preparou)
+def _abortar(contas, pendentes, transacao):
+    conta, valor, tipo = pendentes.pop(transacao, (None, 0, None))
+    if conta is None:
+        return OK, 0
+
+    with conta.trava:
+        if tipo == "TransferenciaEnviada":
+            conta._saldo += valor
+        return OK, conta._saldo
+
+def _saldo(contas, pendentes, numero):
+    conta = contas.get(numero)
+    if conta is None:
+        return CONTA_INEXISTENTE, 0
+    return OK, conta._saldo
+
+def _total(contas, pendentes):
+    return OK, sum(conta._saldo for conta in contas.values())
+
+def _extrato(contas, pendentes, numero, ultimas):
+    conta = contas.get(numero)
+    if conta is None:
+        return CONTA_INEXISTENTE, []
+    return OK, list(conta.instantaneo().extrato(ultimas=ultimas))
+
+_OPERACOES = {
+    "abrir": _abrir,
+    "depositar": _depositar,
+    "sacar": _sacar,
+    "transferir": _transferir,
+    "preparar_debito": _preparar_debito,
+    "preparar_credito": _preparar_credito,
+    "confirmar": _confirmar,
+    "abortar": _abortar,
+    "saldo": _saldo,
+    "total": _total,
+    "extrato": _extrato,
+}
+
+#----------------------------------------
+# CLASSE: BancoParticionado
+#----------------------------------------
+#
+# Roteador: cria os shards, numera as contas e distribui as operações.
+# Não é thread-safe - um único roteador conversa com os shards.
+#
+# - quantidade_shards: int
+#
+# + abrir_contas(quantidade: int, limite: int, limite_saques: int): list
+# + executar(operacoes: list): list de ResultadoOperacao
+# + saldo(numero: int): int - centavos
+# + extrato(numero: int, ultimas: int): list
+# + total(): int - centavos
+# + fechar()
+#
+
+class BancoParticionado:
+    def __init__(self, quantidade_shards):
+        # spawn: o shard não herda ouvintes (ex.: journal) do processo pai
+        contexto = multiprocessing.get_context("spawn")
+
+        self._conexoes = []
+        self._processos = []
+        self._proximo_numero = 1
+        self._transacoes = count(1)
+
+        for _ in range(quantidade_shards):
+            conexao, conexao_shard = contexto.Pipe()
+            processo = contexto.Process(target=_executar_shard, args=(conexao_shard,), daemon=True)
+            processo.start()
+            conexao_shard.close()
+
+            self._conexoes.append(conexao)
+            self._processos.append(processo)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self.fechar()
+
+    @property
+    def quantidade_shards(self):
+        return len(self._conexoes)
+
+    def _shard(self, numero):
+        return numero % len(self._conexoes)
+
+# envia um lote a cada shard que tem comandos e espera todas as respostas
+    def _enviar(self, lotes):
+        for conexao, lote in zip(self._conexoes, lotes):
+            if lote:
+                conexao.send(lote)
+
+        return [conexao.recv() if lote else [] for conexao, lote in zip(self._conexoes, lotes)]
+
+    def _chamar(self, numero, comando):
+        conexao = self._conexoes[self._shard(numero)]
+        conexao.send([comando])
+        return conexao.recv()[0]
+
+#
+# MÉTODO abrir_contas
+#
+# Abre contas correntes com números sequenciais, distribuídas pelos shards
+#
+# Retorna:
+#    list: números das contas abertas
+#
+
+    def abrir_contas(self, quantidade, limite=500_00, limite_saques=3):
+        numeros = list(range(self._proximo_numero, self._proximo_numero + quantidade))
+        self._proximo_numero += quantidade
+
+        self.executar([("abrir", numero, limite, limite_saques) for numero in numeros])
+        return numeros
+
+#
+# MÉTODO executar
+#
+# Executa um lote de operações. As operações de uma mesma conta são
+# aplicadas na ordem do lote; as de contas em shards diferentes, em
+# paralelo.
+#
+# Uma transferência entre shards só termina na fase 2 (o crédito no
+# destino, ou a devolução da reserva na origem). Por isso o lote é
+# dividido em rodadas: a rodada é concluída, com as duas fases, antes da
+# primeira operação que use a origem ou o destino de uma transferência
+# entre shards ainda aberta; essa operação já vê o saldo final. A fase 2
+# de uma rodada segue no mesmo envio que a fase 1 da seguinte (o shard
+# executa os comandos na ordem), então cada rodada custa uma ida e volta.
+#
+# Args:
+#    operacoes (list): tuplas ("depositar", numero, valor),
+#                      ("sacar", numero, valor) ou
+#                      ("transferir", origem, destino, valor)
+# Retorna:
+#    list: um ResultadoOperacao por operação, na ordem do lote
+#
+
+    def executar(self, operacoes):
+        quantidade_shards = len(self._conexoes)
+        resultados = [None] * len(operacoes)
+        rodada = []
+        em_aberto = set()
+        decisoes = None
+
+        for posicao, operacao in enumerate(operacoes):
+            contas = operacao[1:3] if operacao[0] == "transferir" else operacao[1:2]
+
+            if em_aberto and not em_aberto.isdisjoint(contas):
+                decisoes = self._executar_rodada(rodada, resultados, decisoes)
+                rodada = []
+                em_aberto.clear()
+
+            rodada.append((posicao, operacao))
+            if operacao[0] == "transferir" and operacao[1] % quantidade_shards != operacao[2] % quantidade_shards:
+                em_aberto.update(contas)
+
+        decisoes = self._executar_rodada(rodada, resultados, decisoes)
+        if any(decisoes):
+            self._enviar(decisoes)
+
+        return [ResultadoOperacao(status, saldo) for status, saldo in resultados]
+
+# operações (posição, operação) sem dependência de uma transferência
+# entre shards em aberto, enviadas depois da fase 2 da rodada anterior;
+# devolve a fase 2 desta (comandos por shard)
+    def _executar_rodada(self, rodada, resultados, decisoes_anteriores=None):
+        quantidade_shards = len(self._conexoes)
+        lotes = [list(decisoes) for decisoes in decisoes_anteriores or [()] * quantidade_shards]
+        posicoes = [[None] * len(lote) for lote in lotes]
+        cruzadas = []
+
+        for posicao, operacao in rodada:
+            shard = operacao[1] % quantidade_shards
+
+            if operacao[0] == "transferir":
+                _, origem, destino, valor = operacao
+                shard_destino = destino % quantidade_shards
+
+                if shard_destino != shard:
+                    transacao = next(self._transacoes)
+                    cruzadas.append((posicao, transacao, shard, shard_destino, len(lotes[shard_destino]), valor))
+                    operacao = ("preparar_debito", transacao, origem, valor)
+                    lotes[shard_destino].append(("preparar_credito", transacao, destino, valor))
+                    posicoes[shard_destino].append(None)
+
+            lotes[shard].append(operacao)
+            posicoes[shard].append(posicao)
+
+        respostas = self._enviar(lotes)
+
+        for posicoes_shard, respostas_shard in zip(posicoes, respostas):
+            for posicao, resposta in zip(posicoes_shard, respostas_shard):
+                if posicao is not None:
+                    resultados[posicao] = resposta
+
+        # fase 2 das transferências entre shards
+        decisoes = [[] for _ in range(quantidade_shards)]
+        for posicao, transacao, shard, shard_destino, indice_credito, valor in cruzadas:
+            status_debito, saldo = resultados[posicao]
+            status_credito = respostas[shard_destino][indice_credito][0]
+
+            if status_debito == OK and status_credito == OK:
+                decisao = ("confirmar", transacao)
+            else:
+                decisao = ("abortar", transacao)
+                if status_debito == OK:
+                    resultados[posicao] = (status_credito, saldo + valor)
+
+            decisoes[shard].append(decisao)
+            decisoes[shard_destino].append(decisao)
+
+        return decisoes
+
+    def saldo(self, numero):
+        return self._chamar(numero, ("saldo", numero))[1]
+
+    def extrato(self, numero, ultimas=None):
+        return self._chamar(numero, ("extrato", numero, ultimas))[1]
+
+# soma dos saldos de todos os shards, em centavos
+    def total(self):
+        respostas = self._enviar([[("total",)]] * len(self._conexoes))
+        return sum(resposta[0][1] for resposta in respostas)
+
+    def fechar(self):
+        for conexao in self._conexoes:
+            conexao.send(None)
+            conexao.close()
+
+        for processo in self._processos:
+            processo.join()
+
+        self._conexoes = []
+        self._processos = []